@@ -1,48 +1,78 @@
+from dataclasses import replace
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
 from sqlalchemy.orm import Session
 
-from app.config import settings
 from app.database import get_db
 from app.models.user import User
+from app.services.auth_service import UserSnapshot, user_cache
+from app.utils.auth import decode_access_token
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
 
 def get_current_user(
     token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
-) -> User:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-
+) -> UserSnapshot:
+    payload = decode_access_token(token)
+    if payload is None:
+        raise credentials_exception
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        user_id: int = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except JWTError:
+        user_id = int(payload.get("sub"))
+    except (TypeError, ValueError):
         raise credentials_exception
 
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
-        raise credentials_exception
+    # Served from the in-process cache; the DB is only hit on a miss
+    snapshot = user_cache.get(user_id)
+    if snapshot is None:
+        user = db.query(User).filter(User.id == user_id).first()
+        if user is None:
+            raise credentials_exception
+        snapshot = user_cache.put(UserSnapshot.from_user(user))
 
-    return user
+    return snapshot
 
 
-def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+def get_current_active_user(
+    current_user: UserSnapshot = Depends(get_current_user),
+) -> UserSnapshot:
     return current_user
 
 
+# Full User row, for endpoints that read or modify the profile itself
+def get_current_user_record(
+    current_user: UserSnapshot = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+) -> User:
+    user = db.query(User).filter(User.id == current_user.id).first()
+    if user is None:
+        user_cache.invalidate(current_user.id)
+        raise credentials_exception
+    return user
+
+
 # NEW: Admin-only dependency
-def get_current_admin_user(current_user: User = Depends(get_current_user)) -> User:
-    if current_user.role != "admin":
+def get_current_admin_user(
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> UserSnapshot:
+    # The role is read from the DB: a snapshot cached by this worker may not
+    # have seen a demotion or deletion committed by another one
+    role = db.query(User.role).filter(User.id == current_user.id).scalar()
+    if role is None:
+        user_cache.invalidate(current_user.id)
+        raise credentials_exception
+    if role != current_user.role:
+        user_cache.invalidate(current_user.id)
+        current_user = replace(current_user, role=role)
+    if role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required"
         )
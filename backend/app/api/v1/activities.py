@@ -1,15 +1,24 @@
 # app/api/v1/activities.py
+from collections import defaultdict
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel
+from sqlalchemy import delete, insert
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_active_user
 from app.database import get_db
 from app.models.activity import Activity, StopActivity
+from app.models.loaders import stop_owner_options
 from app.models.stop import Stop
-from app.models.trip import Trip
+from app.schemas.activity import (
+    StopActivityBatchAdd,
+    StopActivityBatchItem,
+    StopActivityBatchRemove,
+    StopActivityBatchResponse,
+)
+from app.services.catalog import catalog
 
 router = APIRouter()
 
@@ -27,13 +36,7 @@ def search_activities(
     category: Optional[str] = None,
     db: Session = Depends(get_db),
 ):
-    query = db.query(Activity)
-    if city_id:
-        query = query.filter(Activity.city_id == city_id)
-    if category:
-        query = query.filter(Activity.category == category)
-
-    activities = query.limit(50).all()
+    activities = catalog.get(db).filter_activities(city_id, category, limit=50)
     # Simple manual serialization to avoid needing a new Schema file just for this
     return [
         {
@@ -56,16 +59,13 @@ def add_activity_to_stop(
     db: Session = Depends(get_db),
 ):
     # Verify stop belongs to user
-    stop = db.query(Stop).filter(Stop.id == stop_id).first()
+    stop = (
+        db.query(Stop).options(*stop_owner_options()).filter(Stop.id == stop_id).first()
+    )
     if not stop:
         raise HTTPException(status_code=404, detail="Stop not found")
 
-    trip = (
-        db.query(Trip)
-        .filter(Trip.id == stop.trip_id, Trip.user_id == current_user.id)
-        .first()
-    )
-    if not trip:
+    if stop.trip.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to edit this trip")
 
     # Get generic cost if user didn't provide one
@@ -97,16 +97,13 @@ def remove_activity_from_stop(
 ):
     """Remove an activity from a specific stop"""
     # 1. Check if the stop belongs to the user
-    stop = db.query(Stop).filter(Stop.id == stop_id).first()
+    stop = (
+        db.query(Stop).options(*stop_owner_options()).filter(Stop.id == stop_id).first()
+    )
     if not stop:
         raise HTTPException(status_code=404, detail="Stop not found")
 
-    trip = (
-        db.query(Trip)
-        .filter(Trip.id == stop.trip_id, Trip.user_id == current_user.id)
-        .first()
-    )
-    if not trip:
+    if stop.trip.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
 
     # 2. Find the link
@@ -124,3 +121,119 @@ def remove_activity_from_stop(
     db.delete(stop_activity)
     db.commit()
     return None
+
+
+def _owned_stop(db: Session, stop_id: int, current_user) -> Stop:
+    stop = (
+        db.query(Stop).options(*stop_owner_options()).filter(Stop.id == stop_id).first()
+    )
+    if not stop:
+        raise HTTPException(status_code=404, detail="Stop not found")
+
+    if stop.trip.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized to edit this trip")
+    return stop
+
+
+def _batch_response(
+    stop_id: int, results: List[StopActivityBatchItem]
+) -> StopActivityBatchResponse:
+    failed = sum(1 for item in results if item.status == "not_found")
+    return StopActivityBatchResponse(
+        stop_id=stop_id,
+        succeeded=len(results) - failed,
+        failed=failed,
+        results=results,
+    )
+
+
+# 3. Add many activities to a stop in one transaction (Protected)
+@router.post("/stop/{stop_id}/batch", response_model=StopActivityBatchResponse)
+def add_activities_to_stop(
+    stop_id: int,
+    payload: StopActivityBatchAdd,
+    current_user=Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    """Add several activities to a stop; unknown activities are reported per item"""
+    _owned_stop(db, stop_id, current_user)
+
+    # Default costs of every requested activity in one query
+    activity_ids = {item.activity_id for item in payload.items}
+    default_costs = dict(
+        db.query(Activity.id, Activity.estimated_cost).filter(
+            Activity.id.in_(activity_ids)
+        )
+    )
+
+    rows, results = [], []
+    for item in payload.items:
+        if item.activity_id not in default_costs:
+            results.append(
+                StopActivityBatchItem(activity_id=item.activity_id, status="not_found")
+            )
+            continue
+        cost = (
+            item.actual_cost
+            if item.actual_cost is not None
+            else default_costs[item.activity_id]
+        )
+        rows.append(
+            {"stop_id": stop_id, "activity_id": item.activity_id, "actual_cost": cost}
+        )
+        results.append(
+            StopActivityBatchItem(
+                activity_id=item.activity_id, status="added", actual_cost=cost
+            )
+        )
+
+    # One executemany INSERT for every link
+    if rows:
+        db.execute(insert(StopActivity.__table__), rows)
+        db.commit()
+    return _batch_response(stop_id, results)
+
+
+# 4. Remove many activities from a stop in one transaction (Protected)
+@router.post("/stop/{stop_id}/batch-delete", response_model=StopActivityBatchResponse)
+def remove_activities_from_stop(
+    stop_id: int,
+    payload: StopActivityBatchRemove,
+    current_user=Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    """Remove several activities from a stop; absent ones are reported per item"""
+    _owned_stop(db, stop_id, current_user)
+
+    # The stop's links to the requested activities, oldest first
+    links = defaultdict(list)
+    rows = (
+        db.query(StopActivity.id, StopActivity.activity_id)
+        .filter(
+            StopActivity.stop_id == stop_id,
+            StopActivity.activity_id.in_(set(payload.activity_ids)),
+        )
+        .order_by(StopActivity.id)
+    )
+    for link_id, activity_id in rows:
+        links[activity_id].append(link_id)
+
+    # Each listed id removes one link, as the single delete does
+    doomed, results = [], []
+    for activity_id in payload.activity_ids:
+        if links[activity_id]:
+            doomed.append(links[activity_id].pop(0))
+            outcome = "removed"
+        else:
+            outcome = "not_found"
+        results.append(StopActivityBatchItem(activity_id=activity_id, status=outcome))
+
+    # One DELETE for every link
+    if doomed:
+        db.execute(
+            delete(StopActivity)
+            .where(StopActivity.id.in_(doomed))
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+    return _batch_response(stop_id, results)
@@ -1,60 +1,71 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy import func
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_admin_user
 from app.database import get_db
-from app.models.city import City
-from app.models.stop import Stop
 from app.models.trip import Trip
 from app.models.user import User
+from app.services.analytics_service import (
+    popular_cities,
+    reconcile_rollups,
+    window_totals,
+)
+from app.services.auth_service import UserSnapshot, user_cache
+from app.services.export_service import (
+    MEDIA_TYPES,
+    ExportFormat,
+    ExportTable,
+    export_rows,
+)
+from app.services.response_cache import response_cache
+from app.utils.pagination import PageParams, paginate
 
 router = APIRouter()
 
 
 @router.get("/analytics")
 def get_analytics(
-    current_admin: User = Depends(get_current_admin_user), db: Session = Depends(get_db)
+    window: Optional[str] = Query(
+        None,
+        pattern=r"^[1-9][0-9]{0,3}d$",
+        description="Only count rows created in the last N days, e.g. 30d",
+    ),
+    current_admin: UserSnapshot = Depends(get_current_admin_user),
+    db: Session = Depends(get_db),
 ):
-    """Admin dashboard analytics"""
-
-    # User stats
-    total_users = db.query(func.count(User.id)).scalar()
-    verified_users = (
-        db.query(func.count(User.id)).filter(User.is_verified == True).scalar()
-    )
+    """Admin dashboard analytics, read from the daily rollups"""
+    since = None
+    if window:
+        since = datetime.utcnow().date() - timedelta(days=int(window[:-1]) - 1)
 
-    # Trip stats
-    total_trips = db.query(func.count(Trip.id)).scalar()
-    public_trips = db.query(func.count(Trip.id)).filter(Trip.is_public == 1).scalar()
+    # User + trip stats
+    totals = window_totals(db, since)
 
     # Popular cities (most visited)
-    popular_cities = (
-        db.query(City.name, City.country, func.count(Stop.id).label("visit_count"))
-        .join(Stop, Stop.city_id == City.id)
-        .group_by(City.id)
-        .order_by(func.count(Stop.id).desc())
-        .limit(10)
-        .all()
-    )
+    cities = popular_cities(db, since, limit=10)
 
     # Recent trips
     recent_trips = db.query(Trip).order_by(Trip.created_at.desc()).limit(10).all()
 
     return {
+        "window": window or "all",
         "users": {
-            "total": total_users,
-            "verified": verified_users,
-            "unverified": total_users - verified_users,
+            "total": totals["users"],
+            "verified": totals["verified_users"],
+            "unverified": totals["users"] - totals["verified_users"],
         },
         "trips": {
-            "total": total_trips,
-            "public": public_trips,
-            "private": total_trips - public_trips,
+            "total": totals["trips"],
+            "public": totals["public_trips"],
+            "private": totals["trips"] - totals["public_trips"],
         },
         "popular_cities": [
             {"name": city.name, "country": city.country, "visits": count}
-            for city, count in popular_cities
+            for city, count in cities
         ],
         "recent_trips": [
             {
@@ -68,12 +79,24 @@ def get_analytics(
     }
 
 
+@router.post("/analytics/reconcile", status_code=status.HTTP_204_NO_CONTENT)
+def reconcile_analytics(
+    current_admin: UserSnapshot = Depends(get_current_admin_user),
+    db: Session = Depends(get_db),
+):
+    """Rebuild the analytics rollups from the source tables (admin only)"""
+    reconcile_rollups(db)
+
+
 @router.get("/users")
 def get_all_users(
-    current_admin: User = Depends(get_current_admin_user), db: Session = Depends(get_db)
+    response: Response,
+    page: PageParams = Depends(),
+    current_admin: UserSnapshot = Depends(get_current_admin_user),
+    db: Session = Depends(get_db),
 ):
-    """Get all users (admin only)"""
-    users = db.query(User).all()
+    """Get all users, newest first, one page at a time (admin only)"""
+    users = paginate(db.query(User), User, page, response)
     return [
         {
             "id": user.id,
@@ -89,8 +112,43 @@ def get_all_users(
 
 @router.get("/trips")
 def get_all_trips(
-    current_admin: User = Depends(get_current_admin_user), db: Session = Depends(get_db)
+    response: Response,
+    page: PageParams = Depends(),
+    current_admin: UserSnapshot = Depends(get_current_admin_user),
+    db: Session = Depends(get_db),
+):
+    """Get all trips, newest first, one page at a time (admin only)"""
+    return paginate(db.query(Trip), Trip, page, response)
+
+
+@router.get("/export/{table}")
+def export_table(
+    table: ExportTable,
+    format: ExportFormat = Query(ExportFormat.NDJSON),
+    current_admin: UserSnapshot = Depends(get_current_admin_user),
+    db: Session = Depends(get_db),
+):
+    """Stream a whole table as NDJSON or CSV (admin only)"""
+    return StreamingResponse(
+        export_rows(db, table, format),
+        media_type=MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": (
+                f'attachment; filename="{table.value}.{format.value}"'
+            )
+        },
+    )
+
+
+@router.get("/cache/users")
+def get_user_cache_stats(current_admin: UserSnapshot = Depends(get_current_admin_user)):
+    """Hit/miss counters for the authenticated-user cache (admin only)"""
+    return user_cache.stats()
+
+
+@router.get("/cache/responses")
+def get_response_cache_stats(
+    current_admin: UserSnapshot = Depends(get_current_admin_user),
 ):
-    """Get all trips (admin only)"""
-    trips = db.query(Trip).all()
-    return trips
+    """Hit/miss counters for the public GET response cache (admin only)"""
+    return response_cache.stats()
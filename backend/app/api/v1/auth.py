@@ -1,62 +1,120 @@
 from datetime import timedelta
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_active_user
+from app.api.deps import get_current_user_record
 from app.config import settings
 from app.database import get_db
 from app.models.user import User
 from app.schemas.user import Token, UserCreate, UserLogin, UserResponse
-from app.utils.auth import create_access_token, get_password_hash, verify_password
+from app.services.password_hasher import HashingBusy, password_hasher
+from app.utils.auth import create_access_token
 
 router = APIRouter()
 
 
+def _hashing_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many authentication requests, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
+# Login and register are async so argon2 runs on the bounded hashing pool
+# instead of a threadpool thread; their DB work still goes to the threadpool.
+# Lookups end their transaction so no pooled connection is held while a
+# request waits for a hash.
+
+
+def _find_conflict(db: Session, user_data: UserCreate):
+    try:
+        if db.query(User.id).filter(User.email == user_data.email).first():
+            return "Email already registered"
+        if db.query(User.id).filter(User.username == user_data.username).first():
+            return "Username already taken"
+        return None
+    finally:
+        db.rollback()
+
+
+def _insert_user(db: Session, user: User) -> User:
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+def _find_credentials(db: Session, email: str):
+    try:
+        return (
+            db.query(User.id, User.hashed_password).filter(User.email == email).first()
+        )
+    finally:
+        db.rollback()
+
+
+def _store_rehash(db: Session, user_id: int, hashed_password: str) -> None:
+    db.query(User).filter(User.id == user_id).update(
+        {User.hashed_password: hashed_password}, synchronize_session=False
+    )
+    db.commit()
+
+
 @router.post(
     "/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED
 )
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
-    # Check if email exists
-    if db.query(User).filter(User.email == user_data.email).first():
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered"
-        )
-
-    # Check if username exists
-    if db.query(User).filter(User.username == user_data.username).first():
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail="Username already taken"
-        )
+async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+    # Check if email or username exists
+    conflict = await run_in_threadpool(_find_conflict, db, user_data)
+    if conflict:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=conflict)
+
+    # Hash on the dedicated pool
+    try:
+        hashed_password = await password_hasher.hash(user_data.password)
+    except HashingBusy:
+        raise _hashing_busy()
 
     # Create new user
     new_user = User(
         email=user_data.email,
         username=user_data.username,
         full_name=user_data.full_name,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=hashed_password,
     )
 
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-
-    return new_user
+    return await run_in_threadpool(_insert_user, db, new_user)
 
 
 @router.post("/login", response_model=Token)
-def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
     # Find user by email
-    user = db.query(User).filter(User.email == user_credentials.email).first()
-
-    if not user or not verify_password(user_credentials.password, user.hashed_password):
+    user = await run_in_threadpool(_find_credentials, db, user_credentials.email)
+
+    valid, new_hash = False, None
+    if user:
+        try:
+            valid, new_hash = await password_hasher.verify_and_update(
+                user_credentials.password, user.hashed_password
+            )
+        except HashingBusy:
+            raise _hashing_busy()
+
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # Stored hash used older argon2 costs: upgrade it now we know the password
+    if new_hash:
+        await run_in_threadpool(_store_rehash, db, user.id, new_hash)
+
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
@@ -67,5 +125,5 @@ def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
 
 
 @router.get("/me", response_model=UserResponse)
-def get_current_user_info(current_user: User = Depends(get_current_active_user)):
+def get_current_user_info(current_user: User = Depends(get_current_user_record)):
     return current_user
@@ -3,10 +3,8 @@ from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_active_user
 from app.database import get_db
-from app.models.activity import StopActivity
-from app.models.city import City
-from app.models.stop import Stop
 from app.models.trip import Trip
+from app.services.budget_service import calculate_trip_budget
 
 router = APIRouter()
 
@@ -26,57 +24,5 @@ def get_trip_budget(
     if not trip:
         raise HTTPException(status_code=404, detail="Trip not found")
 
-    # 2. Calculate Costs
-    stops = db.query(Stop).filter(Stop.trip_id == trip_id).all()
-
-    total_accommodation = 0.0
-    total_activities = 0.0
-    total_transport = 0.0  # FIX: Initialized variable
-    breakdown = []
-
-    for stop in stops:
-        # Calculate Duration (simple difference in days)
-        duration = (stop.end_date - stop.start_date).days
-        duration = max(duration, 1)  # Minimum 1 day
-
-        # Accommodation (City Cost * Days)
-        city = db.query(City).filter(City.id == stop.city_id).first()
-        acc_cost = (city.avg_cost_per_day or 0) * duration
-        total_accommodation += acc_cost
-
-        # Activities Cost for this stop
-        activities = (
-            db.query(StopActivity).filter(StopActivity.stop_id == stop.id).all()
-        )
-        act_cost = sum(a.actual_cost or 0 for a in activities)
-        total_activities += act_cost
-
-        # Transport Cost
-        # Note: Ensure you have added 'transport_cost' column to your Stop model
-        trans_cost = getattr(stop, "transport_cost", 0.0) or 0.0
-        total_transport += trans_cost
-
-        breakdown.append(
-            {
-                "city": city.name,
-                "days": duration,
-                "accommodation": acc_cost,
-                "transport": trans_cost,
-                "activities": act_cost,
-                "subtotal": acc_cost
-                + act_cost
-                + trans_cost,  # FIX: Added transport to subtotal
-            }
-        )
-
-    return {
-        "total_budget": total_accommodation
-        + total_activities
-        + total_transport,  # FIX: Added transport to total
-        "categories": {
-            "accommodation": total_accommodation,
-            "activities": total_activities,
-            "transport": total_transport,  # FIX: Using calculated value
-        },
-        "breakdown": breakdown,
-    }
+    # 2. Calculate Costs (single aggregated query, see budget_service)
+    return calculate_trip_budget(db, trip_id)
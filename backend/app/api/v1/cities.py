@@ -3,12 +3,27 @@ from typing import List, Optional
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 
+from app.config import settings
 from app.database import get_db
 from app.models.city import City
-from app.schemas.city import CityListResponse, CityResponse
+from app.models.city_search import apply_city_search
+from app.schemas.city import (
+    CityAutocompleteResponse,
+    CityListResponse,
+    CityNearbyResponse,
+    CityResponse,
+)
+from app.services.autocomplete import ensure_autocomplete
+from app.services.catalog import catalog
+from app.services.geo_index import ensure_geo_index
+from app.services.popularity import ensure_popularity, popular_cities
+from app.utils.fast_json import fast_response, json_serializer
+from app.utils.geo import MAX_DISTANCE_KM
 
 router = APIRouter()
 
+_city_list_json = json_serializer(CityListResponse)
+
 
 @router.get("/", response_model=List[CityListResponse])
 def search_cities(
@@ -21,22 +36,17 @@ def search_cities(
     db: Session = Depends(get_db),
 ):
     """Search and filter cities"""
-    query = db.query(City)
-
-    # Search filter
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            (City.name.ilike(search_term)) | (City.country.ilike(search_term))
+    # Without a text search the in-memory catalog answers the filters
+    if not search:
+        cities = catalog.get(db).filter_cities(
+            country, region, min_cost, max_cost, limit
         )
+        return fast_response(_city_list_json, cities, many=True)
 
-    # Country filter
-    if country:
-        query = query.filter(City.country.ilike(f"%{country}%"))
+    query = db.query(City)
 
-    # Region filter
-    if region:
-        query = query.filter(City.region.ilike(f"%{region}%"))
+    # Search, country and region filters (full-text index where available)
+    query, ranked = apply_city_search(query, db, search, country, region)
 
     # Cost filters
     if min_cost is not None:
@@ -44,18 +54,63 @@ def search_cities(
     if max_cost is not None:
         query = query.filter(City.avg_cost_per_day <= max_cost)
 
-    # Order by popularity by default
-    query = query.order_by(City.popularity_score.desc())
+    # Text matches come ranked by relevance + popularity, else by popularity
+    if not ranked:
+        query = query.order_by(City.popularity_score.desc())
 
     cities = query.limit(limit).all()
-    return cities
+    return fast_response(_city_list_json, cities, many=True)
 
 
 @router.get("/popular", response_model=List[CityListResponse])
 def get_popular_cities(limit: int = Query(10, le=50), db: Session = Depends(get_db)):
     """Get most popular cities"""
-    cities = db.query(City).order_by(City.popularity_score.desc()).limit(limit).all()
-    return cities
+    ensure_popularity(db)
+    return popular_cities(catalog.get(db), limit)
+
+
+@router.get("/autocomplete", response_model=List[CityAutocompleteResponse])
+def autocomplete_cities(
+    q: str = Query(..., min_length=1, description="Prefix of a city or country"),
+    k: int = Query(
+        settings.AUTOCOMPLETE_MAX_RESULTS, ge=1, le=settings.AUTOCOMPLETE_MAX_RESULTS
+    ),
+    db: Session = Depends(get_db),
+):
+    """Typeahead suggestions served from the in-memory prefix index"""
+    return ensure_autocomplete(db).search(q, k)
+
+
+@router.get("/nearby", response_model=List[CityNearbyResponse])
+def nearby_cities(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_km: Optional[float] = Query(None, gt=0, le=MAX_DISTANCE_KM),
+    k: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    """Nearest cities to a point, optionally within a radius"""
+    hits = ensure_geo_index(db).nearest(lat, lon, k, radius_km)
+    if not hits:
+        return []
+
+    # Index gives ids + distances; the catalog has the rows
+    snapshot = catalog.get(db)
+    results = []
+    for distance, city_id in hits:
+        city = snapshot.get_city(city_id)
+        if city is None:
+            continue  # Deleted since the index was read
+        fields = CityListResponse.model_validate(city).model_dump()
+        results.append(
+            CityNearbyResponse(
+                **fields,
+                latitude=city.latitude,
+                longitude=city.longitude,
+                distance_km=round(distance, 3),
+            )
+        )
+    return results
 
 
 @router.get("/{city_id}", response_model=CityResponse)
@@ -63,7 +118,7 @@ def get_city(city_id: int, db: Session = Depends(get_db)):
     """Get single city details"""
     from fastapi import HTTPException, status
 
-    city = db.query(City).filter(City.id == city_id).first()
+    city = catalog.get(db).get_city(city_id)
 
     if not city:
         raise HTTPException(
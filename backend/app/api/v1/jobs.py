@@ -0,0 +1,77 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_active_user
+from app.config import settings
+from app.database import get_db
+from app.models.job import Job
+from app.schemas.job import JobCreate, JobResponse
+from app.services import jobs  # noqa: F401  (registers the built-in job kinds)
+from app.services.auth_service import UserSnapshot
+from app.services.job_runner import get_job_spec, job_runner
+
+router = APIRouter()
+
+
+@router.post("/", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+def create_job(
+    job_data: JobCreate,
+    current_user: UserSnapshot = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    """Queue a background job; poll GET /jobs/{id} for its progress"""
+    # 1. Known kind the user may run
+    spec = get_job_spec(job_data.kind)
+    if spec is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown job kind '{job_data.kind}'",
+        )
+
+    if spec.admin_only and current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required"
+        )
+
+    # 2. Validate params up front rather than failing in the worker
+    params = job_data.params
+    if spec.params_model is not None:
+        try:
+            params = spec.params_model.model_validate(params).model_dump()
+        except ValidationError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+                detail=exc.errors(include_url=False, include_context=False),
+            )
+
+    # 3. Persist, then hand the id to the runner
+    job = Job(
+        kind=spec.kind,
+        params=params,
+        user_id=current_user.id,
+        max_attempts=settings.JOB_MAX_ATTEMPTS,
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    job_runner.submit(job.id)
+
+    return job
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+def get_job(
+    job_id: int,
+    current_user: UserSnapshot = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    """Job status, progress and result"""
+    job = db.query(Job).filter(Job.id == job_id).first()
+
+    if not job or (job.user_id != current_user.id and current_user.role != "admin"):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Job not found"
+        )
+
+    return job
@@ -1,18 +1,89 @@
-from typing import List
+from collections import Counter
+from contextlib import contextmanager
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_active_user
 from app.database import get_db
 from app.models.city import City
+from app.models.loaders import stop_graph_options, stop_owner_options
 from app.models.stop import Stop
 from app.models.trip import Trip
-from app.models.user import User
-from app.schemas.stop import StopCreate, StopResponse, StopUpdate, StopWithCityResponse
+from app.schemas.stop import (
+    RouteOptimizationResponse,
+    StopBatchCreate,
+    StopCreate,
+    StopOrderUpdate,
+    StopResponse,
+    StopUpdate,
+    StopWithCityResponse,
+)
+from app.services.analytics_service import record_city_visits
+from app.services.auth_service import UserSnapshot
+from app.services.popularity import stage_city_visits
+from app.services.route_optimizer import optimize_route
+from app.services.trip_service import (
+    move_stop,
+    next_stop_order,
+    reorder_stops,
+    trip_stop_ids,
+)
+from app.utils.fast_json import fast_response, json_serializer
 
 router = APIRouter()
 
+_stop_json = json_serializer(StopWithCityResponse)
+
+
+def _load_stop_graph(db: Session, stop_id: int) -> Stop:
+    """Reload a stop with its city and activities eagerly loaded"""
+    return (
+        db.query(Stop)
+        .options(*stop_graph_options())
+        .filter(Stop.id == stop_id)
+        .populate_existing()
+        .one()
+    )
+
+
+def _date_error(trip: Trip, stop_data: StopCreate) -> Optional[str]:
+    if stop_data.start_date >= stop_data.end_date:
+        return "End date must be after start date"
+    if stop_data.start_date < trip.start_date or stop_data.end_date > trip.end_date:
+        return "Stop dates must be within trip dates"
+    return None
+
+
+def _stop_values(trip_id: int, stop_data: StopCreate, order) -> dict:
+    return {
+        "trip_id": trip_id,
+        "city_id": stop_data.city_id,
+        "start_date": stop_data.start_date,
+        "end_date": stop_data.end_date,
+        "notes": stop_data.notes,
+        "transport_cost": stop_data.transport_cost or 0.0,
+        "order": order,
+    }
+
+
+@contextmanager
+def _new_stops_transaction(db: Session):
+    """Write new stops in the block, then commit; losing a race for a stop
+    position, at the INSERT or at the commit, is a 409"""
+    try:
+        yield
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="The trip's stops changed concurrently, please retry",
+        )
+
 
 @router.post(
     "/trips/{trip_id}/stops",
@@ -22,7 +93,7 @@ router = APIRouter()
 def add_stop_to_trip(
     trip_id: int,
     stop_data: StopCreate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserSnapshot = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ):
     """Add a city stop to a trip"""
@@ -43,40 +114,90 @@ def add_stop_to_trip(
             status_code=status.HTTP_404_NOT_FOUND, detail="City not found"
         )
 
-    if stop_data.start_date >= stop_data.end_date:
+    error = _date_error(trip, stop_data)
+    if error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error)
+
+    # The position is computed inside the INSERT itself
+    new_stop = Stop(**_stop_values(trip_id, stop_data, next_stop_order(trip_id)))
+    with _new_stops_transaction(db):
+        db.add(new_stop)
+
+    return _load_stop_graph(db, new_stop.id)
+
+
+@router.post(
+    "/trips/{trip_id}/stops:batch",
+    response_model=List[StopWithCityResponse],
+    status_code=status.HTTP_201_CREATED,
+)
+def add_stops_to_trip(
+    trip_id: int,
+    payload: StopBatchCreate,
+    current_user: UserSnapshot = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    """Append several stops to a trip, all or nothing"""
+    # 1. The trip together with its next free position
+    row = (
+        db.query(Trip, next_stop_order(trip_id))
+        .filter(Trip.id == trip_id, Trip.user_id == current_user.id)
+        .first()
+    )
+
+    if not row:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="End date must be after start date",
+            status_code=status.HTTP_404_NOT_FOUND, detail="Trip not found"
         )
+    trip, next_order = row
 
-    if stop_data.start_date < trip.start_date or stop_data.end_date > trip.end_date:
+    # 2. Every city checked in one query
+    city_ids = {stop_data.city_id for stop_data in payload.stops}
+    found = {city_id for (city_id,) in db.query(City.id).filter(City.id.in_(city_ids))}
+    if found != city_ids:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Stop dates must be within trip dates",
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Cities not found: {sorted(city_ids - found)}",
         )
 
-    max_order = db.query(Stop).filter(Stop.trip_id == trip_id).count()
-
-    new_stop = Stop(
-        trip_id=trip_id,
-        city_id=stop_data.city_id,
-        start_date=stop_data.start_date,
-        end_date=stop_data.end_date,
-        notes=stop_data.notes,
-        order=max_order + 1,
+    for index, stop_data in enumerate(payload.stops):
+        error = _date_error(trip, stop_data)
+        if error:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"stops[{index}]: {error}",
+            )
+
+    # 3. One executemany INSERT on the table (the ORM bulk path would split
+    # rows by their NULLs). Core skips the ORM hooks, so count the new stops
+    # in the rollups and the popularity ranking as clone_trip does
+    # The positions were read before any lock was held: a concurrent append
+    # makes this INSERT hit the unique (trip_id, order) index
+    with _new_stops_transaction(db):
+        db.execute(
+            insert(Stop.__table__),
+            [
+                _stop_values(trip_id, stop_data, next_order + index)
+                for index, stop_data in enumerate(payload.stops)
+            ],
+        )
+        visits = Counter(stop_data.city_id for stop_data in payload.stops)
+        record_city_visits(db, visits)
+        stage_city_visits(db, visits)
+
+    return (
+        db.query(Stop)
+        .options(*stop_graph_options())
+        .filter(Stop.trip_id == trip_id, Stop.order >= next_order)
+        .order_by(Stop.order)
+        .all()
     )
 
-    db.add(new_stop)
-    db.commit()
-    db.refresh(new_stop)
-
-    return new_stop
-
 
 @router.get("/trips/{trip_id}/stops", response_model=List[StopWithCityResponse])
 def get_trip_stops(
     trip_id: int,
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserSnapshot = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ):
     """Get all stops for a trip"""
@@ -91,32 +212,127 @@ def get_trip_stops(
             status_code=status.HTTP_404_NOT_FOUND, detail="Trip not found"
         )
 
-    stops = db.query(Stop).filter(Stop.trip_id == trip_id).order_by(Stop.order).all()
+    stops = (
+        db.query(Stop)
+        .options(*stop_graph_options())
+        .filter(Stop.trip_id == trip_id)
+        .order_by(Stop.order)
+        .all()
+    )
 
-    return stops
+    return fast_response(_stop_json, stops, many=True)
 
 
-@router.get("/stops/{stop_id}", response_model=StopWithCityResponse)
-def get_stop(
-    stop_id: int,
-    current_user: User = Depends(get_current_active_user),
+@router.put("/trips/{trip_id}/stops/order", response_model=List[StopWithCityResponse])
+def reorder_trip_stops(
+    trip_id: int,
+    payload: StopOrderUpdate,
+    current_user: UserSnapshot = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ):
-    """Get single stop details"""
-    stop = db.query(Stop).filter(Stop.id == stop_id).first()
+    """Set the visiting order of all of a trip's stops at once"""
+    trip = (
+        db.query(Trip)
+        .filter(Trip.id == trip_id, Trip.user_id == current_user.id)
+        .first()
+    )
 
-    if not stop:
+    if not trip:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Stop not found"
+            status_code=status.HTTP_404_NOT_FOUND, detail="Trip not found"
         )
 
+    current = trip_stop_ids(db, trip_id)
+    if len(payload.stop_ids) != len(current) or set(payload.stop_ids) != set(current):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="stop_ids must list every stop of the trip exactly once",
+        )
+
+    reorder_stops(db, trip_id, payload.stop_ids)
+    db.commit()
+
+    return (
+        db.query(Stop)
+        .options(*stop_graph_options())
+        .filter(Stop.trip_id == trip_id)
+        .order_by(Stop.order)
+        .all()
+    )
+
+
+@router.post(
+    "/trips/{trip_id}/optimize-route", response_model=RouteOptimizationResponse
+)
+def optimize_trip_route(
+    trip_id: int,
+    fix_start: bool = Query(False, description="Keep the first stop first"),
+    fix_end: bool = Query(False, description="Keep the last stop last"),
+    current_user: UserSnapshot = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    """Reorder stops to minimise the total distance travelled"""
     trip = (
         db.query(Trip)
-        .filter(Trip.id == stop.trip_id, Trip.user_id == current_user.id)
+        .filter(Trip.id == trip_id, Trip.user_id == current_user.id)
         .first()
     )
 
     if not trip:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Trip not found"
+        )
+
+    # 1. Current route with each stop's coordinates
+    stops = (
+        db.query(Stop.id, City.latitude, City.longitude)
+        .join(City, City.id == Stop.city_id)
+        .filter(Stop.trip_id == trip_id)
+        .order_by(Stop.order, Stop.id)
+        .all()
+    )
+
+    if any(lat is None or lon is None for _, lat, lon in stops):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Every stop's city needs coordinates to optimize the route",
+        )
+
+    # 2. Optimize
+    order, before, after = optimize_route(
+        [(lat, lon) for _, lat, lon in stops], fix_start=fix_start, fix_end=fix_end
+    )
+    stop_ids = [stops[i].id for i in order]
+
+    # 3. Persist the new order in one statement
+    if after < before:
+        reorder_stops(db, trip_id, stop_ids)
+        db.commit()
+
+    return RouteOptimizationResponse(
+        trip_id=trip_id,
+        stop_ids=stop_ids,
+        distance_before_km=round(before, 3),
+        distance_after_km=round(after, 3),
+        distance_saved_km=round(before - after, 3),
+    )
+
+
+@router.get("/stops/{stop_id}", response_model=StopWithCityResponse)
+def get_stop(
+    stop_id: int,
+    current_user: UserSnapshot = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    """Get single stop details"""
+    stop = (
+        db.query(Stop)
+        .options(*stop_owner_options(), *stop_graph_options())
+        .filter(Stop.id == stop_id)
+        .first()
+    )
+
+    if not stop or stop.trip.user_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Stop not found"
         )
@@ -128,29 +344,22 @@ def get_stop(
 def update_stop(
     stop_id: int,
     stop_data: StopUpdate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserSnapshot = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ):
     """Update a stop"""
-    stop = db.query(Stop).filter(Stop.id == stop_id).first()
-
-    if not stop:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Stop not found"
-        )
-
-    trip = (
-        db.query(Trip)
-        .filter(Trip.id == stop.trip_id, Trip.user_id == current_user.id)
-        .first()
+    stop = (
+        db.query(Stop).options(*stop_owner_options()).filter(Stop.id == stop_id).first()
     )
 
-    if not trip:
+    if not stop or stop.trip.user_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Stop not found"
         )
 
     update_data = stop_data.model_dump(exclude_unset=True)
+    # A new position moves the stop and shifts the others
+    position = update_data.pop("order", None)
 
     start = update_data.get("start_date", stop.start_date)
     end = update_data.get("end_date", stop.end_date)
@@ -162,34 +371,26 @@ def update_stop(
 
     for key, value in update_data.items():
         setattr(stop, key, value)
+    if position is not None:
+        move_stop(db, stop, position)
 
     db.commit()
-    db.refresh(stop)
 
-    return stop
+    return _load_stop_graph(db, stop_id)
 
 
 @router.delete("/stops/{stop_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_stop(
     stop_id: int,
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserSnapshot = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ):
     """Delete a stop"""
-    stop = db.query(Stop).filter(Stop.id == stop_id).first()
-
-    if not stop:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Stop not found"
-        )
-
-    trip = (
-        db.query(Trip)
-        .filter(Trip.id == stop.trip_id, Trip.user_id == current_user.id)
-        .first()
+    stop = (
+        db.query(Stop).options(*stop_owner_options()).filter(Stop.id == stop_id).first()
     )
 
-    if not trip:
+    if not stop or stop.trip.user_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Stop not found"
         )
@@ -1,24 +1,27 @@
 import secrets
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_active_user
 from app.database import get_db
-from app.models.activity import StopActivity
-from app.models.stop import Stop
 from app.models.trip import Trip
-from app.models.user import User
 from app.schemas.trip import TripCreate, TripResponse, TripUpdate
+from app.services.auth_service import UserSnapshot
+from app.services.trip_service import clone_trip
+from app.utils.fast_json import fast_response, json_serializer
+from app.utils.pagination import PageParams, paginate
 
 router = APIRouter()
 
+_trip_json = json_serializer(TripResponse)
+
 
 @router.post("/", response_model=TripResponse, status_code=status.HTTP_201_CREATED)
 def create_trip(
     trip_data: TripCreate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserSnapshot = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ):
     # Validate dates
@@ -46,16 +49,20 @@ def create_trip(
 
 @router.get("/", response_model=List[TripResponse])
 def get_all_trips(
-    current_user: User = Depends(get_current_active_user), db: Session = Depends(get_db)
+    response: Response,
+    page: PageParams = Depends(),
+    current_user: UserSnapshot = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
 ):
-    trips = db.query(Trip).filter(Trip.user_id == current_user.id).all()
-    return trips
+    query = db.query(Trip).filter(Trip.user_id == current_user.id)
+    trips = paginate(query, Trip, page, response)
+    return fast_response(_trip_json, trips, many=True, response=response)
 
 
 @router.get("/{trip_id}", response_model=TripResponse)
 def get_trip(
     trip_id: int,
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserSnapshot = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ):
     trip = (
@@ -76,7 +83,7 @@ def get_trip(
 def update_trip(
     trip_id: int,
     trip_data: TripUpdate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserSnapshot = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ):
     trip = (
@@ -114,7 +121,7 @@ def update_trip(
 @router.delete("/{trip_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_trip(
     trip_id: int,
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserSnapshot = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ):
     trip = (
@@ -161,7 +168,7 @@ def get_shared_trip(share_token: str, db: Session = Depends(get_db)):
 def toggle_trip_sharing(
     trip_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserSnapshot = Depends(get_current_active_user),
 ):
     """Toggle trip public status and generate token if needed"""
     trip = (
@@ -187,15 +194,10 @@ def toggle_trip_sharing(
     return trip
 
 
-@router.post(
-    "/{trip_id}/copy", response_model=TripResponse, status_code=status.HTTP_201_CREATED
-)
-def copy_trip(
-    trip_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
-):
-    """Clone an existing public trip to the current user's account"""
+def _copy_trip(
+    db: Session, trip_id: int, current_user: UserSnapshot, count: int
+) -> List[Trip]:
+    """Clone a trip `count` times for the current user, in one transaction"""
     # 1. Fetch original trip (must be public OR owned by user)
     original_trip = db.query(Trip).filter(Trip.id == trip_id).first()
     if not original_trip:
@@ -204,47 +206,51 @@ def copy_trip(
     if not original_trip.is_public and original_trip.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Cannot copy private trip")
 
-    # 2. Create new Trip shell
-    new_trip = Trip(
-        name=f"Copy of {original_trip.name}",
-        description=original_trip.description,
-        start_date=original_trip.start_date,  # User usually updates this later
-        end_date=original_trip.end_date,
-        cover_photo=original_trip.cover_photo,
-        user_id=current_user.id,
-        is_public=False,  # New copy starts private
-    )
-    db.add(new_trip)
+    # 2. Clone trip, stops and activities as set-based inserts, then commit once
+    new_trips = clone_trip(db, original_trip, current_user.id, count=count)
+    # Ids read before the commit expires the copies: after it, each one
+    # would be refreshed with a query of its own
+    new_ids = [trip.id for trip in new_trips]
     db.commit()
-    db.refresh(new_trip)
 
-    # 3. Clone Stops
-    original_stops = db.query(Stop).filter(Stop.trip_id == original_trip.id).all()
-
-    for old_stop in original_stops:
-        new_stop = Stop(
-            trip_id=new_trip.id,
-            city_id=old_stop.city_id,
-            start_date=old_stop.start_date,
-            end_date=old_stop.end_date,
-            notes=old_stop.notes,
-            order=old_stop.order,
-            transport_cost=old_stop.transport_cost,  # New field (see below)
-        )
-        db.add(new_stop)
-        db.commit()  # Commit to get new_stop.id
+    # Reload all copies in one query instead of one refresh per trip
+    return db.query(Trip).filter(Trip.id.in_(new_ids)).order_by(Trip.id).all()
 
-        # 4. Clone Activities for this stop
-        old_activities = (
-            db.query(StopActivity).filter(StopActivity.stop_id == old_stop.id).all()
+
+@router.post(
+    "/{trip_id}/copy",
+    response_model=TripResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+def copy_trip(
+    trip_id: int,
+    # Batch copies moved to /copies; don't quietly make one copy instead of N
+    count: Optional[int] = Query(None, include_in_schema=False),
+    current_user: UserSnapshot = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    """Clone an existing public trip to the current user's account"""
+    if count is not None:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=f"/copy makes one copy; use POST /trips/{trip_id}/copies?count=N",
         )
-        for old_act in old_activities:
-            new_act = StopActivity(
-                stop_id=new_stop.id,
-                activity_id=old_act.activity_id,
-                actual_cost=old_act.actual_cost,
-            )
-            db.add(new_act)
+    return _copy_trip(db, trip_id, current_user, count=1)[0]
 
-    db.commit()
-    return new_trip
+
+@router.post(
+    "/{trip_id}/copies",
+    response_model=List[TripResponse],
+    status_code=status.HTTP_201_CREATED,
+)
+def copy_trip_many(
+    trip_id: int,
+    count: int = Query(..., ge=1, le=50, description="Number of copies to create"),
+    current_user: UserSnapshot = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    """Clone a template trip `count` times to the current user's account.
+
+    All copies are made in one transaction and returned as a list.
+    """
+    return _copy_trip(db, trip_id, current_user, count=count)
@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_active_user
+from app.api.deps import get_current_user_record
 from app.database import get_db
 from app.models.user import User
 from app.schemas.user import UserResponse, UserUpdate
+from app.services.auth_service import user_cache
 
 router = APIRouter()
 
@@ -15,7 +16,7 @@ router = APIRouter()
     status_code=status.HTTP_200_OK,
 )
 def get_user_profile(
-    current_user: User = Depends(get_current_active_user),
+    current_user: User = Depends(get_current_user_record),
 ):
     return current_user
 
@@ -28,7 +29,7 @@ def get_user_profile(
 def update_user_profile(
     user_update: UserUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: User = Depends(get_current_user_record),
 ):
     update_data = user_update.model_dump(exclude_unset=True)
 
@@ -38,6 +39,7 @@ def update_user_profile(
     db.add(current_user)
     db.commit()
     db.refresh(current_user)
+    user_cache.invalidate(current_user.id)
 
     return current_user
 
@@ -48,9 +50,11 @@ def update_user_profile(
 )
 def delete_user_profile(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: User = Depends(get_current_user_record),
 ):
+    user_id = current_user.id
     db.delete(current_user)
     db.commit()
+    user_cache.invalidate(user_id)
 
     return None
@@ -1,13 +1,99 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
     DATABASE_URL: str = "sqlite:///./travel.db"
     TEST_DATABASE_URL: str = "sqlite:///./test_travel.db"
+    # Async driver URL (e.g. postgresql+asyncpg://...); derived from
+    # DATABASE_URL when unset
+    ASYNC_DATABASE_URL: Optional[str] = None
+
+    # Connection pool (ignored for in-memory SQLite)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 1800  # seconds, -1 disables
+    DB_STATEMENT_TIMEOUT_MS: int = 0  # 0 disables; PostgreSQL only
+    # Apply pending migrations at startup instead of refusing to start
+    # (single-process/dev setups; see app.migrations)
+    DB_AUTO_MIGRATE: bool = False
+
+    # SQLite production profile: WAL + pragmas + one writer at a time
+    SQLITE_TUNING: bool = True
+    SQLITE_SERIALIZE_WRITES: bool = True
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_CACHE_SIZE_KB: int = 64000
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+
+    # City search ranking: relevance * (1 + weight * popularity_score / 100)
+    CITY_SEARCH_POPULARITY_WEIGHT: float = 1.0
+    # Largest k served by GET /cities/autocomplete
+    AUTOCOMPLETE_MAX_RESULTS: int = 10
+    # How often the in-memory city/activity catalog checks the tables for
+    # writes made by other processes (see app.services.catalog)
+    CATALOG_STAMP_CHECK_SECONDS: float = 30.0
+    # GET /cities/popular ranking: a planned stop's weight halves every
+    # half-life; only the top k are kept ranked (see app.services.popularity)
+    POPULARITY_HALF_LIFE_DAYS: float = 30.0
+    POPULARITY_TOP_K: int = 50
+    # Grid cell size of the nearby-cities index, in degrees
+    GEO_INDEX_CELL_DEGREES: float = 1.0
+    # Rows fetched per round trip by the streaming admin exports
+    EXPORT_BATCH_SIZE: int = 1000
+    # How often the admin analytics rollups are rebuilt from scratch, by one
+    # job runner (the "analytics_reconcile" job); 0 disables
+    ANALYTICS_RECONCILE_SECONDS: float = 3600.0
+
+    # ETag response cache for public GET routes (see app.middleware.http_cache)
+    HTTP_CACHE_MAX_ENTRIES: int = 1024
+    HTTP_CACHE_MAX_BODY_BYTES: int = 256 * 1024
+    HTTP_CACHE_TTL_SECONDS: float = 300.0
+    # How often the cache checks the tables for writes made by other processes
+    HTTP_CACHE_STAMP_CHECK_SECONDS: float = 5.0
+    # Opt-in: hot list routes serialize straight from ORM rows instead of
+    # validating them through their response_model (see app.utils.fast_json)
+    FAST_JSON_RESPONSES: bool = False
+
+    # Background jobs (see app.services.job_runner)
+    JOB_WORKERS: int = 4
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BACKOFF_SECONDS: float = 2.0  # Doubles on every retry
+    JOB_RETRY_BACKOFF_MAX_SECONDS: float = 300.0
+    # A running job's worker refreshes its heartbeat this often; a job whose
+    # heartbeat is JOB_STALE_AFTER_SECONDS old lost its process and is
+    # reclaimed by the sweep, which every runner does this often
+    JOB_HEARTBEAT_SECONDS: float = 10.0
+    JOB_STALE_AFTER_SECONDS: float = 60.0
+    JOB_SWEEP_SECONDS: float = 30.0
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Argon2 cost; hashes made with other values are upgraded on login
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536  # KiB
+    ARGON2_PARALLELISM: int = 4
+    # Dedicated password hashing pool; requests beyond the queue get a 429
+    HASHING_WORKERS: int = 4
+    HASHING_MAX_PENDING: int = 64
+
+    # GET /metrics and the request/DB pool/hashing pool metrics behind it
+    METRICS_ENABLED: bool = True
+    # Per-request SQL stats (see app.middleware.query_stats): statements
+    # slower than this are logged (0 disables), a statement shape repeated
+    # this often in one request is logged as a likely N+1, and DEBUG adds
+    # X-DB-Queries / Server-Timing headers to every response
+    SLOW_QUERY_MS: float = 200.0
+    N_PLUS_ONE_THRESHOLD: int = 10
+    DEBUG: bool = False
+
+    # Authenticated-user snapshot cache (see app.services.auth_service)
+    USER_CACHE_MAX_SIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: float = 60.0
+
     class Config:
         env_file = ".env"
 
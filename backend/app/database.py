@@ -1,16 +1,145 @@
-from sqlalchemy import create_engine
+import logging
+import threading
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from app.config import settings
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False},  # Needed for SQLite
-)
+logger = logging.getLogger(__name__)
+
+# Async drivers used when ASYNC_DATABASE_URL isn't set explicitly
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+
+def _is_memory_sqlite(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def engine_options(database_url: str, is_async: bool = False) -> dict:
+    """Keyword arguments for create_engine / create_async_engine.
+
+    SQLite only gets its thread-check connect arg; server databases get the
+    pool sizing and statement timeout from settings.
+    """
+    url = make_url(database_url)
+    options = {
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+    connect_args = {}
+
+    if url.get_backend_name() == "sqlite":
+        connect_args["check_same_thread"] = False
+    elif settings.DB_STATEMENT_TIMEOUT_MS and url.get_backend_name() == "postgresql":
+        timeout = str(settings.DB_STATEMENT_TIMEOUT_MS)
+        if is_async:
+            connect_args["server_settings"] = {"statement_timeout": timeout}
+        else:
+            connect_args["options"] = f"-c statement_timeout={timeout}"
+
+    # In-memory SQLite uses a single-connection pool that takes no sizing
+    if not _is_memory_sqlite(url):
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+
+    if connect_args:
+        options["connect_args"] = connect_args
+    return options
+
+
+def async_database_url(database_url: str) -> str:
+    """The async-driver form of a sync database URL"""
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    url = make_url(database_url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise RuntimeError(
+            f"No async driver known for '{url.get_backend_name()}'; "
+            "set ASYNC_DATABASE_URL"
+        )
+    return url.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def configure_sqlite(engine) -> None:
+    """Apply the SQLite production pragmas to every new connection.
+
+    WAL lets readers run alongside the writer, synchronous=NORMAL is safe
+    under WAL, and busy_timeout makes a blocked writer wait instead of
+    failing with "database is locked".
+    """
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}")
+        cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}")
+        cursor.close()
+
+
+_WRITE_LOCK_KEY = "holds_sqlite_write_lock"
+
+
+def serialize_writes(session_factory) -> threading.Lock:
+    """Route write transactions from `session_factory` through one lock.
+
+    A session takes the lock on its first flush or bulk DML statement and
+    releases it when its transaction ends, so SQLite only ever sees one
+    writer from this process while readers proceed unblocked under WAL.
+    If the lock can't be taken within the busy timeout we fall back to
+    SQLite's own locking rather than deadlock.
+    """
+    lock = threading.Lock()
+    timeout = settings.SQLITE_BUSY_TIMEOUT_MS / 1000
+
+    def acquire(session):
+        if session.info.get(_WRITE_LOCK_KEY):
+            return
+        if lock.acquire(timeout=timeout):
+            session.info[_WRITE_LOCK_KEY] = True
+        else:
+            logger.warning("SQLite writer lock busy for %.1fs, proceeding", timeout)
+
+    @event.listens_for(session_factory, "before_flush")
+    def _lock_on_flush(session, flush_context, instances):
+        acquire(session)
+
+    @event.listens_for(session_factory, "do_orm_execute")
+    def _lock_on_dml(orm_execute_state):
+        state = orm_execute_state
+        if state.is_insert or state.is_update or state.is_delete:
+            acquire(state.session)
+
+    @event.listens_for(session_factory, "after_transaction_end")
+    def _unlock(session, transaction):
+        if transaction.parent is None and session.info.pop(_WRITE_LOCK_KEY, False):
+            lock.release()
+
+    return lock
+
+
+engine = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL))
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+if engine.dialect.name == "sqlite" and settings.SQLITE_TUNING:
+    configure_sqlite(engine)
+    if settings.SQLITE_SERIALIZE_WRITES:
+        serialize_writes(SessionLocal)
+
 Base = declarative_base()
 
 
@@ -21,3 +150,39 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Async engine, built on first use so the async driver (aiosqlite, asyncpg)
+# stays optional until a route actually depends on get_async_db
+_async_engine = None
+_AsyncSessionLocal = None
+
+
+def get_async_engine():
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        url = async_database_url(settings.DATABASE_URL)
+        _async_engine = create_async_engine(url, **engine_options(url, is_async=True))
+        if _async_engine.dialect.name == "sqlite" and settings.SQLITE_TUNING:
+            configure_sqlite(_async_engine.sync_engine)
+        _AsyncSessionLocal = async_sessionmaker(
+            _async_engine, autoflush=False, expire_on_commit=False
+        )
+    return _async_engine
+
+
+async def dispose_async_engine():
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _AsyncSessionLocal = None
+
+
+# Async dependency for routes that have moved off the threadpool
+async def get_async_db():
+    get_async_engine()
+    async with _AsyncSessionLocal() as db:
+        yield db
@@ -1,46 +1,115 @@
+import asyncio
+import logging
+import time
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy.engine import Engine
 
 # FIX: Added 'users' to the import
-from app.api.v1 import activities, admin, auth, budget, cities, stops, trips, users
-from app.database import Base, SessionLocal, engine
-from app.models import City, Stop, Trip, User
-from app.utils.auth import get_password_hash
+from app.api.v1 import (
+    activities,
+    admin,
+    auth,
+    budget,
+    cities,
+    jobs,
+    stops,
+    trips,
+    users,
+)
+from app.config import settings
+from app.database import SessionLocal, dispose_async_engine, engine
+from app.middleware.http_cache import HTTPCacheMiddleware
+from app.middleware.metrics import MetricsMiddleware, track_in_flight
+from app.middleware.query_stats import QueryStatsMiddleware
+from app.migrations import check_schema, upgrade
+from app.models import User
+from app.services.autocomplete import ensure_autocomplete
+from app.services.catalog import catalog
+from app.services.geo_index import ensure_geo_index
+from app.services.job_runner import job_runner
+from app.services.metrics import (
+    instrument_pool,
+    record_hashing_stats,
+    record_http_cache_stats,
+    registry,
+)
+from app.services.password_hasher import password_hasher
+from app.services.popularity import ensure_popularity
+from app.services.query_stats import instrument_queries
+from app.services.response_cache import response_cache
+from app.utils.auth import decode_access_token, get_password_hash
+from app.utils.pagination import NEXT_CURSOR_HEADER
 
+logger = logging.getLogger(__name__)
 
-# Startup/shutdown events
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    # Startup: Create tables and admin user
-    Base.metadata.create_all(bind=engine)
 
-    # Auto-create admin user if not exists
+def _ensure_admin_user(db) -> None:
+    """Auto-create the admin user if not exists"""
+    admin_exists = db.query(User).filter(User.role == "admin").first()
+    if not admin_exists:
+        admin_user = User(
+            email="admin@globetrotter.com",
+            username="admin",
+            hashed_password=get_password_hash("admin123"),
+            full_name="System Admin",
+            role="admin",
+            is_verified=True,
+        )
+        db.add(admin_user)
+        db.commit()
+        print("✓ Admin user created: admin@globetrotter.com / admin123")
+        print("  ⚠️  CHANGE PASSWORD IN PRODUCTION!")
+    else:
+        print("✓ Admin user already exists")
+
+
+def warm_up() -> None:
+    """Startup work that doesn't gate readiness, run once the app serves.
+
+    Each in-memory structure also builds itself on first use, so a request
+    that arrives before the warm-up gets there only pays for what it reads.
+    """
+    started = time.perf_counter()
     db = SessionLocal()
     try:
-        admin_exists = db.query(User).filter(User.role == "admin").first()
-        if not admin_exists:
-            admin_user = User(
-                email="admin@globetrotter.com",
-                username="admin",
-                hashed_password=get_password_hash("admin123"),
-                full_name="System Admin",
-                role="admin",
-                is_verified=True,
-            )
-            db.add(admin_user)
-            db.commit()
-            print("✓ Admin user created: admin@globetrotter.com / admin123")
-            print("  ⚠️  CHANGE PASSWORD IN PRODUCTION!")
-        else:
-            print("✓ Admin user already exists")
+        _ensure_admin_user(db)  # Also loads the argon2 context
+        ensure_autocomplete(db)
+        ensure_geo_index(db)
+        catalog.get(db)
+        ensure_popularity(db)
+        decode_access_token("")  # Loads the JWT backend
+    except Exception:
+        logger.exception("Startup warm-up failed, caches will build on demand")
     finally:
         db.close()
+    logger.info(
+        "Startup warm-up done in %.0f ms", (time.perf_counter() - started) * 1000
+    )
+
+
+# Startup/shutdown events
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup: the schema belongs to app.migrations, only check its revision.
+    # That's all that gates readiness: the rest is warm-up, done in a thread
+    if settings.DB_AUTO_MIGRATE:
+        upgrade(engine)
+    check_schema(engine)
+
+    warm_up_task = asyncio.create_task(asyncio.to_thread(warm_up))
+
+    job_runner.start()
 
     yield  # App runs here
 
     print("Shutting down...")
+    await warm_up_task  # The thread can't be cancelled, let it finish
+    job_runner.stop()
+    password_hasher.shutdown()
+    await dispose_async_engine()
 
 
 app = FastAPI(
@@ -48,14 +117,30 @@ app = FastAPI(
     description="Travel planning API for multi-city itineraries",
     version="1.0.0",
     lifespan=lifespan,
+    dependencies=[Depends(track_in_flight)] if settings.METRICS_ENABLED else None,
 )
 
+# Innermost, so it only sees (and labels) requests that reach a route;
+# responses the cache answers are counted by the http_cache metrics
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    instrument_pool(engine)
+    registry.on_collect(lambda: record_hashing_stats(password_hasher.stats()))
+    registry.on_collect(lambda: record_http_cache_stats(response_cache.stats()))
+
+# Added before CORS so CORS wraps it and 304s carry CORS headers too
+app.add_middleware(HTTPCacheMiddleware)
+# Outside the cache, so a replayed response reports its own (zero) queries.
+# Every engine is timed, the async one and the tests' included
+instrument_queries(Engine)
+app.add_middleware(QueryStatsMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000", "http://localhost:3001"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # --- ROUTERS ---
@@ -69,6 +154,7 @@ app.include_router(
 )  # Root prefix for clean /trips/{id}/stops URLs
 app.include_router(activities.router, prefix="/activities", tags=["Activities"])
 app.include_router(budget.router, prefix="/budget", tags=["Budget"])
+app.include_router(jobs.router, prefix="/jobs", tags=["Jobs"])
 app.include_router(admin.router, prefix="/admin", tags=["Admin"])
 
 
@@ -80,3 +166,13 @@ def root():
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
+
+
+if settings.METRICS_ENABLED:
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        """Prometheus text exposition of this process's metrics"""
+        return Response(
+            registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+        )
@@ -0,0 +1,146 @@
+"""ETag / If-None-Match handling and response caching for public GET routes.
+
+A pure ASGI middleware. For a request to a route in CACHE_POLICIES it
+computes the strong ETag from the table stamps of the route's tags before
+the endpoint runs (see app.services.response_cache; every worker computes
+the same ETag for the same rows), so:
+
+- a matching If-None-Match gets a 304 without running the endpoint;
+- a cached response with the same ETag is replayed as-is;
+- otherwise the endpoint runs, and a 200 is tagged and stored.
+
+Only the query string and the path vary the cached response; these routes
+don't depend on who is asking.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from starlette.concurrency import run_in_threadpool
+
+from app.services.response_cache import ResponseCache, response_cache
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    pattern: "re.Pattern[str]"
+    tags: Tuple[str, ...]
+    cache_control: str
+
+
+def _policy(pattern: str, tags: Tuple[str, ...], cache_control: str) -> CachePolicy:
+    return CachePolicy(re.compile(pattern), tags, cache_control)
+
+
+CACHE_POLICIES = [
+    _policy(r"^/cities/?$", ("cities",), "public, max-age=60"),
+    _policy(r"^/cities/popular$", ("cities", "popularity"), "public, max-age=60"),
+    _policy(r"^/cities/\d+$", ("cities",), "public, max-age=60"),
+    _policy(r"^/activities/?$", ("activities",), "public, max-age=60"),
+    # Always revalidate, so making a trip private takes effect immediately
+    _policy(r"^/trips/share/[^/]+$", ("trips",), "public, no-cache"),
+]
+
+
+def _match(path: str) -> Optional[CachePolicy]:
+    for policy in CACHE_POLICIES:
+        if policy.pattern.match(path):
+            return policy
+    return None
+
+
+def _cache_key(scope) -> str:
+    query = parse_qsl(scope.get("query_string", b"").decode("latin-1"), True)
+    return f"{scope['path']}?{urlencode(sorted(query))}"
+
+
+def _if_none_match(scope) -> List[str]:
+    for name, value in scope["headers"]:
+        if name == b"if-none-match":
+            # Weak comparison, as RFC 9110 asks for If-None-Match
+            return [t.strip().removeprefix("W/") for t in value.decode().split(",")]
+    return []
+
+
+class HTTPCacheMiddleware:
+    def __init__(self, app, cache: ResponseCache = response_cache):
+        self.app = app
+        self.cache = cache
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            return await self.app(scope, receive, send)
+        policy = _match(scope["path"])
+        if policy is None:
+            return await self.app(scope, receive, send)
+
+        if self.cache.stamps_due():
+            await run_in_threadpool(self.cache.check_stamps)
+        key = _cache_key(scope)
+        etag = self.cache.etag(key, policy.tags)
+        validators = [
+            (b"etag", etag.encode()),
+            (b"cache-control", policy.cache_control.encode()),
+        ]
+
+        candidates = _if_none_match(scope)
+        if etag in candidates or "*" in candidates:
+            await send(
+                {"type": "http.response.start", "status": 304, "headers": validators}
+            )
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        cached = self.cache.get(key, etag)
+        if cached is not None:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": cached.status,
+                    "headers": cached.headers,
+                }
+            )
+            await send({"type": "http.response.body", "body": cached.body})
+            return
+
+        await self._call_and_store(scope, receive, send, key, etag, policy, validators)
+
+    async def _call_and_store(
+        self, scope, receive, send, key, etag, policy, validators
+    ):
+        state = {"status": None, "headers": None, "chunks": [], "size": 0}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+                if message["status"] == 200:
+                    headers = [
+                        (k, v)
+                        for k, v in message.get("headers", [])
+                        if k.lower() not in (b"etag", b"cache-control")
+                    ] + validators
+                    message = {**message, "headers": headers}
+                    state["headers"] = headers
+            elif message["type"] == "http.response.body" and state["headers"]:
+                body = message.get("body", b"")
+                state["size"] += len(body)
+                if state["size"] <= self.cache.max_body_bytes:
+                    state["chunks"].append(body)
+                else:
+                    state["headers"] = None  # Too big to keep
+                if not message.get("more_body", False) and state["headers"]:
+                    self.cache.put(
+                        key,
+                        self.cache.new_entry(
+                            etag,
+                            policy.tags,
+                            200,
+                            state["headers"],
+                            b"".join(state["chunks"]),
+                        ),
+                    )
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,81 @@
+"""Request metrics for GET /metrics (see app.services.metrics).
+
+``MetricsMiddleware`` is a pure ASGI middleware, added innermost: every
+request it sees reaches the router, and 304s and replays from the response
+cache are counted by the cache's own metrics instead. The in-flight gauge
+comes from ``track_in_flight``, an app-wide dependency, as it needs the
+route while the request is still running.
+
+Requests are labelled with the template of the route they matched
+(``/trips/{trip_id}``), read from the scope once routing has happened, so
+ids never become label values; a request no route matched is "unmatched",
+which keeps scanners from creating a series per path.
+"""
+
+import time
+
+from fastapi import Request
+
+from app.services.metrics import (
+    http_request_duration,
+    http_requests,
+    http_requests_in_flight,
+)
+
+UNMATCHED = "unmatched"
+
+
+def route_template(scope) -> str:
+    """The path template of the route that handled `scope`"""
+    path_params = scope.get("path_params") or {}
+    route = scope.get("route")
+    template = getattr(route, "path_format", None)
+    if template is None:
+        # A plain Starlette route (the docs): its path is already fixed
+        return scope["path"] if "endpoint" in scope and not path_params else UNMATCHED
+    # Routes of an included router may only know their path below the
+    # router's prefix; the prefix is what the request path has before it
+    try:
+        suffix = template.format(**path_params)
+    except (KeyError, IndexError, ValueError):
+        return template
+    path = scope["path"]
+    if suffix and path.endswith(suffix):
+        return path[: len(path) - len(suffix)] + template
+    return template
+
+
+async def track_in_flight(request: Request):
+    """Count the request in http_requests_in_flight while its route runs"""
+    labels = (request.method, route_template(request.scope))
+    http_requests_in_flight.inc(*labels)
+    try:
+        yield
+    finally:
+        http_requests_in_flight.dec(*labels)
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = {"code": 500}  # Unless a response starts
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            method, route = scope["method"], route_template(scope)
+            http_request_duration.observe(
+                method, route, value=time.perf_counter() - started
+            )
+            http_requests.inc(method, route, str(status["code"]))
@@ -0,0 +1,60 @@
+"""Per-request SQL statistics (see app.services.query_stats).
+
+``QueryStatsMiddleware`` opens a ``track_queries()`` block around every
+HTTP request. Once the response is done, or the request raised, it logs a
+warning when one statement shape ran N_PLUS_ONE_THRESHOLD times or more. With DEBUG on, the
+response also carries the count and DB time so far:
+
+    X-DB-Queries: 12
+    Server-Timing: db;dur=4.2;desc="12 queries"
+
+It sits outside the response cache so replayed responses never carry the
+numbers of the request that filled it. A streaming response's headers go
+out before its body runs its queries; the N+1 check still covers them.
+"""
+
+import logging
+
+from app.config import settings
+from app.middleware.metrics import route_template
+from app.services.query_stats import track_queries
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStatsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        with track_queries() as stats:
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start" and settings.DEBUG:
+                    ms, count = stats.duration * 1000, stats.count
+                    timing = f'db;dur={ms:.1f};desc="{count} queries"'
+                    message = {
+                        **message,
+                        "headers": [
+                            *message.get("headers", []),
+                            (b"x-db-queries", str(count).encode()),
+                            (b"server-timing", timing.encode()),
+                        ],
+                    }
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                # A request that raised ran its queries all the same
+                for shape, count in stats.repeated(settings.N_PLUS_ONE_THRESHOLD):
+                    logger.warning(
+                        "Possible N+1 in %s %s: %d x %s",
+                        scope["method"],
+                        route_template(scope),
+                        count,
+                        shape,
+                    )
@@ -0,0 +1,129 @@
+"""Schema migrations: the only code that creates or changes tables.
+
+Each module ``app/migrations/versions/m<NNNN>_<name>.py`` is revision NNNN
+and defines ``description`` and ``upgrade(connection)``. ``upgrade`` applies
+the pending revisions in order, each in its own transaction together with
+its row in ``schema_migrations``, so a failed migration leaves the database
+at the last good revision.
+
+    cd backend && python -m app.migrations upgrade    # or: current, check
+
+The app itself only checks the revision at startup (``check_schema``).
+
+The baseline (0001) builds missing tables from the current models, so on a
+fresh database later migrations find their changes already made: write
+them to be idempotent (``IF NOT EXISTS``, inspector checks).
+"""
+
+import importlib
+import logging
+import pkgutil
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func
+from sqlalchemy import inspect as sa_inspect
+
+from app.migrations import versions
+
+logger = logging.getLogger(__name__)
+
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("revision", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+_MODULE_NAME = re.compile(r"^m(\d{4})_\w+$")
+
+
+class SchemaOutOfDate(RuntimeError):
+    """The database is behind the revision this code needs"""
+
+
+@dataclass(frozen=True)
+class Migration:
+    revision: int
+    name: str
+    description: str
+    upgrade: Callable
+
+
+def load_migrations() -> List[Migration]:
+    migrations = []
+    for module_info in pkgutil.iter_modules(versions.__path__):
+        match = _MODULE_NAME.match(module_info.name)
+        if not match:
+            continue
+        module = importlib.import_module(f"{versions.__name__}.{module_info.name}")
+        migrations.append(
+            Migration(
+                int(match.group(1)),
+                module_info.name,
+                module.description,
+                module.upgrade,
+            )
+        )
+    migrations.sort(key=lambda m: m.revision)
+    revisions = [m.revision for m in migrations]
+    if revisions != list(range(1, len(revisions) + 1)):
+        raise RuntimeError(f"Migration revisions must run 1..n, got {revisions}")
+    return migrations
+
+
+def head_revision() -> int:
+    return len(load_migrations())
+
+
+def current_revision(connection) -> int:
+    """Revision of the database; 0 when it has never been migrated"""
+    if not sa_inspect(connection).has_table(schema_migrations.name):
+        return 0
+    latest = connection.execute(
+        func.max(schema_migrations.c.revision).select()
+    ).scalar()
+    return latest or 0
+
+
+def upgrade(engine, target: Optional[int] = None) -> List[Migration]:
+    """Apply every pending migration up to `target` (default: head)"""
+    applied = []
+    for migration in load_migrations():
+        if target is not None and migration.revision > target:
+            break
+        with engine.begin() as connection:
+            if migration.revision <= current_revision(connection):
+                continue
+            logger.info("Applying migration %s", migration.name)
+            schema_migrations.create(connection, checkfirst=True)
+            migration.upgrade(connection)
+            connection.execute(
+                schema_migrations.insert().values(
+                    revision=migration.revision,
+                    description=migration.description,
+                    applied_at=datetime.utcnow(),
+                )
+            )
+        applied.append(migration)
+    return applied
+
+
+def check_schema(engine) -> int:
+    """Fail unless the database is at (or past) the head revision"""
+    head = head_revision()
+    with engine.connect() as connection:
+        current = current_revision(connection)
+    if current < head:
+        raise SchemaOutOfDate(
+            f"Database schema is at revision {current}, this code needs {head}: "
+            "run `python -m app.migrations upgrade`"
+        )
+    if current > head:
+        logger.warning(
+            "Database schema revision %s is newer than this code (%s)", current, head
+        )
+    return current
@@ -0,0 +1,44 @@
+"""python -m app.migrations [upgrade [--to N] | current | check]"""
+
+import argparse
+import logging
+import sys
+
+from app.database import engine
+from app.migrations import (
+    SchemaOutOfDate,
+    check_schema,
+    current_revision,
+    head_revision,
+    upgrade,
+)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.migrations")
+    commands = parser.add_subparsers(dest="command", required=True)
+    upgrade_parser = commands.add_parser("upgrade", help="apply pending migrations")
+    upgrade_parser.add_argument("--to", type=int, help="stop at this revision")
+    commands.add_parser("current", help="print the database and head revisions")
+    commands.add_parser("check", help="exit 1 unless the database is up to date")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args.command == "upgrade":
+        applied = upgrade(engine, target=args.to)
+        print(f"Applied {len(applied)} migration(s)")
+    elif args.command == "current":
+        with engine.connect() as connection:
+            print(f"current {current_revision(connection)}, head {head_revision()}")
+    else:
+        try:
+            check_schema(engine)
+        except SchemaOutOfDate as exc:
+            print(exc, file=sys.stderr)
+            return 1
+        print("Database schema is up to date")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Numbered schema revisions, applied in order by app.migrations"""
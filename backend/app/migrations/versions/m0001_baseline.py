@@ -0,0 +1,14 @@
+"""Every table the models define, as databases used to get at startup.
+
+Tables that already exist (created by the old ``create_all`` in the app's
+lifespan) are left alone, which adopts such databases at revision 1.
+"""
+
+description = "baseline tables"
+
+
+def upgrade(connection) -> None:
+    import app.models  # noqa: F401  (registers every table on Base.metadata)
+    from app.database import Base
+
+    Base.metadata.create_all(connection, checkfirst=True)
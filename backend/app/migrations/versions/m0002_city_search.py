@@ -0,0 +1,13 @@
+"""Full-text search index over cities (see app.models.city_search).
+
+New ``cities`` tables get it from their after_create hook; this builds it
+for databases whose cities table predates the index.
+"""
+
+from app.models.city_search import ensure_city_search_index
+
+description = "city full-text search index"
+
+
+def upgrade(connection) -> None:
+    ensure_city_search_index(connection)
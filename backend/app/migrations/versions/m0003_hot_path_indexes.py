@@ -0,0 +1,56 @@
+"""Indexes for the foreign keys and the hot query paths.
+
+- stops (trip_id, order), unique: itinerary listing and positions; also
+  covers ownership lookups by trip_id. Duplicate positions, which the old
+  count()-based insert could produce, are renumbered first.
+- stops (city_id): visit counts and city joins.
+- trips (user_id, created_at, id) and (created_at, id), users (created_at,
+  id): the keyset-paginated listings.
+- stop_activities (stop_id, activity_id) and (activity_id): a stop's
+  activities, batch add/remove, budget sums.
+- activities (city_id, category): the activity search filters.
+"""
+
+from sqlalchemy import text
+
+description = "foreign-key and hot-path indexes"
+
+INDEXES = [
+    ("uq_stops_trip_order", "stops", 'trip_id, "order"', True),
+    ("ix_stops_city", "stops", "city_id", False),
+    ("ix_trips_user_created", "trips", "user_id, created_at, id", False),
+    ("ix_trips_created", "trips", "created_at, id", False),
+    ("ix_users_created", "users", "created_at, id", False),
+    (
+        "ix_stop_activities_stop_activity",
+        "stop_activities",
+        "stop_id, activity_id",
+        False,
+    ),
+    ("ix_stop_activities_activity", "stop_activities", "activity_id", False),
+    ("ix_activities_city_category", "activities", "city_id, category", False),
+]
+
+# Renumber the stops of trips with clashing positions 1..n, keeping their
+# order (UPDATE ... FROM: PostgreSQL, SQLite 3.33+)
+_RENUMBER_CLASHING_STOPS = """
+UPDATE stops SET "order" = ranked.position
+FROM (
+    SELECT id, ROW_NUMBER() OVER (PARTITION BY trip_id ORDER BY "order", id)
+        AS position
+    FROM stops
+    WHERE trip_id IN (
+        SELECT trip_id FROM stops GROUP BY trip_id, "order" HAVING COUNT(*) > 1
+    )
+) AS ranked
+WHERE stops.id = ranked.id
+"""
+
+
+def upgrade(connection) -> None:
+    connection.execute(text(_RENUMBER_CLASHING_STOPS))
+    for name, table, columns, unique in INDEXES:
+        kind = "UNIQUE INDEX" if unique else "INDEX"
+        connection.execute(
+            text(f"CREATE {kind} IF NOT EXISTS {name} ON {table} ({columns})")
+        )
@@ -0,0 +1,19 @@
+"""Owner and heartbeat of running jobs.
+
+jobs.owner names the runner that claimed a job and jobs.heartbeat_at is
+refreshed while it runs, so a job is reclaimed only once its runner has
+stopped beating, not merely because it runs long.
+"""
+
+from sqlalchemy import inspect, text
+
+description = "job owner and heartbeat"
+
+COLUMNS = [("owner", "VARCHAR"), ("heartbeat_at", "TIMESTAMP")]
+
+
+def upgrade(connection) -> None:
+    existing = {column["name"] for column in inspect(connection).get_columns("jobs")}
+    for name, type_ in COLUMNS:
+        if name not in existing:
+            connection.execute(text(f"ALTER TABLE jobs ADD COLUMN {name} {type_}"))
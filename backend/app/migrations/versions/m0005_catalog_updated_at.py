@@ -0,0 +1,22 @@
+"""Last update time of cities and activities.
+
+The response cache stamps each table with its max updated_at (see
+app.services.response_cache), so an edit made by another worker changes
+the ETags of the routes that show it.
+"""
+
+from sqlalchemy import inspect, text
+
+description = "cities and activities updated_at"
+
+TABLES = ["cities", "activities"]
+
+
+def upgrade(connection) -> None:
+    inspector = inspect(connection)
+    for table in TABLES:
+        existing = {column["name"] for column in inspector.get_columns(table)}
+        if "updated_at" not in existing:
+            connection.execute(
+                text(f"ALTER TABLE {table} ADD COLUMN updated_at TIMESTAMP")
+            )
@@ -0,0 +1,22 @@
+"""Schedule key of periodic jobs.
+
+jobs.schedule_key names a periodic job's run for one interval; its unique
+index lets every runner try to queue that run while only one row lands.
+"""
+
+from sqlalchemy import inspect, text
+
+description = "job schedule key"
+
+INDEXES = [("ix_jobs_schedule_key", "jobs", "schedule_key", True)]
+
+
+def upgrade(connection) -> None:
+    existing = {column["name"] for column in inspect(connection).get_columns("jobs")}
+    if "schedule_key" not in existing:
+        connection.execute(text("ALTER TABLE jobs ADD COLUMN schedule_key VARCHAR"))
+    for name, table, columns, unique in INDEXES:
+        kind = "UNIQUE INDEX" if unique else "INDEX"
+        connection.execute(
+            text(f"CREATE {kind} IF NOT EXISTS {name} ON {table} ({columns})")
+        )
@@ -1,8 +1,24 @@
 from app.database import Base
 from app.models.activity import Activity, StopActivity
+from app.models.analytics import CityVisitsDaily, DailyStats
 from app.models.city import City
+from app.models.city_search import ensure_city_search_index
+from app.models.job import Job, JobStatus
 from app.models.stop import Stop
 from app.models.trip import Trip
 from app.models.user import User
 
-__all__ = ["User", "Trip", "Stop", "City", "Activity", "StopActivity", "Base"]
+__all__ = [
+    "User",
+    "Trip",
+    "Stop",
+    "City",
+    "Activity",
+    "StopActivity",
+    "DailyStats",
+    "CityVisitsDaily",
+    "Job",
+    "JobStatus",
+    "Base",
+    "ensure_city_search_index",
+]
@@ -1,4 +1,16 @@
-from sqlalchemy import Column, Enum, Float, ForeignKey, Integer, String, Text
+from datetime import datetime
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Enum,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+)
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -6,6 +18,7 @@ from app.database import Base
 
 class Activity(Base):
     __tablename__ = "activities"
+    __table_args__ = (Index("ix_activities_city_category", "city_id", "category"),)
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True, nullable=False)
@@ -16,6 +29,7 @@ class Activity(Base):
     image_url = Column(String, nullable=True)
 
     city_id = Column(Integer, ForeignKey("cities.id"), nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     city = relationship("City", back_populates="activities")
@@ -24,6 +38,10 @@ class Activity(Base):
 # Link table: Connects a specific Stop in a Trip to an Activity
 class StopActivity(Base):
     __tablename__ = "stop_activities"
+    __table_args__ = (
+        Index("ix_stop_activities_stop_activity", "stop_id", "activity_id"),
+        Index("ix_stop_activities_activity", "activity_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     stop_id = Column(Integer, ForeignKey("stops.id"), nullable=False)
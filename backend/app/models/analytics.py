@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Date, Integer
+
+from app.database import Base
+
+
+class DailyStats(Base):
+    """Users and trips created per day, maintained by app.services.analytics_service"""
+
+    __tablename__ = "analytics_daily"
+
+    day = Column(Date, primary_key=True)
+    users = Column(Integer, nullable=False, default=0)
+    verified_users = Column(Integer, nullable=False, default=0)
+    trips = Column(Integer, nullable=False, default=0)
+    public_trips = Column(Integer, nullable=False, default=0)
+
+
+class CityVisitsDaily(Base):
+    """Stops created per day and city, maintained by app.services.analytics_service"""
+
+    __tablename__ = "analytics_city_visits_daily"
+
+    day = Column(Date, primary_key=True)
+    city_id = Column(Integer, primary_key=True)
+    visits = Column(Integer, nullable=False, default=0)
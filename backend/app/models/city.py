@@ -1,4 +1,6 @@
-from sqlalchemy import Column, Float, Integer, String, Text
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Float, Integer, String, Text
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -22,4 +24,6 @@ class City(Base):
     latitude = Column(Float, nullable=True)
     longitude = Column(Float, nullable=True)
 
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
     activities = relationship("Activity", back_populates="city")
@@ -0,0 +1,201 @@
+"""Full-text search index over cities (name, country, region).
+
+SQLite: an external-content FTS5 table using the trigram tokenizer, so the
+old ``ILIKE '%term%'`` substring semantics are kept (terms of 3+ characters)
+while lookups go through the index. Triggers keep it in sync with ``cities``.
+PostgreSQL: a GIN index on a ``simple`` tsvector expression, which Postgres
+maintains itself. Other databases, and terms too short for trigrams, fall
+back to ILIKE.
+
+Results are ranked by text relevance blended with ``popularity_score``.
+"""
+
+import logging
+import re
+from typing import Dict, Optional
+
+from sqlalchemy import column, event, func, literal_column, table, text
+from sqlalchemy.exc import OperationalError
+
+from app.config import settings
+from app.models.city import City
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "cities_fts"
+TRIGRAM_MIN_LENGTH = 3
+
+_SQLITE_CREATE_TABLE = f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+    name, country, region,
+    content='cities', content_rowid='id', tokenize='trigram'
+)"""
+_SQLITE_TRIGGERS = [
+    f"""CREATE TRIGGER IF NOT EXISTS cities_fts_ai AFTER INSERT ON cities BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, country, region)
+        VALUES (new.id, new.name, new.country, new.region);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS cities_fts_ad AFTER DELETE ON cities BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, country, region)
+        VALUES ('delete', old.id, old.name, old.country, old.region);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS cities_fts_au
+    AFTER UPDATE OF name, country, region ON cities BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, country, region)
+        VALUES ('delete', old.id, old.name, old.country, old.region);
+        INSERT INTO {FTS_TABLE}(rowid, name, country, region)
+        VALUES (new.id, new.name, new.country, new.region);
+    END""",
+]
+
+_PG_DOCUMENT = (
+    "coalesce(name, '') || ' ' || coalesce(country, '') || ' ' || coalesce(region, '')"
+)
+_PG_DDL = [
+    (
+        "CREATE INDEX IF NOT EXISTS ix_cities_search ON cities "
+        f"USING gin (to_tsvector('simple', {_PG_DOCUMENT}))"
+    ),
+]
+
+# Per-database-URL record of whether the SQLite FTS table exists
+_sqlite_fts_available: Dict[str, bool] = {}
+
+
+def ensure_city_search_index(connection) -> None:
+    """Create (or repair) the search index for the connection's dialect"""
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE name = :name"),
+            {"name": FTS_TABLE},
+        ).first()
+        try:
+            if not exists:
+                connection.execute(text(_SQLITE_CREATE_TABLE))
+                # Index the rows that predate the table
+                connection.execute(
+                    text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+                )
+            for statement in _SQLITE_TRIGGERS:
+                connection.execute(text(statement))
+        except OperationalError:
+            # SQLite built without FTS5 / the trigram tokenizer (< 3.34)
+            logger.warning("SQLite FTS5 trigram unavailable, city search uses ILIKE")
+            _sqlite_fts_available[str(connection.engine.url)] = False
+            return
+        _sqlite_fts_available[str(connection.engine.url)] = True
+    elif dialect == "postgresql":
+        for statement in _PG_DDL:
+            connection.execute(text(statement))
+
+
+def drop_city_search_index(connection) -> None:
+    if connection.dialect.name == "sqlite":
+        connection.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+    elif connection.dialect.name == "postgresql":
+        connection.execute(text("DROP INDEX IF EXISTS ix_cities_search"))
+
+
+@event.listens_for(City.__table__, "after_create")
+def _create_search_index(target, connection, **kw):
+    ensure_city_search_index(connection)
+
+
+@event.listens_for(City.__table__, "before_drop")
+def _drop_search_index(target, connection, **kw):
+    drop_city_search_index(connection)
+
+
+def _has_sqlite_fts(db) -> bool:
+    bind = db.get_bind()
+    key = str(bind.url)
+    if key not in _sqlite_fts_available:
+        exists = db.execute(
+            text("SELECT 1 FROM sqlite_master WHERE name = :name"),
+            {"name": FTS_TABLE},
+        ).first()
+        _sqlite_fts_available[key] = exists is not None
+    return _sqlite_fts_available[key]
+
+
+def _fts5_phrase(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _popularity_boost():
+    weight = settings.CITY_SEARCH_POPULARITY_WEIGHT
+    return 1.0 + weight * func.coalesce(City.popularity_score, 0) / 100.0
+
+
+def _ilike(query, search, country, region):
+    if search:
+        search_term = f"%{search}%"
+        query = query.filter(
+            (City.name.ilike(search_term)) | (City.country.ilike(search_term))
+        )
+    if country:
+        query = query.filter(City.country.ilike(f"%{country}%"))
+    if region:
+        query = query.filter(City.region.ilike(f"%{region}%"))
+    return query
+
+
+def _sqlite_search(query, search, country, region):
+    # Each filter goes through the trigram index when it is long enough
+    clauses, short = [], {}
+    for columns, term, name in (
+        ("{name country}", search, "search"),
+        ("country", country, "country"),
+        ("region", region, "region"),
+    ):
+        if not term:
+            continue
+        if len(term) >= TRIGRAM_MIN_LENGTH:
+            clauses.append(f"{columns} : {_fts5_phrase(term)}")
+        else:
+            short[name] = term
+
+    query = _ilike(
+        query, short.get("search"), short.get("country"), short.get("region")
+    )
+    if not clauses:
+        return query, False
+
+    fts = table(FTS_TABLE, column("rowid"), column("rank"))
+    query = (
+        query.join(fts, fts.c.rowid == City.id)
+        .filter(literal_column(FTS_TABLE).op("MATCH")(" AND ".join(clauses)))
+        # FTS5 rank is bm25, negative: more negative = more relevant
+        .order_by(fts.c.rank * _popularity_boost(), City.id)
+    )
+    return query, True
+
+
+def _pg_search(query, search, country, region):
+    words = re.findall(r"\w+", search or "")
+    query = _ilike(query, None, country, region)
+    if not words:
+        return query, False
+
+    document = func.to_tsvector("simple", literal_column(_PG_DOCUMENT))
+    ts_query = func.to_tsquery("simple", " & ".join(f"{w}:*" for w in words))
+    query = query.filter(document.op("@@")(ts_query)).order_by(
+        (func.ts_rank(document, ts_query) * _popularity_boost()).desc(), City.id
+    )
+    return query, True
+
+
+def apply_city_search(
+    query, db, search: Optional[str], country: Optional[str], region: Optional[str]
+):
+    """Apply text filters to a City query.
+
+    Returns ``(query, ranked)``; when ``ranked`` is True the query is already
+    ordered by relevance blended with popularity.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite" and _has_sqlite_fts(db):
+        return _sqlite_search(query, search, country, region)
+    if dialect == "postgresql":
+        return _pg_search(query, search, country, region)
+    return _ilike(query, search, country, region), False
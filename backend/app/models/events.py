@@ -0,0 +1,97 @@
+"""Commit-time change notifications for ORM models.
+
+In-process caches register a callback with ``on_commit(Model, ...)``. Row
+changes are captured at flush time (column values are snapshotted while the
+objects are still loaded) and delivered only once the transaction commits;
+a rollback discards them. Writes that bypass the ORM (Core bulk statements)
+can queue their own work with ``call_after_commit(session, fn)``.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, Dict, FrozenSet, List
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "pending_model_changes"
+_CALLBACKS_KEY = "pending_commit_callbacks"
+
+_listeners: Dict[type, List[Callable]] = {}
+
+
+@dataclass(frozen=True)
+class ModelChange:
+    op: str  # "insert", "update" or "delete"
+    model: type
+    values: dict
+    changed: FrozenSet[str] = field(default_factory=frozenset)
+
+
+def _snapshot(mapper, target) -> dict:
+    return {attr.key: getattr(target, attr.key) for attr in mapper.column_attrs}
+
+
+def _changed_keys(mapper, target) -> FrozenSet[str]:
+    state = inspect(target)
+    return frozenset(
+        attr.key
+        for attr in mapper.column_attrs
+        if state.attrs[attr.key].history.has_changes()
+    )
+
+
+def _record(op: str):
+    def listener(mapper, connection, target):
+        session = Session.object_session(target)
+        if session is None:
+            return
+        changed = _changed_keys(mapper, target) if op == "update" else frozenset()
+        session.info.setdefault(_PENDING_KEY, []).append(
+            ModelChange(op, mapper.class_, _snapshot(mapper, target), changed)
+        )
+
+    return listener
+
+
+def on_commit(*models: type):
+    """Decorator registering `fn(change: ModelChange)` for commits on models"""
+
+    def decorator(fn: Callable[[ModelChange], None]):
+        for model in models:
+            if model not in _listeners:
+                _listeners[model] = []
+                for op in ("insert", "update", "delete"):
+                    event.listen(model, f"after_{op}", _record(op))
+            _listeners[model].append(fn)
+        return fn
+
+    return decorator
+
+
+def call_after_commit(session: Session, fn: Callable[[], None]) -> None:
+    """Run `fn()` once the session's current transaction commits"""
+    session.info.setdefault(_CALLBACKS_KEY, []).append(fn)
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch(session):
+    for change in session.info.pop(_PENDING_KEY, None) or ():
+        for fn in _listeners.get(change.model, ()):
+            try:
+                fn(change)
+            except Exception:
+                logger.exception("on_commit listener %r failed", fn)
+    for fn in session.info.pop(_CALLBACKS_KEY, None) or ():
+        try:
+            fn()
+        except Exception:
+            logger.exception("after-commit callback %r failed", fn)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session):
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_CALLBACKS_KEY, None)
@@ -0,0 +1,61 @@
+import enum
+from datetime import datetime
+
+from sqlalchemy import (
+    JSON,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+)
+
+from app.database import Base
+
+
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class Job(Base):
+    """A background job run by app.services.job_runner"""
+
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # The runners' sweep for queued / abandoned jobs
+        Index("ix_jobs_status", "status", "run_after"),
+        # One run of a periodic job per interval, whichever runner queues it
+        Index("ix_jobs_schedule_key", "schedule_key", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)
+    params = Column(JSON, nullable=False, default=dict)
+    status = Column(String, nullable=False, default=JobStatus.QUEUED.value)
+    progress = Column(Float, nullable=False, default=0.0)  # 0.0 - 1.0
+    result = Column(JSON, nullable=True)  # Return value, or last checkpoint
+    error = Column(Text, nullable=True)
+
+    # Retries
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    run_after = Column(DateTime, nullable=True)  # Backoff: not before this time
+
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    # "<kind>:<interval number>" for the runs of periodic jobs
+    schedule_key = Column(String, nullable=True)
+
+    # The runner running it, and when that runner last showed it was alive
+    owner = Column(String, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
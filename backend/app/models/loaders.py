@@ -0,0 +1,24 @@
+"""Shared eager-loading options for the stop/activity itinerary graph.
+
+Responses such as StopWithCityResponse nest ``city`` and
+``activities[].activity``; without these options Pydantic's from_attributes
+serialization lazy-loads each relationship one row at a time.
+"""
+
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.models.activity import StopActivity
+from app.models.stop import Stop
+
+
+def stop_graph_options():
+    """Load a stop's city and its activities (with activity details)"""
+    return (
+        joinedload(Stop.city),
+        selectinload(Stop.activities).joinedload(StopActivity.activity),
+    )
+
+
+def stop_owner_options():
+    """Load a stop's trip so ownership checks don't need a second query"""
+    return (joinedload(Stop.trip),)
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, String
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -8,6 +8,11 @@ from app.database import Base
 
 class Stop(Base):
     __tablename__ = "stops"
+    __table_args__ = (
+        # One stop per position; see app.services.trip_service.reorder_stops
+        Index("uq_stops_trip_order", "trip_id", "order", unique=True),
+        Index("ix_stops_city", "city_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     trip_id = Column(Integer, ForeignKey("trips.id"), nullable=False)
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -8,6 +8,11 @@ from app.database import Base
 
 class Trip(Base):
     __tablename__ = "trips"
+    # Keyset pagination: a user's trips, and all trips, by (created_at, id)
+    __table_args__ = (
+        Index("ix_trips_user_created", "user_id", "created_at", "id"),
+        Index("ix_trips_created", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
@@ -5,18 +5,27 @@ from app.schemas.activity import (
     ActivityResponse,
     ActivityUpdate,
     StopActivityAdd,
+    StopActivityBatchAdd,
+    StopActivityBatchItem,
+    StopActivityBatchRemove,
+    StopActivityBatchResponse,
     StopActivityResponse,
 )
 from app.schemas.city import (
+    CityAutocompleteResponse,
     CityBase,
     CityCreate,
     CityListResponse,
+    CityNearbyResponse,
     CityResponse,
     CityUpdate,
 )
 from app.schemas.stop import (
+    RouteOptimizationResponse,
     StopBase,
+    StopBatchCreate,
     StopCreate,
+    StopOrderUpdate,
     StopResponse,
     StopUpdate,
     StopWithCityResponse,
@@ -53,15 +62,24 @@ __all__ = [
     "CityUpdate",
     "CityResponse",
     "CityListResponse",
+    "CityAutocompleteResponse",
+    "CityNearbyResponse",
     "StopBase",
     "StopCreate",
     "StopUpdate",
     "StopResponse",
     "StopWithCityResponse",
+    "StopBatchCreate",
+    "StopOrderUpdate",
+    "RouteOptimizationResponse",
     "ActivityBase",
     "ActivityCreate",
     "ActivityResponse",
     "ActivityUpdate",
     "StopActivityAdd",
     "StopActivityResponse",
+    "StopActivityBatchAdd",
+    "StopActivityBatchRemove",
+    "StopActivityBatchItem",
+    "StopActivityBatchResponse",
 ]
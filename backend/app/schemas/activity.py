@@ -1,6 +1,6 @@
-from typing import Optional
+from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 # --- Generic Activity Schemas ---
@@ -43,6 +43,36 @@ class StopActivityAdd(BaseModel):
     actual_cost: Optional[float] = None  # User can override default cost
 
 
+# Largest number of items the stop activity batch endpoints take at once
+MAX_BATCH_ACTIVITIES = 100
+
+
+# Payload for POST /activities/stop/{stop_id}/batch
+class StopActivityBatchAdd(BaseModel):
+    items: List[StopActivityAdd] = Field(
+        ..., min_length=1, max_length=MAX_BATCH_ACTIVITIES
+    )
+
+
+# Payload for POST /activities/stop/{stop_id}/batch-delete
+class StopActivityBatchRemove(BaseModel):
+    activity_ids: List[int] = Field(..., min_length=1, max_length=MAX_BATCH_ACTIVITIES)
+
+
+# Outcome of one item of a batch, in request order
+class StopActivityBatchItem(BaseModel):
+    activity_id: int
+    status: str  # "added", "removed" or "not_found"
+    actual_cost: Optional[float] = None
+
+
+class StopActivityBatchResponse(BaseModel):
+    stop_id: int
+    succeeded: int
+    failed: int
+    results: List[StopActivityBatchItem]
+
+
 # Payload for Response (showing what activities are in a stop)
 class StopActivityResponse(BaseModel):
     id: int
@@ -48,3 +48,19 @@ class CityListResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class CityAutocompleteResponse(BaseModel):
+    id: int
+    name: str
+    country: str
+    popularity_score: Optional[int] = 0
+
+    class Config:
+        from_attributes = True
+
+
+class CityNearbyResponse(CityListResponse):
+    latitude: float
+    longitude: float
+    distance_km: float
@@ -0,0 +1,40 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel, Field
+
+
+class JobCreate(BaseModel):
+    kind: str
+    params: Dict[str, Any] = {}
+
+
+class JobResponse(BaseModel):
+    id: int
+    kind: str
+    params: Dict[str, Any]
+    status: str
+    progress: float
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    attempts: int
+    max_attempts: int
+    run_after: Optional[datetime] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+# Params of the built-in job kinds (see app.services.jobs)
+
+
+class CopyTripJobParams(BaseModel):
+    trip_id: int
+    count: int = Field(1, ge=1, le=500)
+
+
+class TripBudgetJobParams(BaseModel):
+    trip_id: int
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from app.schemas.activity import StopActivityResponse
 from app.schemas.city import CityResponse
@@ -22,6 +22,18 @@ class StopCreate(BaseModel):
     transport_cost: Optional[float] = 0.0
 
 
+# Largest number of stops POST /trips/{id}/stops:batch takes at once
+MAX_BATCH_STOPS = 100
+
+
+class StopBatchCreate(BaseModel):
+    stops: List[StopCreate] = Field(..., min_length=1, max_length=MAX_BATCH_STOPS)
+
+
+class StopOrderUpdate(BaseModel):
+    stop_ids: List[int]  # Every stop of the trip, in the new order
+
+
 class StopUpdate(BaseModel):
     start_date: Optional[datetime] = None
     end_date: Optional[datetime] = None
@@ -48,3 +60,11 @@ class StopWithCityResponse(StopResponse):
 
     class Config:
         from_attributes = True
+
+
+class RouteOptimizationResponse(BaseModel):
+    trip_id: int
+    stop_ids: List[int]  # New visiting order
+    distance_before_km: float
+    distance_after_km: float
+    distance_saved_km: float
@@ -0,0 +1,301 @@
+"""Incrementally maintained rollups behind GET /admin/analytics.
+
+DailyStats and CityVisitsDaily hold row counts per creation day. Every
+flush touching User, Trip or Stop is turned into per-day deltas (inserts,
+deletes, verified/public flag flips) which are upserted in the same
+transaction, so the rollups commit or roll back together with the rows they
+count. Writes that bypass the unit of work (Core inserts, bulk query
+updates/deletes) are caught up by ``reconcile_rollups``, which rebuilds both
+tables from the source tables. It runs as the periodic "analytics_reconcile"
+job (see app.services.jobs), so one runner does it per interval.
+"""
+
+import importlib
+import logging
+from collections import Counter, defaultdict
+from datetime import date, datetime
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from sqlalchemy import (
+    Date,
+    case,
+    cast,
+    delete,
+    event,
+    func,
+    insert,
+    select,
+    text,
+    update,
+)
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session
+
+from app.models.analytics import CityVisitsDaily, DailyStats
+from app.models.city import City
+from app.models.stop import Stop
+from app.models.trip import Trip
+from app.models.user import User
+from app.services.popularity import popularity
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "pending_analytics_deltas"
+_DAILY_COLUMNS = ("users", "verified_users", "trips", "public_trips")
+# Dialects with INSERT .. ON CONFLICT; their modules load on first use
+_UPSERT_DIALECTS = ("sqlite", "postgresql")
+
+
+class _Deltas:
+    def __init__(self):
+        self.daily: Dict[date, Counter] = defaultdict(Counter)
+        self.visits: Counter = Counter()  # (day, city_id) -> delta
+
+    def __bool__(self):
+        return any(any(c.values()) for c in self.daily.values()) or any(
+            self.visits.values()
+        )
+
+
+def _day(created_at: Optional[datetime]) -> date:
+    # New rows get created_at from the column default during the flush
+    return (created_at or datetime.utcnow()).date()
+
+
+def _count_row(deltas: _Deltas, obj, sign: int) -> None:
+    if isinstance(obj, User):
+        daily = deltas.daily[_day(obj.created_at)]
+        daily["users"] += sign
+        if obj.is_verified:
+            daily["verified_users"] += sign
+    elif isinstance(obj, Trip):
+        daily = deltas.daily[_day(obj.created_at)]
+        daily["trips"] += sign
+        if obj.is_public:
+            daily["public_trips"] += sign
+    elif isinstance(obj, Stop):
+        deltas.visits[(_day(obj.created_at), obj.city_id)] += sign
+
+
+def _previous_value(session: Session, obj, key: str):
+    history = sa_inspect(obj).attrs[key].history
+    if not history.has_changes():
+        return None, False
+    if history.deleted:
+        return history.deleted[0], True
+    # The old value was never loaded; read it from the row being updated
+    mapper = sa_inspect(obj).mapper
+    column = mapper.columns[key]
+    old = session.connection().scalar(
+        select(column).where(mapper.primary_key[0] == obj.id)
+    )
+    return old, True
+
+
+def _count_update(session: Session, deltas: _Deltas, obj) -> None:
+    flags = {
+        User: ("is_verified", "verified_users"),
+        Trip: ("is_public", "public_trips"),
+    }
+    for model, (key, column) in flags.items():
+        if isinstance(obj, model):
+            old, changed = _previous_value(session, obj, key)
+            if changed and bool(old) != bool(getattr(obj, key)):
+                deltas.daily[_day(obj.created_at)][column] += (
+                    1 if getattr(obj, key) else -1
+                )
+    if isinstance(obj, Stop):
+        old, changed = _previous_value(session, obj, "city_id")
+        if changed and old != obj.city_id:
+            day = _day(obj.created_at)
+            deltas.visits[(day, old)] -= 1
+            deltas.visits[(day, obj.city_id)] += 1
+
+
+@event.listens_for(Session, "before_flush")
+def _collect(session, flush_context, instances):
+    deltas = _Deltas()
+    for obj in session.new:
+        _count_row(deltas, obj, +1)
+    for obj in session.deleted:
+        _count_row(deltas, obj, -1)
+    for obj in session.dirty:
+        if isinstance(obj, (User, Trip, Stop)):
+            _count_update(session, deltas, obj)
+    session.info[_PENDING_KEY] = deltas
+
+
+@event.listens_for(Session, "after_flush")
+def _apply(session, flush_context):
+    deltas = session.info.pop(_PENDING_KEY, None)
+    if deltas:
+        apply_deltas(session, deltas)
+
+
+def _increment(connection, table, keys: Tuple[str, ...], rows: List[dict]) -> None:
+    """Add each row's counters onto the existing row with the same keys"""
+    counters = [c for c in rows[0] if c not in keys]
+    dialect = connection.dialect.name
+    if dialect in _UPSERT_DIALECTS:
+        insert_fn = importlib.import_module(f"sqlalchemy.dialects.{dialect}").insert
+        stmt = insert_fn(table).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={c: table.c[c] + stmt.excluded[c] for c in counters},
+        )
+        connection.execute(stmt)
+        return
+
+    for row in rows:
+        matched = connection.execute(
+            update(table)
+            .where(*(table.c[k] == row[k] for k in keys))
+            .values({c: table.c[c] + row[c] for c in counters})
+        )
+        if matched.rowcount == 0:
+            connection.execute(insert(table).values(row))
+
+
+def apply_deltas(session: Session, deltas: _Deltas) -> None:
+    connection = session.connection()
+    daily = [
+        {"day": day, **{c: counter[c] for c in _DAILY_COLUMNS}}
+        for day, counter in deltas.daily.items()
+        if any(counter.values())
+    ]
+    if daily:
+        _increment(connection, DailyStats.__table__, ("day",), daily)
+    visits = [
+        {"day": day, "city_id": city_id, "visits": n}
+        for (day, city_id), n in deltas.visits.items()
+        if n
+    ]
+    if visits:
+        _increment(connection, CityVisitsDaily.__table__, ("day", "city_id"), visits)
+
+
+def record_city_visits(session: Session, city_counts: Mapping[int, int]) -> None:
+    """Count stops created today outside the unit of work (e.g. Core inserts)"""
+    deltas = _Deltas()
+    today = _day(None)
+    for city_id, n in city_counts.items():
+        deltas.visits[(today, city_id)] += n
+    if deltas:
+        apply_deltas(session, deltas)
+
+
+# --- Reconcile ---
+
+
+def _day_expr(db: Session, column):
+    if db.get_bind().dialect.name == "sqlite":
+        return func.date(column)  # CAST(... AS DATE) is numeric in SQLite
+    return cast(column, Date)
+
+
+def _as_date(value) -> date:
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _lock_rollups(db: Session) -> None:
+    """Empty the rollups, holding back other transactions' flush upserts
+    until the commit so none lands between the counts and the rebuild"""
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(
+            text(
+                "LOCK TABLE analytics_daily, analytics_city_visits_daily "
+                "IN EXCLUSIVE MODE"
+            )
+        )
+    # On SQLite the first write takes the database write lock
+    db.execute(delete(DailyStats))
+    db.execute(delete(CityVisitsDaily))
+
+
+def reconcile_rollups(db: Session) -> None:
+    """Rebuild both rollup tables from users, trips and stops, then commit.
+
+    The counts are read in the transaction that rewrites the rollups, after
+    it locked them. The popularity ranking is rebuilt from the fresh visits
+    rollup too.
+    """
+    _lock_rollups(db)
+    daily: Dict[date, dict] = defaultdict(lambda: dict.fromkeys(_DAILY_COLUMNS, 0))
+
+    user_day = _day_expr(db, User.created_at)
+    for day, users, verified in db.execute(
+        select(
+            user_day,
+            func.count(User.id),
+            func.sum(case((User.is_verified.is_(True), 1), else_=0)),
+        )
+        .where(User.created_at.isnot(None))
+        .group_by(user_day)
+    ):
+        daily[_as_date(day)].update(users=users, verified_users=verified)
+
+    trip_day = _day_expr(db, Trip.created_at)
+    for day, trips, public in db.execute(
+        select(
+            trip_day,
+            func.count(Trip.id),
+            func.sum(case((Trip.is_public != 0, 1), else_=0)),
+        )
+        .where(Trip.created_at.isnot(None))
+        .group_by(trip_day)
+    ):
+        daily[_as_date(day)].update(trips=trips, public_trips=public)
+
+    stop_day = _day_expr(db, Stop.created_at)
+    visits = [
+        {"day": _as_date(day), "city_id": city_id, "visits": n}
+        for day, city_id, n in db.execute(
+            select(stop_day, Stop.city_id, func.count(Stop.id))
+            .where(Stop.created_at.isnot(None))
+            .group_by(stop_day, Stop.city_id)
+        )
+    ]
+
+    if daily:
+        db.execute(
+            insert(DailyStats), [{"day": day, **row} for day, row in daily.items()]
+        )
+    if visits:
+        db.execute(insert(CityVisitsDaily), visits)
+    db.commit()
+    # The live popularity ranking is derived from the visits rollup
+    popularity.rebuild(db)
+
+
+# --- Reads ---
+
+
+def window_totals(db: Session, since: Optional[date]) -> dict:
+    """Summed DailyStats counters for days on or after `since` (None = all)"""
+    query = db.query(
+        *(func.coalesce(func.sum(getattr(DailyStats, c)), 0) for c in _DAILY_COLUMNS)
+    )
+    if since is not None:
+        query = query.filter(DailyStats.day >= since)
+    return dict(zip(_DAILY_COLUMNS, query.one()))
+
+
+def popular_cities(db: Session, since: Optional[date], limit: int = 10):
+    """(City, visits) for the most visited cities since `since`"""
+    visits = func.sum(CityVisitsDaily.visits)
+    query = db.query(CityVisitsDaily.city_id, visits.label("visits"))
+    if since is not None:
+        query = query.filter(CityVisitsDaily.day >= since)
+    top = (
+        query.group_by(CityVisitsDaily.city_id)
+        .having(visits > 0)
+        .order_by(visits.desc(), CityVisitsDaily.city_id)
+        .limit(limit)
+        .subquery()
+    )
+    return (
+        db.query(City, top.c.visits)
+        .join(top, top.c.city_id == City.id)
+        .order_by(top.c.visits.desc(), City.id)
+        .all()
+    )
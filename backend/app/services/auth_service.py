@@ -0,0 +1,101 @@
+"""Cache of the authenticated user's id, role and verification flag.
+
+get_current_user serves a UserSnapshot from ``user_cache`` so most requests
+authenticate without a users query. Commit hooks drop a user's snapshot
+when its role or verification changes or the user is deleted, but only in
+the process that committed: another worker keeps serving its snapshot for
+up to USER_CACHE_TTL_SECONDS. A deleted user's token therefore keeps
+working there for that long on regular routes. Admin routes don't rely on
+the snapshot: get_current_admin_user re-reads the role on every request.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from app.config import settings
+from app.models.events import ModelChange, on_commit
+from app.models.user import User
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """The slice of a user that authorization checks need"""
+
+    id: int
+    role: str
+    is_verified: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserSnapshot":
+        return cls(id=user.id, role=user.role, is_verified=bool(user.is_verified))
+
+
+class UserCache:
+    """Bounded, thread-safe TTL + LRU cache of UserSnapshots keyed by user id"""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[int, tuple[float, UserSnapshot]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[UserSnapshot]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, snapshot: UserSnapshot) -> UserSnapshot:
+        with self._lock:
+            expires_at = time.monotonic() + self.ttl_seconds
+            self._entries[snapshot.id] = (expires_at, snapshot)
+            self._entries.move_to_end(snapshot.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return snapshot
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+
+user_cache = UserCache(
+    max_size=settings.USER_CACHE_MAX_SIZE,
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS,
+)
+
+
+@on_commit(User)
+def _invalidate_changed_user(change: ModelChange) -> None:
+    # Catches role / verification changes made outside the profile endpoints
+    if change.op == "delete" or change.changed & {"role", "is_verified"}:
+        user_cache.invalidate(change.values["id"])
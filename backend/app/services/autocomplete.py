@@ -0,0 +1,202 @@
+"""In-process typeahead index for city names and countries.
+
+A prefix trie over accent-folded keys ("São Paulo" -> "sao paulo"). Every
+node keeps its own top-k cities by popularity, so a lookup is a walk down
+``len(q)`` nodes plus a slice, independent of how many cities match.
+
+Built from the City table at startup and kept current by commit hooks.
+Cities written by another process show up in the "cities" response-cache
+stamp, checked before a lookup at most every HTTP_CACHE_STAMP_CHECK_SECONDS;
+a change resets the trie, rebuilt by that lookup.
+"""
+
+import heapq
+import threading
+import unicodedata
+from typing import Dict, List, NamedTuple, Set
+
+from app.config import settings
+from app.models.city import City
+from app.models.events import ModelChange, on_commit
+from app.services.response_cache import response_cache
+
+
+def fold(text: str) -> str:
+    """Lower-case and strip accents so 'Zürich' and 'zurich' share a key"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(stripped.casefold().split())
+
+
+class CityEntry(NamedTuple):
+    id: int
+    name: str
+    country: str
+    popularity_score: int
+
+
+def _rank(entry: CityEntry):
+    return (-(entry.popularity_score or 0), entry.id)
+
+
+def _keys(entry: CityEntry) -> Set[str]:
+    # Full name, every later word of the name ("york" for New York), country
+    name = fold(entry.name)
+    keys = {name, fold(entry.country)}
+    words = name.split(" ")
+    keys.update(" ".join(words[i:]) for i in range(1, len(words)))
+    keys.discard("")
+    return keys
+
+
+class _Node:
+    __slots__ = ("children", "terminal", "top")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.terminal: Set[int] = set()  # ids whose key ends here
+        self.top: List[CityEntry] = []  # best `top_k` ids in this subtree
+
+
+class CityAutocomplete:
+    def __init__(self, top_k: int):
+        self.top_k = top_k
+        self.ready = False
+        self._root = _Node()
+        self._entries: Dict[int, CityEntry] = {}
+        self._lock = threading.Lock()
+
+    # --- Reads ---
+
+    def search(self, q: str, k: int) -> List[CityEntry]:
+        node = self._root
+        for ch in fold(q):
+            node = node.children.get(ch)
+            if node is None:
+                return []
+        return node.top[:k]
+
+    # --- Writes ---
+
+    def rebuild(self, db) -> None:
+        rows = db.query(City.id, City.name, City.country, City.popularity_score).all()
+        root, entries = _Node(), {}
+        for row in rows:
+            entry = CityEntry(row.id, row.name, row.country, row.popularity_score)
+            entries[entry.id] = entry
+            for key in _keys(entry):
+                self._path(root, key, create=True)[-1].terminal.add(entry.id)
+        self._recompute_subtree(root, entries)
+        with self._lock:
+            self._root, self._entries = root, entries
+            self.ready = True
+
+    def upsert(self, entry: CityEntry) -> None:
+        with self._lock:
+            if entry.id in self._entries:
+                self._remove(entry.id)
+            self._entries[entry.id] = entry
+            for key in _keys(entry):
+                path = self._path(self._root, key, create=True)
+                path[-1].terminal.add(entry.id)
+                for node in path:
+                    top = node.top
+                    if len(top) < self.top_k or _rank(entry) < _rank(top[-1]):
+                        node.top = self._merge(top + [entry])
+
+    def remove(self, city_id: int) -> None:
+        with self._lock:
+            self._remove(city_id)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._root, self._entries = _Node(), {}
+            self.ready = False
+
+    # --- Internals (callers hold the lock) ---
+
+    def _remove(self, city_id: int) -> None:
+        entry = self._entries.pop(city_id, None)
+        if entry is None:
+            return
+        for key in _keys(entry):
+            path = self._path(self._root, key)
+            if path is None:
+                continue
+            path[-1].terminal.discard(city_id)
+            # Parents derive their top-k from their children, so go bottom-up
+            for node in reversed(path):
+                node.top = self._node_top(node, self._entries)
+
+    def _path(self, root: _Node, key: str, create: bool = False):
+        path = [root]
+        node = root
+        for ch in key:
+            child = node.children.get(ch)
+            if child is None:
+                if not create:
+                    return None
+                child = node.children[ch] = _Node()
+            node = child
+            path.append(node)
+        return path
+
+    def _merge(self, candidates: List[CityEntry]) -> List[CityEntry]:
+        unique = {entry.id: entry for entry in candidates}
+        return heapq.nsmallest(self.top_k, unique.values(), key=_rank)
+
+    def _node_top(self, node: _Node, entries: Dict[int, CityEntry]):
+        candidates = [entries[i] for i in node.terminal]
+        for child in node.children.values():
+            candidates.extend(child.top)
+        return self._merge(candidates)
+
+    def _recompute_subtree(self, root: _Node, entries: Dict[int, CityEntry]):
+        # Iterative post-order so deep keys can't hit the recursion limit
+        stack = [(root, False)]
+        while stack:
+            node, children_done = stack.pop()
+            if children_done:
+                node.top = self._node_top(node, entries)
+            else:
+                stack.append((node, True))
+                stack.extend((child, False) for child in node.children.values())
+
+
+city_autocomplete = CityAutocomplete(top_k=settings.AUTOCOMPLETE_MAX_RESULTS)
+
+
+def ensure_autocomplete(db) -> CityAutocomplete:
+    if response_cache.stamps_due():
+        response_cache.check_stamps()
+    if not city_autocomplete.ready:
+        city_autocomplete.rebuild(db)
+    return city_autocomplete
+
+
+@on_commit(City)
+def _sync_autocomplete(change: ModelChange) -> None:
+    if not city_autocomplete.ready:
+        return  # The next rebuild picks the change up
+    values = change.values
+    if change.op == "delete":
+        city_autocomplete.remove(values["id"])
+    elif change.op == "insert" or change.changed & {
+        "name",
+        "country",
+        "popularity_score",
+    }:
+        city_autocomplete.upsert(
+            CityEntry(
+                values["id"],
+                values["name"],
+                values["country"],
+                values["popularity_score"],
+            )
+        )
+
+
+@response_cache.on_stamp_change
+def _reset_on_stamp_change(tag: str) -> None:
+    if tag == "cities":
+        city_autocomplete.reset()
@@ -0,0 +1,85 @@
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app.models.activity import StopActivity
+from app.models.city import City
+from app.models.stop import Stop
+
+
+def calculate_trip_budget(db: Session, trip_id: int) -> dict:
+    """Build the budget breakdown for a trip from a single aggregated query"""
+    # Activity costs summed per stop, joined back onto stops + cities.
+    # Zero costs are skipped so the SUM is NULL exactly when every cost is
+    # NULL or 0, which keeps the int 0 the per-row loop used to return.
+    activity_totals = (
+        db.query(
+            StopActivity.stop_id.label("stop_id"),
+            func.sum(
+                case(
+                    (StopActivity.actual_cost != 0, StopActivity.actual_cost),
+                )
+            ).label("activities_cost"),
+        )
+        .join(Stop, Stop.id == StopActivity.stop_id)
+        .filter(Stop.trip_id == trip_id)
+        .group_by(StopActivity.stop_id)
+        .subquery()
+    )
+
+    rows = (
+        db.query(
+            Stop.start_date,
+            Stop.end_date,
+            Stop.transport_cost,
+            City.name.label("city_name"),
+            City.avg_cost_per_day,
+            activity_totals.c.activities_cost,
+        )
+        .join(City, City.id == Stop.city_id)
+        .outerjoin(activity_totals, activity_totals.c.stop_id == Stop.id)
+        .filter(Stop.trip_id == trip_id)
+        .order_by(Stop.id)
+        .all()
+    )
+
+    total_accommodation = 0.0
+    total_activities = 0.0
+    total_transport = 0.0
+    breakdown = []
+
+    for row in rows:
+        # Calculate Duration (simple difference in days)
+        duration = (row.end_date - row.start_date).days
+        duration = max(duration, 1)  # Minimum 1 day
+
+        # Accommodation (City Cost * Days)
+        acc_cost = (row.avg_cost_per_day or 0) * duration
+        total_accommodation += acc_cost
+
+        # Activities Cost for this stop
+        act_cost = row.activities_cost if row.activities_cost is not None else 0
+        total_activities += act_cost
+
+        trans_cost = row.transport_cost or 0.0
+        total_transport += trans_cost
+
+        breakdown.append(
+            {
+                "city": row.city_name,
+                "days": duration,
+                "accommodation": acc_cost,
+                "transport": trans_cost,
+                "activities": act_cost,
+                "subtotal": acc_cost + act_cost + trans_cost,
+            }
+        )
+
+    return {
+        "total_budget": total_accommodation + total_activities + total_transport,
+        "categories": {
+            "accommodation": total_accommodation,
+            "activities": total_activities,
+            "transport": total_transport,
+        },
+        "breakdown": breakdown,
+    }
@@ -0,0 +1,246 @@
+"""In-memory catalog of the City and Activity reference tables.
+
+Cities and activities change rarely (seed scripts, admin edits), so they are
+held in memory as immutable snapshots with the lookups the read endpoints
+need: by id, by country, by city and by category, plus cities pre-sorted by
+popularity. Reads are served without queries.
+
+A snapshot is stale when either of these changes:
+- the local version counter, bumped by commit hooks on City and Activity;
+- the table stamp (row counts, max ids and max updated_at), checked at most
+  every CATALOG_STAMP_CHECK_SECONDS, which catches seed scripts and admin
+  edits from another process. The response cache checks the same stamps on
+  its own schedule; whichever notices a change first makes the other
+  re-read, so a cached route's ETag never outlives the rows it was
+  rendered from.
+A stale snapshot is rebuilt with one query per table on the next read.
+"""
+
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.activity import Activity
+from app.models.city import City
+from app.models.events import ModelChange, on_commit
+from app.services.response_cache import response_cache
+
+# Response cache tags of the routes served from the catalog
+CATALOG_TAGS = ("cities", "activities")
+
+
+class CityRecord(NamedTuple):
+    id: int
+    name: str
+    country: str
+    region: Optional[str]
+    description: Optional[str]
+    image_url: Optional[str]
+    avg_cost_per_day: Optional[float]
+    popularity_score: Optional[int]
+    latitude: Optional[float]
+    longitude: Optional[float]
+
+
+class ActivityRecord(NamedTuple):
+    id: int
+    name: str
+    category: Optional[str]
+    description: Optional[str]
+    estimated_cost: Optional[float]
+    duration_hours: Optional[float]
+    image_url: Optional[str]
+    city_id: int
+
+
+def _popularity_rank(city: CityRecord):
+    # ORDER BY popularity_score DESC: NULLs last, ties by id
+    score = city.popularity_score
+    return (score is None, -(score or 0), city.id)
+
+
+def _contains(value: Optional[str], needle: str) -> bool:
+    # ILIKE '%needle%'
+    return value is not None and needle in value.casefold()
+
+
+class CatalogSnapshot:
+    def __init__(self, cities: List[CityRecord], activities: List[ActivityRecord]):
+        self.cities_by_id: Dict[int, CityRecord] = {c.id: c for c in cities}
+        # Every city list below is in popularity order
+        self.popular: Tuple[CityRecord, ...] = tuple(
+            sorted(cities, key=_popularity_rank)
+        )
+        by_country = defaultdict(list)
+        for city in self.popular:
+            by_country[city.country.casefold()].append(city)
+        self.cities_by_country: Dict[str, Tuple[CityRecord, ...]] = {
+            country: tuple(rows) for country, rows in by_country.items()
+        }
+
+        # Activity lists are in id order, as the table scan returned them
+        self.activities: Tuple[ActivityRecord, ...] = tuple(
+            sorted(activities, key=lambda a: a.id)
+        )
+        self.activities_by_id = {a.id: a for a in self.activities}
+        by_city, by_category = defaultdict(list), defaultdict(list)
+        for activity in self.activities:
+            by_city[activity.city_id].append(activity)
+            by_category[activity.category].append(activity)
+        self.activities_by_city = {k: tuple(v) for k, v in by_city.items()}
+        self.activities_by_category = {k: tuple(v) for k, v in by_category.items()}
+
+    # --- Cities ---
+
+    def get_city(self, city_id: int) -> Optional[CityRecord]:
+        return self.cities_by_id.get(city_id)
+
+    def popular_cities(self, limit: int) -> List[CityRecord]:
+        return list(self.popular[:limit])
+
+    def filter_cities(
+        self,
+        country: Optional[str] = None,
+        region: Optional[str] = None,
+        min_cost: Optional[float] = None,
+        max_cost: Optional[float] = None,
+        limit: int = 20,
+    ) -> List[CityRecord]:
+        """Cities matching the non-text filters of GET /cities, most popular first"""
+        candidates = self.popular
+        if country:
+            needle = country.casefold()
+            matches = [
+                rows for key, rows in self.cities_by_country.items() if needle in key
+            ]
+            if len(matches) != 1:
+                candidates = sorted(
+                    (c for rows in matches for c in rows), key=_popularity_rank
+                )
+            else:
+                candidates = matches[0]
+
+        results = []
+        region_needle = region.casefold() if region else None
+        for city in candidates:
+            if region_needle and not _contains(city.region, region_needle):
+                continue
+            cost = city.avg_cost_per_day
+            if min_cost is not None and (cost is None or cost < min_cost):
+                continue
+            if max_cost is not None and (cost is None or cost > max_cost):
+                continue
+            results.append(city)
+            if len(results) >= limit:
+                break
+        return results
+
+    # --- Activities ---
+
+    def filter_activities(
+        self,
+        city_id: Optional[int] = None,
+        category: Optional[str] = None,
+        limit: int = 50,
+    ) -> List[ActivityRecord]:
+        if city_id:
+            candidates = self.activities_by_city.get(city_id, ())
+            if category:
+                candidates = [a for a in candidates if a.category == category]
+        elif category:
+            candidates = self.activities_by_category.get(category, ())
+        else:
+            candidates = self.activities
+        return list(candidates[:limit])
+
+
+def _table_stamp(db: Session) -> tuple:
+    return tuple(
+        db.execute(
+            select(
+                select(func.count(City.id)).scalar_subquery(),
+                select(func.max(City.id)).scalar_subquery(),
+                select(func.max(City.updated_at)).scalar_subquery(),
+                select(func.count(Activity.id)).scalar_subquery(),
+                select(func.max(Activity.id)).scalar_subquery(),
+                select(func.max(Activity.updated_at)).scalar_subquery(),
+            )
+        ).one()
+    )
+
+
+class CatalogCache:
+    def __init__(self, stamp_check_seconds: float):
+        self.stamp_check_seconds = stamp_check_seconds
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._snapshot_version = -1
+        self._version = 0
+        self._stamp: Optional[tuple] = None
+        self._stamp_checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, db: Session) -> CatalogSnapshot:
+        """The current snapshot, rebuilt first if it is stale"""
+        snapshot = self._snapshot
+        if snapshot is not None and self._snapshot_version == self._version:
+            if time.monotonic() - self._stamp_checked_at < self.stamp_check_seconds:
+                return snapshot
+            if self._check_stamp(db):
+                return snapshot
+        return self.rebuild(db)
+
+    def rebuild(self, db: Session) -> CatalogSnapshot:
+        with self._lock:
+            version = self._version
+            stamp = _table_stamp(db)
+            cities = [
+                CityRecord(*row)
+                for row in db.query(*(getattr(City, f) for f in CityRecord._fields))
+            ]
+            activities = [
+                ActivityRecord(*row)
+                for row in db.query(
+                    *(getattr(Activity, f) for f in ActivityRecord._fields)
+                )
+            ]
+            snapshot = CatalogSnapshot(cities, activities)
+            self._snapshot, self._snapshot_version = snapshot, version
+            self._stamp, self._stamp_checked_at = stamp, time.monotonic()
+            return snapshot
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._version += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._snapshot = None
+            self._stamp = None
+            self._version += 1
+
+    def _check_stamp(self, db: Session) -> bool:
+        stamp = _table_stamp(db)
+        self._stamp_checked_at = time.monotonic()
+        if stamp == self._stamp:
+            return True
+        response_cache.expire_stamps()
+        return False
+
+
+catalog = CatalogCache(stamp_check_seconds=settings.CATALOG_STAMP_CHECK_SECONDS)
+
+
+@response_cache.on_stamp_change
+def _invalidate_on_stamp_change(tag: str) -> None:
+    if tag in CATALOG_TAGS:
+        catalog.invalidate()
+
+
+@on_commit(City, Activity)
+def _invalidate_catalog(change: ModelChange) -> None:
+    catalog.invalidate()
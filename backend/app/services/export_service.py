@@ -0,0 +1,116 @@
+"""Streaming table exports for the admin console.
+
+Rows are read with ``yield_per`` (a server-side cursor where the driver has
+one) as plain column tuples, never ORM objects, and encoded one batch at a
+time, so memory stays flat however large the table is.
+"""
+
+import csv
+import enum
+import io
+import json
+from datetime import date, datetime
+from typing import Iterator
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.stop import Stop
+from app.models.trip import Trip
+from app.models.user import User
+
+
+class ExportTable(str, enum.Enum):
+    USERS = "users"
+    TRIPS = "trips"
+    STOPS = "stops"
+
+
+class ExportFormat(str, enum.Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+# Secrets (password hashes, verification and share tokens) are never exported
+EXPORT_COLUMNS = {
+    ExportTable.USERS: [
+        User.id,
+        User.email,
+        User.username,
+        User.full_name,
+        User.role,
+        User.is_verified,
+        User.created_at,
+        User.updated_at,
+    ],
+    ExportTable.TRIPS: [
+        Trip.id,
+        Trip.user_id,
+        Trip.name,
+        Trip.description,
+        Trip.start_date,
+        Trip.end_date,
+        Trip.cover_photo,
+        Trip.is_public,
+        Trip.created_at,
+        Trip.updated_at,
+    ],
+    ExportTable.STOPS: [
+        Stop.id,
+        Stop.trip_id,
+        Stop.city_id,
+        Stop.order,
+        Stop.start_date,
+        Stop.end_date,
+        Stop.notes,
+        Stop.transport_cost,
+        Stop.created_at,
+        Stop.updated_at,
+    ],
+}
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _csv_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return "" if value is None else value
+
+
+def export_rows(db: Session, table: ExportTable, fmt: ExportFormat) -> Iterator[str]:
+    """Yield the table as NDJSON lines or CSV, one chunk per fetched batch"""
+    columns = EXPORT_COLUMNS[table]
+    names = [column.key for column in columns]
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if fmt == ExportFormat.CSV:
+        writer.writerow(names)
+        yield buffer.getvalue()  # Header goes out before the query runs
+
+    result = db.execute(
+        select(*columns)
+        .order_by(columns[0])
+        .execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+    )
+    for batch in result.partitions():
+        buffer.seek(0)
+        buffer.truncate()
+        if fmt == ExportFormat.CSV:
+            writer.writerows([_csv_value(v) for v in row] for row in batch)
+        else:
+            for row in batch:
+                buffer.write(json.dumps(dict(zip(names, row)), default=_json_default))
+                buffer.write("\n")
+        yield buffer.getvalue()
@@ -0,0 +1,175 @@
+"""In-memory spatial index over City.latitude / City.longitude.
+
+Cities are bucketed into a fixed lat/lon grid. A radius query only visits
+the cells overlapping the circle's bounding box (wrapping across the
+antimeridian, widening to every longitude near the poles) and computes the
+haversine distance for the cities in those cells. k-nearest queries grow
+the radius until k cities fall inside it.
+
+Built from the City table on first use (or at startup) and kept current by
+commit hooks. Cities written by another process show up in the "cities"
+response-cache stamp, checked before a read at most every
+HTTP_CACHE_STAMP_CHECK_SECONDS; a change resets the index, rebuilt by that
+read.
+"""
+
+import math
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.models.city import City
+from app.models.events import ModelChange, on_commit
+from app.services.response_cache import response_cache
+from app.utils.geo import (
+    KM_PER_DEGREE,
+    MAX_DISTANCE_KM,
+    haversine_km,
+    longitude_span_deg,
+)
+
+Cell = Tuple[int, int]
+
+
+class GeoIndex:
+    def __init__(self, cell_degrees: float):
+        self.cell_degrees = cell_degrees
+        self.lon_cells = math.ceil(360 / cell_degrees)
+        self.ready = False
+        self._cells: Dict[Cell, Dict[int, Tuple[float, float]]] = {}
+        self._points: Dict[int, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def _cell(self, lat: float, lon: float) -> Cell:
+        lat_idx = math.floor((lat + 90) / self.cell_degrees)
+        lon_idx = math.floor((lon + 180) / self.cell_degrees) % self.lon_cells
+        return lat_idx, lon_idx
+
+    # --- Writes ---
+
+    def rebuild(self, db) -> None:
+        rows = (
+            db.query(City.id, City.latitude, City.longitude)
+            .filter(City.latitude.isnot(None), City.longitude.isnot(None))
+            .all()
+        )
+        cells, points = {}, {}
+        for city_id, lat, lon in rows:
+            points[city_id] = (lat, lon)
+            cells.setdefault(self._cell(lat, lon), {})[city_id] = (lat, lon)
+        with self._lock:
+            self._cells, self._points = cells, points
+            self.ready = True
+
+    def upsert(self, city_id: int, lat: Optional[float], lon: Optional[float]):
+        with self._lock:
+            self._remove(city_id)
+            if lat is None or lon is None:
+                return
+            self._points[city_id] = (lat, lon)
+            self._cells.setdefault(self._cell(lat, lon), {})[city_id] = (lat, lon)
+
+    def remove(self, city_id: int) -> None:
+        with self._lock:
+            self._remove(city_id)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._cells, self._points = {}, {}
+            self.ready = False
+
+    def _remove(self, city_id: int) -> None:
+        point = self._points.pop(city_id, None)
+        if point is None:
+            return
+        cell = self._cell(*point)
+        bucket = self._cells.get(cell)
+        if bucket is not None:
+            bucket.pop(city_id, None)
+            if not bucket:
+                del self._cells[cell]
+
+    # --- Reads ---
+
+    def _candidate_cells(self, lat: float, lon: float, radius_km: float):
+        cells = self._cells
+        dlat = radius_km / KM_PER_DEGREE
+        lat_lo = self._cell(max(lat - dlat, -90), 0)[0]
+        lat_hi = self._cell(min(lat + dlat, 90), 0)[0]
+        dlon = longitude_span_deg(lat, radius_km)
+        if dlon >= 180:
+            lon_indexes = range(self.lon_cells)
+        else:
+            lon_lo = math.floor((lon - dlon + 180) / self.cell_degrees)
+            lon_hi = math.floor((lon + dlon + 180) / self.cell_degrees)
+            lon_indexes = {i % self.lon_cells for i in range(lon_lo, lon_hi + 1)}
+
+        # A huge circle touches more grid cells than there are buckets
+        if (lat_hi - lat_lo + 1) * len(lon_indexes) > len(cells):
+            lon_set = set(lon_indexes)
+            return [
+                bucket
+                for (lat_idx, lon_idx), bucket in list(cells.items())
+                if lat_lo <= lat_idx <= lat_hi and lon_idx in lon_set
+            ]
+        return [
+            cells[(lat_idx, lon_idx)]
+            for lat_idx in range(lat_lo, lat_hi + 1)
+            for lon_idx in lon_indexes
+            if (lat_idx, lon_idx) in cells
+        ]
+
+    def within(self, lat: float, lon: float, radius_km: float):
+        """(distance_km, city_id) pairs within radius_km, nearest first"""
+        hits = []
+        for bucket in self._candidate_cells(lat, lon, radius_km):
+            for city_id, (clat, clon) in list(bucket.items()):
+                distance = haversine_km(lat, lon, clat, clon)
+                if distance <= radius_km:
+                    hits.append((distance, city_id))
+        hits.sort()
+        return hits
+
+    def nearest(
+        self, lat: float, lon: float, k: int, radius_km: Optional[float] = None
+    ) -> List[Tuple[float, int]]:
+        """The k nearest cities, optionally limited to radius_km"""
+        if radius_km is not None:
+            return self.within(lat, lon, radius_km)[:k]
+
+        # Grow the search circle until it holds k cities; everything outside
+        # it is further away than everything inside, so those are the k nearest
+        radius = self.cell_degrees * KM_PER_DEGREE
+        while True:
+            hits = self.within(lat, lon, radius)
+            if len(hits) >= k or radius >= MAX_DISTANCE_KM:
+                return hits[:k]
+            radius = min(radius * 2, MAX_DISTANCE_KM)
+
+
+geo_index = GeoIndex(cell_degrees=settings.GEO_INDEX_CELL_DEGREES)
+
+
+def ensure_geo_index(db) -> GeoIndex:
+    if response_cache.stamps_due():
+        response_cache.check_stamps()
+    if not geo_index.ready:
+        geo_index.rebuild(db)
+    return geo_index
+
+
+@on_commit(City)
+def _sync_geo_index(change: ModelChange) -> None:
+    if not geo_index.ready:
+        return  # The next rebuild picks the change up
+    values = change.values
+    if change.op == "delete":
+        geo_index.remove(values["id"])
+    elif change.op == "insert" or change.changed & {"latitude", "longitude"}:
+        geo_index.upsert(values["id"], values["latitude"], values["longitude"])
+
+
+@response_cache.on_stamp_change
+def _reset_on_stamp_change(tag: str) -> None:
+    if tag == "cities":
+        geo_index.reset()
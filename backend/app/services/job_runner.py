@@ -0,0 +1,403 @@
+"""In-process background jobs backed by the ``jobs`` table.
+
+The runner owns a thread with its own asyncio loop, so it doesn't depend
+on the server's loop. Job ids wait in an asyncio queue and a pool of worker
+coroutines hands each one to a thread pool, where its handler runs with a
+fresh DB session. A failing job is retried with exponential backoff up to
+``max_attempts``; ``JobError`` fails it for good straight away.
+
+Handlers register with ``@register_job(kind)`` and take a ``JobContext``
+plus their validated params as keyword arguments. A kind registered with
+``every="<SETTING>"`` also runs on its own every that many seconds: each
+sweep queues the current interval's run under a unique ``schedule_key``,
+so however many runners share the database, one of them runs it. A handler that commits in
+steps can ``ctx.checkpoint()`` in the same transaction as each step, and it
+finds the last checkpoint in ``ctx.result`` when it is retried.
+
+Several processes can run a runner on one database. A claimed job records
+its runner as ``owner``, and the runner refreshes the job's
+``heartbeat_at`` every JOB_HEARTBEAT_SECONDS while it runs (checkpoints
+refresh it too). Every runner sweeps the table every JOB_SWEEP_SECONDS:
+a running job whose heartbeat is older than JOB_STALE_AFTER_SECONDS lost
+its process and is queued again, as is a queued job nobody picked up. A
+runner that finds its job reclaimed (a checkpoint or the final write no
+longer matches its owner) drops its work instead of racing the new run.
+"""
+
+import asyncio
+import logging
+import os
+import secrets
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set, Type
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from sqlalchemy import func, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.job import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+
+class JobError(Exception):
+    """A permanent failure: the job fails without being retried"""
+
+
+class JobLost(Exception):
+    """The job was reclaimed by the sweep and belongs to another run now"""
+
+
+@dataclass(frozen=True)
+class JobSpec:
+    kind: str
+    fn: Callable
+    params_model: Optional[Type[BaseModel]] = None
+    admin_only: bool = False
+    every: Optional[str] = None  # Setting holding the period, in seconds
+
+
+_registry: Dict[str, JobSpec] = {}
+
+
+def register_job(
+    kind: str,
+    params_model: Optional[Type[BaseModel]] = None,
+    admin_only: bool = False,
+    every: Optional[str] = None,
+):
+    """Decorator registering `fn(ctx: JobContext, **params)` as a job kind"""
+
+    def decorator(fn: Callable):
+        _registry[kind] = JobSpec(kind, fn, params_model, admin_only, every)
+        return fn
+
+    return decorator
+
+
+def get_job_spec(kind: str) -> Optional[JobSpec]:
+    return _registry.get(kind)
+
+
+class JobContext:
+    def __init__(self, db: Session, job: Job):
+        self.db = db
+        self.job_id = job.id
+        self.user_id = job.user_id
+        self.owner = job.owner
+        self.result = job.result  # Last checkpoint, if this is a retry
+
+    def checkpoint(self, progress: float, result=None) -> None:
+        """Stage progress (and resumable state) in the handler's transaction.
+
+        Raises JobLost when the job was reclaimed, so the step is rolled back.
+        """
+        values = {
+            "progress": min(max(progress, 0.0), 1.0),
+            "heartbeat_at": datetime.utcnow(),
+        }
+        if result is not None:
+            values["result"] = jsonable_encoder(result)
+        staged = self.db.execute(
+            update(Job)
+            .where(Job.id == self.job_id, Job.owner == self.owner)
+            .values(**values)
+        )
+        if staged.rowcount != 1:
+            raise JobLost(f"Job {self.job_id} was reclaimed")
+        if result is not None:
+            self.result = values["result"]
+
+
+def backoff_seconds(attempts: int) -> float:
+    delay = settings.JOB_RETRY_BACKOFF_SECONDS * 2 ** max(attempts - 1, 0)
+    return min(delay, settings.JOB_RETRY_BACKOFF_MAX_SECONDS)
+
+
+class JobRunner:
+    def __init__(self, workers: int, session_factory=SessionLocal):
+        self.workers = workers
+        self.session_factory = session_factory
+        # Unique per runner, so a restarted process doesn't pass for the old one
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(4)}"
+        self._active: Set[int] = set()  # Jobs this runner is running
+        self._active_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    # --- Lifecycle ---
+
+    def start(self) -> None:
+        if self.running:
+            return
+        ready = threading.Event()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="job-worker"
+        )
+        self._thread = threading.Thread(
+            target=lambda: asyncio.run(self._main(ready)),
+            name="job-runner",
+            daemon=True,
+        )
+        self._thread.start()
+        ready.wait()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop taking jobs and wait for the running ones to finish"""
+        if not self.running:
+            return
+        self._loop.call_soon_threadsafe(self._stopping.set)
+        self._thread.join(timeout)
+        self._executor.shutdown(wait=True)
+        self._thread = self._loop = self._queue = None
+
+    def submit(self, job_id: int, delay: float = 0.0) -> None:
+        """Queue a committed job; without a running runner it waits in the table"""
+        loop = self._loop
+        if loop is not None:
+            loop.call_soon_threadsafe(self._schedule, job_id, delay)
+
+    # --- Event loop side ---
+
+    async def _main(self, ready: threading.Event) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._stopping = asyncio.Event()
+        ready.set()
+
+        await self._loop.run_in_executor(self._executor, self._sweep, True)
+        tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        tasks.append(
+            asyncio.create_task(self._every("JOB_HEARTBEAT_SECONDS", self._heartbeat))
+        )
+        tasks.append(asyncio.create_task(self._every("JOB_SWEEP_SECONDS", self._sweep)))
+        await self._stopping.wait()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _every(self, setting: str, fn: Callable[[], None]) -> None:
+        """Run `fn` in the pool, every `setting` seconds (read on each turn)"""
+        while True:
+            await asyncio.sleep(getattr(settings, setting))
+            try:
+                await self._loop.run_in_executor(self._executor, fn)
+            except Exception:
+                logger.exception("Job runner %s failed", fn.__name__)
+
+    def _schedule(self, job_id: int, delay: float) -> None:
+        if delay > 0:
+            self._loop.call_later(delay, self._queue.put_nowait, job_id)
+        else:
+            self._queue.put_nowait(job_id)
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            # Shielded so stop() lets a job in flight finish
+            await asyncio.shield(
+                self._loop.run_in_executor(self._executor, self._execute, job_id)
+            )
+
+    # --- Worker threads ---
+
+    def _sweep(self, startup: bool = False) -> None:
+        """Reclaim jobs whose runner died, queue the periodic jobs' current
+        runs and pick up the jobs left waiting.
+
+        At startup every queued job is taken; later sweeps only take those
+        queued for longer than JOB_STALE_AFTER_SECONDS, which no live runner
+        is about to run.
+        """
+        db = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            stale = now - timedelta(seconds=settings.JOB_STALE_AFTER_SECONDS)
+            # Jobs claimed before heartbeats existed only have started_at
+            last_seen = func.coalesce(Job.heartbeat_at, Job.started_at)
+            reclaimed = (
+                db.execute(
+                    update(Job)
+                    .where(Job.status == JobStatus.RUNNING.value, last_seen < stale)
+                    .values(status=JobStatus.QUEUED.value, owner=None, run_after=None)
+                    .returning(Job.id)
+                    .execution_options(synchronize_session=False)
+                )
+                .scalars()
+                .all()
+            )
+            db.commit()
+            if reclaimed:
+                logger.warning("Reclaimed %s abandoned job(s)", len(reclaimed))
+            scheduled = self._queue_periodic(db)
+            query = db.query(Job.id, Job.run_after).filter(
+                Job.status == JobStatus.QUEUED.value
+            )
+            if not startup:
+                # Rows reclaimed or queued just now go right away
+                waiting_since = func.coalesce(Job.run_after, Job.updated_at)
+                query = query.filter(
+                    or_(waiting_since < stale, Job.id.in_(reclaimed + scheduled))
+                )
+            pending = query.order_by(Job.id).all()
+        finally:
+            db.close()
+        for job_id, run_after in pending:
+            delay = (run_after - now).total_seconds() if run_after else 0.0
+            self._loop.call_soon_threadsafe(self._schedule, job_id, max(delay, 0.0))
+
+    def _queue_periodic(self, db: Session) -> List[int]:
+        """Queue the current run of every periodic kind, unless a runner did"""
+        queued = []
+        for spec in list(_registry.values()):
+            period = getattr(settings, spec.every, 0) if spec.every else 0
+            if period <= 0:
+                continue
+            key = f"{spec.kind}:{int(time.time() // period)}"
+            if db.query(Job.id).filter(Job.schedule_key == key).first():
+                continue
+            job = Job(kind=spec.kind, params={}, schedule_key=key)
+            db.add(job)
+            try:
+                db.commit()
+            except IntegrityError:
+                db.rollback()  # Another runner queued it first
+                continue
+            queued.append(job.id)
+        return queued
+
+    def _heartbeat(self) -> None:
+        """Show the jobs this runner is running are still alive"""
+        with self._active_lock:
+            job_ids = list(self._active)
+        if not job_ids:
+            return
+        db = self.session_factory()
+        try:
+            db.execute(
+                update(Job)
+                .where(Job.id.in_(job_ids), Job.owner == self.owner)
+                .values(heartbeat_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def _claim(self, db: Session, job_id: int) -> Optional[Job]:
+        # Conditional UPDATE so a job is never run twice at once
+        now = datetime.utcnow()
+        claimed = db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == JobStatus.QUEUED.value)
+            .values(
+                status=JobStatus.RUNNING.value,
+                attempts=Job.attempts + 1,
+                started_at=now,
+                heartbeat_at=now,
+                owner=self.owner,
+            )
+        )
+        db.commit()
+        if claimed.rowcount != 1:
+            return None
+        return db.get(Job, job_id)
+
+    def _execute(self, job_id: int) -> None:
+        db = self.session_factory()
+        try:
+            job = self._claim(db, job_id)
+            if job is None:
+                return
+            with self._active_lock:
+                self._active.add(job_id)
+            spec = _registry.get(job.kind)
+            try:
+                if spec is None:
+                    raise JobError(f"Unknown job kind '{job.kind}'")
+                result = spec.fn(JobContext(db, job), **(job.params or {}))
+            except JobLost:
+                db.rollback()
+                logger.warning("Job %s was reclaimed, dropping this run", job_id)
+                return
+            except Exception as exc:
+                db.rollback()
+                self._failed(db, job_id, exc)
+                return
+
+            self._finish(
+                db,
+                job_id,
+                status=JobStatus.SUCCEEDED.value,
+                result=jsonable_encoder(result),
+                progress=1.0,
+                error=None,
+                finished_at=datetime.utcnow(),
+            )
+        except Exception:
+            logger.exception("Job %s could not be run", job_id)
+        finally:
+            with self._active_lock:
+                self._active.discard(job_id)
+            db.close()
+
+    def _finish(self, db: Session, job_id: int, **values) -> bool:
+        """Write a run's outcome, unless the job was reclaimed meanwhile"""
+        written = db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.owner == self.owner)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if written.rowcount != 1:
+            db.rollback()
+            logger.warning("Job %s was reclaimed, dropping this run", job_id)
+            return False
+        db.commit()
+        return True
+
+    def _failed(self, db: Session, job_id: int, exc: Exception) -> None:
+        job = db.get(Job, job_id)
+        kind, attempts = job.kind, job.attempts
+        error = str(exc) or type(exc).__name__
+        if isinstance(exc, JobError) or attempts >= job.max_attempts:
+            if self._finish(
+                db,
+                job_id,
+                status=JobStatus.FAILED.value,
+                error=error,
+                finished_at=datetime.utcnow(),
+            ):
+                logger.warning("Job %s (%s) failed: %s", job_id, kind, error)
+            return
+
+        delay = backoff_seconds(attempts)
+        if self._finish(
+            db,
+            job_id,
+            status=JobStatus.QUEUED.value,
+            error=error,
+            owner=None,
+            run_after=datetime.utcnow() + timedelta(seconds=delay),
+        ):
+            logger.info("Job %s (%s) retrying in %.1fs", job_id, kind, delay)
+            self._loop.call_soon_threadsafe(self._schedule, job_id, delay)
+
+
+job_runner = JobRunner(workers=settings.JOB_WORKERS)
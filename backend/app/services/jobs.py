@@ -0,0 +1,66 @@
+"""Built-in background job kinds, run by app.services.job_runner"""
+
+import importlib
+
+from app.models.trip import Trip
+from app.schemas.job import CopyTripJobParams, TripBudgetJobParams
+from app.services.analytics_service import reconcile_rollups
+from app.services.budget_service import calculate_trip_budget
+from app.services.job_runner import JobContext, JobError, register_job
+from app.services.trip_service import clone_trip
+
+# Copies committed per step; a retry resumes after the last committed step
+COPY_BATCH_SIZE = 10
+
+
+@register_job("copy_trip", params_model=CopyTripJobParams)
+def copy_trip_job(ctx: JobContext, trip_id: int, count: int = 1):
+    """Clone a trip `count` times, like POST /trips/{trip_id}/copies"""
+    trip = ctx.db.query(Trip).filter(Trip.id == trip_id).first()
+    if not trip:
+        raise JobError("Trip not found")
+    if not trip.is_public and trip.user_id != ctx.user_id:
+        raise JobError("Cannot copy private trip")
+
+    trip_ids = list((ctx.result or {}).get("trip_ids", []))
+    while len(trip_ids) < count:
+        batch = min(COPY_BATCH_SIZE, count - len(trip_ids))
+        trip_ids += [t.id for t in clone_trip(ctx.db, trip, ctx.user_id, batch)]
+        ctx.checkpoint(len(trip_ids) / count, {"trip_ids": trip_ids})
+        ctx.db.commit()
+    return {"trip_ids": trip_ids}
+
+
+@register_job("trip_budget", params_model=TripBudgetJobParams)
+def trip_budget_job(ctx: JobContext, trip_id: int):
+    """Budget breakdown of one of the user's trips, like GET /budget/{trip_id}"""
+    trip = (
+        ctx.db.query(Trip)
+        .filter(Trip.id == trip_id, Trip.user_id == ctx.user_id)
+        .first()
+    )
+    if not trip:
+        raise JobError("Trip not found")
+    return calculate_trip_budget(ctx.db, trip_id)
+
+
+def _seed(module_name: str):
+    def run(ctx: JobContext):
+        # The seed scripts are command-line tools next to the app package;
+        # import them only when a seeding job actually runs
+        seed = getattr(importlib.import_module(module_name), module_name)
+        return {"added": seed(ctx.db)}
+
+    return run
+
+
+register_job("seed_cities", admin_only=True)(_seed("seed_cities"))
+register_job("seed_activities", admin_only=True)(_seed("seed_activities"))
+
+
+@register_job(
+    "analytics_reconcile", admin_only=True, every="ANALYTICS_RECONCILE_SECONDS"
+)
+def analytics_reconcile_job(ctx: JobContext):
+    """Rebuild the analytics rollups, like POST /admin/analytics/reconcile"""
+    reconcile_rollups(ctx.db)
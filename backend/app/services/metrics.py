@@ -0,0 +1,329 @@
+"""Process metrics in the Prometheus text format, served by GET /metrics.
+
+A small registry of counters, gauges and histograms with labels, enough for
+the exposition format without a client library:
+
+- HTTP traffic per route template (``/trips/{trip_id}``, never the raw
+  path), recorded by app.middleware.metrics: requests by status, latency
+  histograms and requests in flight, plus the response cache's hits;
+- the DB connection pool of an engine passed to ``instrument_pool``:
+  checkouts, time spent waiting for a connection, timeouts, and its
+  size/checked-out/overflow at scrape time;
+- the password hashing pool behind /auth/login, from
+  ``password_hasher.stats()`` at scrape time.
+
+Metrics are per process: with several workers, scrape each one.
+"""
+
+import bisect
+import math
+import threading
+import time
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy import exc as sa_exc
+
+LabelValues = Tuple[str, ...]
+
+# Seconds; Prometheus' defaults, plus finer steps below 5 ms
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Sequence[str]) -> LabelValues:
+        if len(labels) != len(self.label_names):
+            raise ValueError(f"{self.name} takes labels {self.label_names}")
+        return tuple(str(v) for v in labels)
+
+    def header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labels=()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set_total(self, *labels: str, value: float) -> None:
+        """Mirror a count that is kept elsewhere"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, *labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values = {}
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(v)}"
+            for key, v in values
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels: str, value: float) -> None:
+        self.set_total(*labels, value=value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [count per bucket (non-cumulative) + overflow, sum]
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, *labels: str, value: float) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)  # First bound >= value
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def count(self, *labels: str) -> int:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return sum(series[0]) if series else 0
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series = {}
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted(
+                (key, (list(counts), total[0]))
+                for key, (counts, total) in self._series.items()
+            )
+        lines = self.header()
+        names = self.label_names + ("le",)
+        for key, (counts, total) in series:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                labels = _format_labels(names, key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labels=()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name, documentation, labels=()) -> Gauge:
+        return self.register(Gauge(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), **kwargs) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, **kwargs))
+
+    def on_collect(self, fn: Callable[[], None]) -> Callable[[], None]:
+        """Run `fn` before every render, to refresh gauges read from elsewhere"""
+        self._collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        for collect in self._collectors:
+            collect()
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        for metric in self._metrics:
+            metric.reset()
+
+
+registry = MetricsRegistry()
+
+# --- HTTP (app.middleware.metrics) ---
+
+http_requests = registry.counter(
+    "http_requests_total",
+    "HTTP requests by route template and status code",
+    ("method", "route", "status"),
+)
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds",
+    "Time from request to the end of the response body",
+    ("method", "route"),
+)
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight",
+    "HTTP requests being handled",
+    ("method", "route"),
+)
+
+# --- DB connection pool ---
+
+db_pool_checkouts = registry.counter(
+    "db_pool_checkouts_total", "Connections checked out of the pool"
+)
+db_pool_checkout_wait = registry.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time to get a connection from the pool, opening one included",
+)
+db_pool_timeouts = registry.counter(
+    "db_pool_timeouts_total", "Checkouts that gave up after DB_POOL_TIMEOUT"
+)
+db_pool_connections = registry.gauge(
+    "db_pool_connections",
+    "Pool connections by state (checked_out, idle, overflow) and its size",
+    ("state",),
+)
+
+# --- Password hashing pool (/auth/login, /auth/register) ---
+
+hashing_pending = registry.gauge(
+    "hashing_pool_pending", "Password hashes queued or running"
+)
+hashing_limit = registry.gauge(
+    "hashing_pool_limit", "Hashing pool workers and queue bound", ("kind",)
+)
+hashing_rejected = registry.counter(
+    "hashing_pool_rejected_total", "Hashes refused with a 429 as the queue was full"
+)
+
+
+# --- Response cache (app.middleware.http_cache) ---
+
+http_cache_lookups = registry.counter(
+    "http_cache_lookups_total",
+    "Cached GET routes answered from the response cache (hit) or not (miss)",
+    ("result",),
+)
+http_cache_entries = registry.gauge(
+    "http_cache_entries", "Responses held in the response cache"
+)
+
+
+def record_http_cache_stats(stats: dict) -> None:
+    http_cache_lookups.set_total("hit", value=stats["hits"])
+    http_cache_lookups.set_total("miss", value=stats["misses"])
+    http_cache_entries.set(value=stats["size"])
+
+
+def record_hashing_stats(stats: dict) -> None:
+    hashing_pending.set(value=stats["pending"])
+    hashing_limit.set("workers", value=stats["workers"])
+    hashing_limit.set("max_pending", value=stats["max_pending"])
+    hashing_rejected.set_total(value=stats["rejected"])
+
+
+def _time_checkouts(pool) -> None:
+    do_get = pool._do_get
+
+    def timed_do_get():
+        started = time.perf_counter()
+        try:
+            return do_get()
+        except sa_exc.TimeoutError:
+            db_pool_timeouts.inc()
+            raise
+        finally:
+            db_pool_checkout_wait.observe(value=time.perf_counter() - started)
+
+    pool._do_get = timed_do_get
+
+
+def instrument_pool(engine) -> None:
+    """Count and time `engine`'s pool checkouts, and report it at scrape time"""
+    _time_checkouts(engine.pool)
+
+    @event.listens_for(engine, "checkout")
+    def _count_checkout(dbapi_connection, connection_record, connection_proxy):
+        db_pool_checkouts.inc()
+
+    @event.listens_for(engine, "engine_disposed")
+    def _retime_new_pool(engine_):
+        _time_checkouts(engine_.pool)  # dispose() swaps in a fresh pool
+
+    @registry.on_collect
+    def _pool_state():
+        pool = engine.pool
+        # Only QueuePool keeps counts; the SQLite memory pools have none
+        if not hasattr(pool, "checkedout"):
+            return
+        db_pool_connections.set("checked_out", value=pool.checkedout())
+        db_pool_connections.set("idle", value=pool.checkedin())
+        db_pool_connections.set("overflow", value=max(pool.overflow(), 0))
+        db_pool_connections.set("size", value=pool.size())
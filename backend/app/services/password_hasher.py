@@ -0,0 +1,84 @@
+"""Password hashing off the shared threadpool.
+
+argon2 is deliberately slow (hundreds of ms of CPU and 64 MiB per hash). Run
+on the default threadpool, a burst of logins takes every thread that sync
+routes need. Here hashing gets its own small pool with a bounded backlog.
+Once HASHING_MAX_PENDING hashes are queued or running, new ones are refused
+with ``HashingBusy`` straight away, and the auth routes answer 429.
+argon2-cffi releases the GIL while hashing, so a thread pool gives real
+parallelism.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from app.config import settings
+from app.utils.auth import get_password_hash, verify_and_update_password
+
+
+class HashingBusy(Exception):
+    """The hashing backlog is full"""
+
+
+class PasswordHasher:
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._rejected = 0
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    async def verify_and_update(
+        self, password: str, hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        return await self._run(verify_and_update_password, password, hashed_password)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "pending": self._pending,
+                "max_pending": self.max_pending,
+                "rejected": self._rejected,
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise HashingBusy()
+            self._pending += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="password-hash"
+                )
+            executor = self._executor
+        try:
+            future = executor.submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        # Released when the hash finishes, even if the request was cancelled
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, _future=None) -> None:
+        with self._lock:
+            self._pending -= 1
+
+
+password_hasher = PasswordHasher(
+    workers=settings.HASHING_WORKERS, max_pending=settings.HASHING_MAX_PENDING
+)
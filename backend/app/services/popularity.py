@@ -0,0 +1,186 @@
+"""Live city popularity from the stops users actually plan.
+
+Every stop adds ``2 ** (-age_days / half_life)`` to its city's score, so a
+stop planned today counts twice as much as one planned a half-life ago.
+Scores are kept relative to a fixed epoch day (a stop on ``day`` adds
+``2 ** ((day - epoch) / half_life)``): time decays every score by the same
+factor, so the ranking never needs re-decaying, and removing a stop takes
+off exactly what it added.
+
+The top ``top_k`` cities are kept ready for GET /cities/popular. A change
+only re-ranks when it touches a city that is, or could enter, the top set.
+
+Built from the ``analytics_city_visits_daily`` rollup on first use (or by
+the startup warm-up) and on every analytics reconcile, and kept current by
+Stop commit hooks between. The rollup is the "popularity" response-cache
+stamp: local stop changes refresh it, and a change made by another worker
+resets the ranking, rebuilt on the next read.
+"""
+
+import heapq
+import threading
+from collections import Counter
+from datetime import date, datetime
+from itertools import islice
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.analytics import CityVisitsDaily
+from app.models.events import ModelChange, call_after_commit, on_commit
+from app.models.stop import Stop
+from app.services.catalog import CatalogSnapshot, CityRecord
+from app.services.response_cache import response_cache
+
+POPULARITY_TAG = "popularity"
+
+
+def _today() -> date:
+    return datetime.utcnow().date()
+
+
+class CityPopularity:
+    def __init__(self, half_life_days: float, top_k: int):
+        self.half_life_days = half_life_days
+        self.top_k = top_k
+        self.ready = False
+        self._epoch = _today()
+        self._scores: Dict[int, float] = {}  # city_id -> score at the epoch
+        self._counts: Counter = Counter()  # city_id -> live stops
+        self._top: List[int] = []
+        self._lock = threading.Lock()
+
+    # --- Reads ---
+
+    def top(self, k: int) -> List[int]:
+        """Ids of the `k` (at most top_k) most popular cities with stops"""
+        return self._top[:k]
+
+    def score(self, city_id: int, today: Optional[date] = None) -> float:
+        """Decayed number of stops in a city, as of `today`"""
+        raw = self._scores.get(city_id, 0.0)
+        return raw / self._weight(today or _today())
+
+    # --- Writes ---
+
+    def rebuild(self, db: Session) -> None:
+        epoch = _today()
+        scores: Dict[int, float] = {}
+        counts: Counter = Counter()
+        rows = db.query(
+            CityVisitsDaily.city_id, CityVisitsDaily.day, CityVisitsDaily.visits
+        ).filter(CityVisitsDaily.visits != 0)
+        for city_id, day, visits in rows:
+            counts[city_id] += visits
+            weight = 2.0 ** ((day - epoch).days / self.half_life_days)
+            scores[city_id] = scores.get(city_id, 0.0) + visits * weight
+        for city_id in [c for c, n in counts.items() if n <= 0]:
+            del counts[city_id]
+            scores.pop(city_id, None)
+
+        with self._lock:
+            self._epoch, self._scores, self._counts = epoch, scores, counts
+            changed = self._rerank()
+            self.ready = True
+        if changed:
+            response_cache.invalidate(POPULARITY_TAG)
+
+    def add_visits(self, visits: Mapping[Tuple[int, date], int]) -> None:
+        """Apply stop count deltas keyed by (city_id, day the stop was made)"""
+        with self._lock:
+            floor = self._floor()
+            rerank = False
+            for (city_id, day), n in visits.items():
+                if not n:
+                    continue
+                count = self._counts[city_id] + n
+                if count <= 0:
+                    # Drop the float residue along with the city
+                    del self._counts[city_id]
+                    self._scores.pop(city_id, None)
+                else:
+                    self._counts[city_id] = count
+                    score = self._scores.get(city_id, 0.0) + n * self._weight(day)
+                    self._scores[city_id] = score
+                rerank = rerank or city_id in self._top or self._beats(city_id, floor)
+            if rerank:
+                self._rerank()
+        if any(visits.values()):
+            # The same commit moved the rollup the ETag is stamped with
+            response_cache.invalidate(POPULARITY_TAG)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._epoch = _today()
+            self._scores, self._counts, self._top = {}, Counter(), []
+            self.ready = False
+
+    # --- Internals (callers hold the lock) ---
+
+    def _weight(self, day: date) -> float:
+        return 2.0 ** ((day - self._epoch).days / self.half_life_days)
+
+    def _key(self, city_id: int):
+        return (self._scores[city_id], -city_id)
+
+    def _floor(self):
+        """Rank key a city must beat to enter a full top set"""
+        if len(self._top) < self.top_k:
+            return None
+        return self._key(self._top[-1])
+
+    def _beats(self, city_id: int, floor) -> bool:
+        if city_id not in self._scores:
+            return False
+        return floor is None or self._key(city_id) > floor
+
+    def _rerank(self) -> bool:
+        top = heapq.nlargest(self.top_k, self._scores, key=self._key)
+        changed, self._top = top != self._top, top
+        return changed
+
+
+popularity = CityPopularity(
+    half_life_days=settings.POPULARITY_HALF_LIFE_DAYS,
+    top_k=settings.POPULARITY_TOP_K,
+)
+
+
+def ensure_popularity(db: Session) -> CityPopularity:
+    if not popularity.ready:
+        popularity.rebuild(db)
+    return popularity
+
+
+def popular_cities(snapshot: CatalogSnapshot, limit: int) -> List[CityRecord]:
+    """Cities ranked by planned stops, then by their static popularity_score"""
+    cities = [snapshot.get_city(city_id) for city_id in popularity.top(limit)]
+    cities = [city for city in cities if city is not None]
+    seen = {city.id for city in cities}
+    rest = (city for city in snapshot.popular if city.id not in seen)
+    cities.extend(islice(rest, limit - len(cities)))
+    return cities
+
+
+def stage_city_visits(session: Session, city_counts: Mapping[int, int]) -> None:
+    """Count stops inserted with Core statements once the session commits"""
+    today = _today()
+    visits = {(city_id, today): n for city_id, n in city_counts.items()}
+    call_after_commit(session, lambda: popularity.add_visits(visits))
+
+
+@on_commit(Stop)
+def _count_stop(change: ModelChange) -> None:
+    if change.op == "update":
+        return  # A stop's city and creation day don't change
+    values = change.values
+    day = (values["created_at"] or datetime.utcnow()).date()
+    sign = 1 if change.op == "insert" else -1
+    popularity.add_visits({(values["city_id"], day): sign})
+
+
+@response_cache.on_stamp_change
+def _reset_on_stamp_change(tag: str) -> None:
+    if tag == POPULARITY_TAG:
+        popularity.reset()
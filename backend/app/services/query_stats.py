@@ -0,0 +1,142 @@
+"""Per-request SQL statistics: statement count, DB time and N+1 suspects.
+
+``instrument_queries(target)`` listens to the cursor events of an engine
+(or of every engine, with the ``Engine`` class) and times each statement:
+
+- a statement slower than SLOW_QUERY_MS is logged, from any thread;
+- while a ``track_queries()`` block is open in the current context (every
+  request, see app.middleware.query_stats) the statement is added to its
+  ``QueryStats``.
+
+Statements are grouped by shape: the SQL with literals and expanded IN
+lists collapsed, so the same query for another row counts as a repeat. A
+shape run N_PLUS_ONE_THRESHOLD times in one request is the signature of a
+per-row loop or of lazy loads during serialization.
+
+``capture_queries(engine)`` records everything run on one engine, from any
+thread, for the tests' query budgets.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """`statement` with its literals replaced by ? and IN lists collapsed"""
+    shape = _STRING.sub("?", statement)
+    shape = _NUMBER.sub("?", shape)
+    shape = _SPACE.sub(" ", shape).strip()
+    return _IN_LIST.sub("(?)", shape)
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0  # Seconds
+        self.shapes: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, duration: float) -> None:
+        shape = statement_shape(statement)
+        with self._lock:
+            self.count += 1
+            self.duration += duration
+            self.shapes[shape] += 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Shapes run at least `threshold` times, most repeated first"""
+        with self._lock:
+            return [(s, n) for s, n in self.shapes.most_common() if n >= threshold]
+
+    def summary(self) -> str:
+        lines = [f"{self.count} queries in {self.duration * 1000:.1f} ms"]
+        lines.extend(f"  {n:4d} x {shape}" for shape, n in self.repeated(1))
+        return "\n".join(lines)
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Collect the statements run from this context (and threads it starts
+    through run_in_threadpool, which copy it) into a new QueryStats"""
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _stop_timer(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["query_started"].pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, duration)
+    slow_ms = settings.SLOW_QUERY_MS
+    if slow_ms > 0 and duration * 1000 >= slow_ms:
+        logger.warning(
+            "Slow query (%.1f ms): %s", duration * 1000, _SPACE.sub(" ", statement)
+        )
+
+
+def _discard_timer(context):
+    # A statement that raised never reaches after_cursor_execute; an error
+    # without an execution context (connecting) never started a timer
+    if context.connection is None or context.execution_context is None:
+        return
+    started = context.connection.info.get("query_started")
+    if started:
+        started.pop()
+
+
+def instrument_queries(target) -> None:
+    """Time the statements of `target`, an engine or the Engine class"""
+    if event.contains(target, "before_cursor_execute", _start_timer):
+        return
+    event.listen(target, "before_cursor_execute", _start_timer)
+    event.listen(target, "after_cursor_execute", _stop_timer)
+    event.listen(target, "handle_error", _discard_timer)
+
+
+@contextmanager
+def capture_queries(engine) -> Iterator[QueryStats]:
+    """Record every statement run on `engine` while the block is open"""
+    stats = QueryStats()
+    started = threading.local()
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        started.at = time.perf_counter()
+
+    def after(conn, cursor, statement, parameters, context, executemany):
+        stats.record(statement, time.perf_counter() - started.at)
+
+    event.listen(engine, "before_cursor_execute", before)
+    event.listen(engine, "after_cursor_execute", after)
+    try:
+        yield stats
+    finally:
+        event.remove(engine, "before_cursor_execute", before)
+        event.remove(engine, "after_cursor_execute", after)
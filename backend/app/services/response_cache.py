@@ -0,0 +1,228 @@
+"""Table stamps and a bounded cache of rendered GET responses.
+
+Every cached route depends on one or more tags ("cities", "activities",
+"popularity", "trips"). Each tag has a stamp read from its table: row
+count, max id and max updated_at (for "popularity", the row count and
+visit total of the city visits rollup). A route's ETag hashes the stamps
+of its tags with the current HTTP_CACHE_TTL_SECONDS time bucket, so every
+worker computes the same ETag for the same rows, and a restart keeps them.
+
+Stamps are re-read at most every HTTP_CACHE_STAMP_CHECK_SECONDS, and on
+the next request after a local commit (commit hooks call ``invalidate``,
+which also drops the tag's cached responses). A re-read that finds a tag
+changed by someone else (a seed script, another worker) calls the
+``on_stamp_change`` listeners, so in-memory indexes built from that table
+are rebuilt. Writes from elsewhere that land between a local commit and
+the re-read it triggers are only reported to the listeners with the
+table's next change; the ETags and cached responses still follow them.
+
+Used by app.middleware.http_cache.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.activity import Activity
+from app.models.analytics import CityVisitsDaily
+from app.models.city import City
+from app.models.events import ModelChange, on_commit
+from app.models.trip import Trip
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    etag: str
+    tags: Tuple[str, ...]
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    expires_at: float
+
+
+def _tag_stamps(db) -> Dict[str, tuple]:
+    """A cheap fingerprint of every tagged table, in one query"""
+    columns = {
+        "cities": (func.count(City.id), func.max(City.id), func.max(City.updated_at)),
+        "activities": (
+            func.count(Activity.id),
+            func.max(Activity.id),
+            func.max(Activity.updated_at),
+        ),
+        "popularity": (
+            func.count(CityVisitsDaily.city_id),
+            func.sum(CityVisitsDaily.visits),
+        ),
+        "trips": (func.count(Trip.id), func.max(Trip.id), func.max(Trip.updated_at)),
+    }
+    row = db.execute(
+        select(
+            *(
+                select(column).scalar_subquery()
+                for stamp in columns.values()
+                for column in stamp
+            )
+        )
+    ).one()
+    stamps, values = {}, iter(row)
+    for tag, stamp in columns.items():
+        stamps[tag] = tuple(next(values) for _ in stamp)
+    return stamps
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        max_entries: int,
+        max_body_bytes: int,
+        ttl_seconds: float,
+        stamp_check_seconds: float,
+        session_factory=SessionLocal,
+    ):
+        self.max_entries = max_entries
+        self.max_body_bytes = max_body_bytes
+        self.ttl_seconds = ttl_seconds
+        self.stamp_check_seconds = stamp_check_seconds
+        self.session_factory = session_factory
+        self._stamps: Optional[Dict[str, tuple]] = None
+        self._stamp_listeners: List[Callable[[str], None]] = []
+        self._stamps_checked_at: Optional[float] = None
+        self._local_changes: Set[str] = set()
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def etag(self, key: str, tags: Iterable[str]) -> str:
+        stamps = self._stamps or {}
+        versions = ",".join(f"{t}:{stamps.get(t)}" for t in tags)
+        bucket = int(time.time() // self.ttl_seconds) if self.ttl_seconds > 0 else 0
+        digest = hashlib.sha1(f"{bucket}|{versions}|{key}".encode()).hexdigest()
+        return f'"{digest[:32]}"'
+
+    def stamps_due(self) -> bool:
+        checked_at = self._stamps_checked_at
+        return (
+            checked_at is None
+            or time.monotonic() - checked_at >= self.stamp_check_seconds
+        )
+
+    def check_stamps(self) -> None:
+        """Re-read the stamps, dropping the cached responses of the tags that
+        changed and telling the listeners about changes made elsewhere"""
+        with self._lock:
+            self._stamps_checked_at = time.monotonic()
+            local, self._local_changes = self._local_changes, set()
+        db = self.session_factory()
+        try:
+            stamps = _tag_stamps(db)
+        except SQLAlchemyError:
+            logger.warning("Response cache stamp check failed", exc_info=True)
+            return
+        finally:
+            db.close()
+        with self._lock:
+            previous, self._stamps = self._stamps, stamps
+        if previous is None:
+            return
+        for tag, stamp in stamps.items():
+            if previous.get(tag) == stamp:
+                continue
+            self._drop(tag)
+            if tag not in local:
+                for listener in self._stamp_listeners:
+                    listener(tag)
+
+    def on_stamp_change(self, fn: Callable[[str], None]) -> Callable[[str], None]:
+        """Call `fn(tag)` when a check finds a tag's table changed elsewhere,
+        so data the routes read from memory is rebuilt under the new ETag"""
+        self._stamp_listeners.append(fn)
+        return fn
+
+    def get(self, key: str, etag: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if (
+                entry is None
+                or entry.etag != etag
+                or entry.expires_at < time.monotonic()
+            ):
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry
+
+    def put(self, key: str, entry: CachedResponse) -> None:
+        if len(entry.body) > self.max_body_bytes:
+            return
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def new_entry(self, etag, tags, status, headers, body) -> CachedResponse:
+        expires_at = time.monotonic() + self.ttl_seconds
+        return CachedResponse(etag, tuple(tags), status, headers, body, expires_at)
+
+    def invalidate(self, tag: str) -> None:
+        """This process changed `tag`'s table: drop its responses and re-read
+        the stamps on the next request"""
+        with self._lock:
+            self._local_changes.add(tag)
+            self._stamps_checked_at = None
+        self._drop(tag)
+
+    def expire_stamps(self) -> None:
+        """Re-read the stamps on the next request"""
+        self._stamps_checked_at = None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._stamps = None
+            self._stamps_checked_at = None
+            self._local_changes = set()
+
+    def _drop(self, tag: str) -> None:
+        with self._lock:
+            stale = [k for k, e in self._entries.items() if tag in e.tags]
+            for key in stale:
+                del self._entries[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+            }
+
+
+response_cache = ResponseCache(
+    max_entries=settings.HTTP_CACHE_MAX_ENTRIES,
+    max_body_bytes=settings.HTTP_CACHE_MAX_BODY_BYTES,
+    ttl_seconds=settings.HTTP_CACHE_TTL_SECONDS,
+    stamp_check_seconds=settings.HTTP_CACHE_STAMP_CHECK_SECONDS,
+)
+
+# "popularity" is refreshed by app.services.popularity as stops change
+_MODEL_TAGS = {City: "cities", Activity: "activities", Trip: "trips"}
+
+
+@on_commit(*_MODEL_TAGS)
+def _refresh_stamp(change: ModelChange) -> None:
+    response_cache.invalidate(_MODEL_TAGS[change.model])
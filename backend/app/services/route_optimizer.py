@@ -0,0 +1,145 @@
+"""Stop ordering that minimises the haversine length of a trip's route.
+
+The route is an open path (no return leg). It is built by nearest-neighbour
+construction over a precomputed distance matrix, then improved with 2-opt
+(reverse a segment) and Or-opt (move a run of 1-3 stops, either way round)
+until neither finds a shorter path. The current order is improved the same
+way and the better of the two is kept, so the result is never longer than
+what the user already has.
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+from app.utils.geo import haversine_km
+
+Point = Tuple[float, float]
+
+_EPSILON = 1e-9
+_MAX_PASSES = 100
+
+
+def distance_matrix(points: Sequence[Point]) -> List[List[float]]:
+    n = len(points)
+    matrix = [[0.0] * n for _ in range(n)]
+    for i in range(n):
+        for j in range(i + 1, n):
+            matrix[i][j] = matrix[j][i] = haversine_km(*points[i], *points[j])
+    return matrix
+
+
+def route_length(route: Sequence[int], matrix: List[List[float]]) -> float:
+    return sum(matrix[a][b] for a, b in zip(route, route[1:]))
+
+
+class _Path:
+    """Local search over an open path with optionally pinned endpoints.
+
+    Routes are padded with a virtual node at both ends that is zero distance
+    from everything, so the open ends need no special casing: a move that
+    touches the padding just doesn't pay for that edge.
+    """
+
+    def __init__(self, matrix, fix_start: bool, fix_end: bool):
+        n = len(matrix)
+        self.n = n
+        self.pad = n
+        self.matrix = [row + [0.0] for row in matrix] + [[0.0] * (n + 1)]
+        # Neighbours of every node, nearest first
+        self.neighbours = [
+            sorted(range(n), key=lambda j, row=row: (row[j], j)) for row in matrix
+        ]
+        # Padded positions a move may touch: 1..n unless an endpoint is pinned
+        self.lo = 2 if fix_start else 1
+        self.hi = n - 1 if fix_end else n
+
+    def nearest_neighbour(self, start: int, end: Optional[int]) -> List[int]:
+        route = [start]
+        visited = {start}
+        if end is not None:
+            visited.add(end)
+        while len(visited) < self.n:
+            nxt = next(j for j in self.neighbours[route[-1]] if j not in visited)
+            route.append(nxt)
+            visited.add(nxt)
+        if end is not None and end != start:
+            route.append(end)
+        return route
+
+    def two_opt(self, r: List[int]) -> bool:
+        d = self.matrix
+        improved = False
+        for i in range(self.lo, self.hi):
+            for j in range(i + 1, self.hi + 1):
+                a, b, c, e = r[i - 1], r[i], r[j], r[j + 1]
+                if d[a][c] + d[b][e] - d[a][b] - d[c][e] < -_EPSILON:
+                    r[i : j + 1] = r[j : i - 1 : -1]
+                    improved = True
+        return improved
+
+    def or_opt(self, r: List[int]) -> bool:
+        d = self.matrix
+        for seg_len in (1, 2, 3):
+            for i in range(self.lo, self.hi - seg_len + 2):
+                last = i + seg_len - 1
+                first_node, last_node = r[i], r[last]
+                before, after = r[i - 1], r[last + 1]
+                removed = d[before][first_node] + d[last_node][after]
+                removed -= d[before][after]
+                # Re-insert between r[k] and r[k + 1], outside the segment
+                for k in range(self.lo - 1, self.hi + 1):
+                    if i - 1 <= k <= last:
+                        continue
+                    left, right = r[k], r[k + 1]
+                    base = removed + d[left][right]
+                    forward = d[left][first_node] + d[last_node][right]
+                    backward = d[left][last_node] + d[first_node][right]
+                    if min(forward, backward) - base < -_EPSILON:
+                        segment = r[i : last + 1]
+                        if backward < forward:
+                            segment.reverse()
+                        rest = r[:i] + r[last + 1 :]
+                        at = k + 1 if k < i else k + 1 - seg_len
+                        r[:] = rest[:at] + segment + rest[at:]
+                        return True
+        return False
+
+    def improve(self, route: List[int]) -> List[int]:
+        r = [self.pad, *route, self.pad]
+        for _ in range(_MAX_PASSES):
+            while self.two_opt(r):
+                pass
+            if not self.or_opt(r):
+                break
+        return r[1:-1]
+
+
+def optimize_route(
+    points: Sequence[Point], fix_start: bool = False, fix_end: bool = False
+) -> Tuple[List[int], float, float]:
+    """Find a short visiting order for `points`, given in their current order.
+
+    Returns ``(order, length_before_km, length_after_km)`` where ``order`` is
+    a permutation of point indexes.
+    """
+    n = len(points)
+    current = list(range(n))
+    matrix = distance_matrix(points)
+    before = route_length(current, matrix)
+    if n < 3:
+        return current, before, before
+
+    path = _Path(matrix, fix_start, fix_end)
+    end = n - 1 if fix_end else None
+    starts = [0] if fix_start else [i for i in range(n) if i != end]
+    seed = min(
+        (path.nearest_neighbour(start, end) for start in starts),
+        key=lambda route: route_length(route, matrix),
+    )
+
+    best = current
+    best_length = before
+    for candidate in (path.improve(seed), path.improve(current)):
+        length = route_length(candidate, matrix)
+        if length < best_length - _EPSILON:
+            best, best_length = candidate, length
+    return best, before, best_length
@@ -0,0 +1,170 @@
+from datetime import datetime
+from typing import List, Sequence
+
+from sqlalchemy import DateTime, case, func, insert, literal, select, update
+from sqlalchemy.orm import Session
+
+from app.models.activity import StopActivity
+from app.models.stop import Stop
+from app.models.trip import Trip
+from app.services.analytics_service import record_city_visits
+from app.services.popularity import stage_city_visits
+
+
+def clone_trip(
+    db: Session, original_trip: Trip, user_id: int, count: int = 1
+) -> List[Trip]:
+    """Clone a trip (stops + activities) `count` times for a user.
+
+    Runs inside the caller's transaction (the caller commits) with a fixed
+    number of statements whatever the trip size: the trip shells, one
+    INSERT ... SELECT for every cloned stop, the analytics rollup update and
+    one INSERT ... SELECT for every cloned stop activity.
+    """
+    # 1. Trip shells
+    new_trips = [
+        Trip(
+            name=f"Copy of {original_trip.name}",
+            description=original_trip.description,
+            start_date=original_trip.start_date,  # User usually updates this later
+            end_date=original_trip.end_date,
+            cover_photo=original_trip.cover_photo,
+            user_id=user_id,
+            is_public=False,  # New copy starts private
+        )
+        for _ in range(count)
+    ]
+    db.add_all(new_trips)
+    db.flush()
+    new_trip_ids = [trip.id for trip in new_trips]
+
+    # 2. Stops: copy every original stop into every new trip
+    now = literal(datetime.utcnow(), DateTime())
+    db.execute(
+        insert(Stop).from_select(
+            [
+                "trip_id",
+                "city_id",
+                "order",
+                "start_date",
+                "end_date",
+                "notes",
+                "transport_cost",
+                "created_at",
+                "updated_at",
+            ],
+            select(
+                Trip.id,
+                Stop.city_id,
+                Stop.order,
+                Stop.start_date,
+                Stop.end_date,
+                Stop.notes,
+                Stop.transport_cost,
+                now,
+                now,
+            )
+            .join(Trip, Trip.id.in_(new_trip_ids))
+            .where(Stop.trip_id == original_trip.id)
+            .order_by(Trip.id, Stop.id),
+        )
+    )
+
+    # Core inserts skip the ORM hooks; count the new stops in the rollups
+    # and the popularity ranking
+    city_counts = db.execute(
+        select(Stop.city_id, func.count(Stop.id))
+        .where(Stop.trip_id == original_trip.id)
+        .group_by(Stop.city_id)
+    ).all()
+    new_visits = {city_id: n * count for city_id, n in city_counts}
+    record_city_visits(db, new_visits)
+    stage_city_visits(db, new_visits)
+
+    # 3. Activities: pair old and new stops by their position in id order
+    old_stops = (
+        select(
+            Stop.id.label("stop_id"),
+            func.row_number().over(order_by=Stop.id).label("position"),
+        )
+        .where(Stop.trip_id == original_trip.id)
+        .subquery()
+    )
+    new_stops = (
+        select(
+            Stop.id.label("stop_id"),
+            func.row_number()
+            .over(partition_by=Stop.trip_id, order_by=Stop.id)
+            .label("position"),
+        )
+        .where(Stop.trip_id.in_(new_trip_ids))
+        .subquery()
+    )
+    db.execute(
+        insert(StopActivity).from_select(
+            ["stop_id", "activity_id", "actual_cost"],
+            select(
+                new_stops.c.stop_id,
+                StopActivity.activity_id,
+                StopActivity.actual_cost,
+            )
+            .join(old_stops, old_stops.c.stop_id == StopActivity.stop_id)
+            .join(new_stops, new_stops.c.position == old_stops.c.position)
+            .order_by(new_stops.c.stop_id, StopActivity.id),
+        )
+    )
+
+    return new_trips
+
+
+def next_stop_order(trip_id: int):
+    """SQL expression for the position after a trip's last stop.
+
+    Evaluated inside the INSERT, so there is no read-then-write window; the
+    unique (trip_id, order) index rejects whatever still races.
+    """
+    return (
+        select(func.coalesce(func.max(Stop.order), 0) + 1)
+        .where(Stop.trip_id == trip_id)
+        .scalar_subquery()
+    )
+
+
+def trip_stop_ids(db: Session, trip_id: int) -> List[int]:
+    """A trip's stop ids in visiting order"""
+    rows = (
+        db.query(Stop.id).filter(Stop.trip_id == trip_id).order_by(Stop.order, Stop.id)
+    )
+    return [stop_id for (stop_id,) in rows]
+
+
+def reorder_stops(db: Session, trip_id: int, stop_ids: Sequence[int]) -> None:
+    """Renumber a trip's stops 1..n in the given id order.
+
+    `stop_ids` must be every stop of the trip. The unique (trip_id, order)
+    index is checked row by row, so swapped positions would collide half
+    way through a single UPDATE: the first statement parks every order at
+    its negative, the second writes the new positions. Runs inside the
+    caller's transaction.
+    """
+    positions = {stop_id: position for position, stop_id in enumerate(stop_ids, 1)}
+    db.execute(
+        update(Stop)
+        .where(Stop.trip_id == trip_id)
+        .values(order=-Stop.order)
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(
+        update(Stop)
+        .where(Stop.trip_id == trip_id, Stop.id.in_(positions))
+        .values(order=case(positions, value=Stop.id))
+        .execution_options(synchronize_session="fetch")
+    )
+
+
+def move_stop(db: Session, stop: Stop, position: int) -> None:
+    """Move a stop to `position` (clamped to 1..n), shifting the others"""
+    stop_ids = [i for i in trip_stop_ids(db, stop.trip_id) if i != stop.id]
+    position = min(max(position, 1), len(stop_ids) + 1)
+    stop_ids.insert(position - 1, stop.id)
+    reorder_stops(db, stop.trip_id, stop_ids)
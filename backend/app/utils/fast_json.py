@@ -0,0 +1,172 @@
+"""Opt-in fast JSON path for hot read routes.
+
+With a ``response_model``, FastAPI validates every returned ORM object into
+the schema (nested stops, cities and activities included) and only then
+serializes it. For rows we just loaded ourselves that validation proves
+nothing, yet it dominates CPU time on large itineraries.
+
+``json_serializer(schema)`` compiles a schema, once, into a function that
+reads the schema's fields straight off ORM objects (or catalog records) into
+plain dicts: one getter per schema, a converter only where the
+schema would change the value (``float`` fields, nested schemas).
+``fast_response`` renders that with orjson when it is installed, else the
+stdlib ``json``. The result holds the same JSON values as the
+``response_model`` path, and in practice the same bytes. The exception is
+floats written in exponent form: each encoder spells ``1e16`` its own way
+(``1e16``, ``1e+16``), all of them parsing to the same number. Non-finite
+floats become ``null``, as pydantic writes them.
+
+Routes opt in by building their serializers at import and returning
+``fast_response(serializer, rows)``; they keep their ``response_model`` for
+the OpenAPI docs. The path itself is off by default: until a deployment
+sets ``FAST_JSON_RESPONSES=true`` every one of them goes through the
+validated path.
+"""
+
+import json
+import math
+import types
+from datetime import date, datetime
+from operator import attrgetter, itemgetter
+from typing import Any, Callable, List, Optional, Union, get_args, get_origin
+
+from fastapi import Response
+from pydantic import BaseModel
+
+from app.config import settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+Serializer = Callable[[Any], Any]
+
+# Field types copied as-is; the JSON encoder handles datetimes and dates
+_PLAIN_TYPES = (str, int, bool, datetime, date)
+
+
+def _isoformat(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON, as pydantic's dump_json writes it"""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+        default=_isoformat,
+    ).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _optional(fn: Serializer) -> Serializer:
+    return lambda value: None if value is None else fn(value)
+
+
+def _float(value):
+    if value is None:
+        return None
+    value = float(value)
+    # pydantic writes NaN and infinities as null; the stdlib would raise
+    return value if math.isfinite(value) else None
+
+
+def _converter(annotation) -> Optional[Serializer]:
+    """What turns a field value into its JSON value; None when it's as-is"""
+    origin = get_origin(annotation)
+    if origin in (Union, types.UnionType):
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if len(args) != 1:
+            raise TypeError(f"Unsupported union {annotation}")
+        inner = _converter(args[0])
+        if inner is None or inner is _float:  # Both already pass None through
+            return inner
+        return _optional(inner)
+    if origin in (list, List):
+        (item,) = get_args(annotation)
+        inner = _converter(item)
+        if inner is None:
+            return list
+        return lambda values: [inner(value) for value in values]
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return json_serializer(annotation)
+    if annotation is float:
+        return _float
+    if annotation in _PLAIN_TYPES:
+        return None
+    raise TypeError(f"Unsupported field type {annotation}")
+
+
+_compiled = {}
+
+
+def json_serializer(schema: type[BaseModel]) -> Serializer:
+    """Compile `schema` into a function from an object to its JSON value"""
+    serializer = _compiled.get(schema)
+    if serializer is not None:
+        return serializer
+
+    names = tuple(schema.model_fields)
+    converters = [
+        (index, converter)
+        for index, field in enumerate(schema.model_fields.values())
+        if (converter := _converter(field.annotation)) is not None
+    ]
+    loaded = itemgetter(*names)
+    getter = attrgetter(*names)
+    single = len(names) == 1
+
+    def serialize(obj) -> dict:
+        # Loaded ORM attributes sit in the instance __dict__, and reading
+        # them there skips the descriptors; anything else (a lazy load, a
+        # record without a __dict__) goes through getattr
+        attributes = getattr(obj, "__dict__", None)
+        try:
+            values = getter(obj) if attributes is None else loaded(attributes)
+        except KeyError:
+            values = getter(obj)
+        values = [values] if single else list(values)
+        for index, converter in converters:
+            values[index] = converter(values[index])
+        return dict(zip(names, values))
+
+    _compiled[schema] = serialize
+    return serialize
+
+
+def fast_response(
+    serialize: Serializer,
+    content: Any,
+    many: bool = False,
+    response: Optional[Response] = None,
+):
+    """Serialize `content` (a list of objects with `many`) with `serialize`.
+
+    Headers already set on the route's injected `response` are carried
+    over. With FAST_JSON_RESPONSES off the content is returned unchanged
+    for the route's response_model to validate.
+    """
+    if not settings.FAST_JSON_RESPONSES:
+        return content
+    body = [serialize(obj) for obj in content] if many else serialize(content)
+    headers = None
+    if response is not None:
+        headers = {
+            name: value
+            for name, value in response.headers.items()
+            if name != "content-length"
+        }
+    return FastJSONResponse(body, headers=headers)
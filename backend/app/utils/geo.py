@@ -0,0 +1,30 @@
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+# Half the circumference: no two points are further apart than this
+MAX_DISTANCE_KM = math.pi * EARTH_RADIUS_KM
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points, in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = (
+        math.sin(dphi / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def longitude_span_deg(lat: float, radius_km: float) -> float:
+    """Half-width in degrees of longitude of a circle around a point.
+
+    Returns 180 when the circle reaches a pole and so covers every longitude.
+    """
+    angular = radius_km / EARTH_RADIUS_KM
+    cos_lat = math.cos(math.radians(lat))
+    if angular >= math.pi / 2 or math.sin(angular) >= cos_lat:
+        return 180.0
+    return math.degrees(math.asin(math.sin(angular) / cos_lat))
@@ -0,0 +1,72 @@
+"""Keyset (cursor) pagination on (created_at, id), newest first.
+
+Each page continues strictly after the last row of the previous one, so
+the database seeks straight to it through a (created_at, id) index instead
+of skipping OFFSET rows; page N costs the same as page 1.
+
+Cursors are opaque to clients: urlsafe base64 of the last row's key.
+List endpoints return the cursor for the next page in the ``X-Next-Cursor``
+response header (absent on the last page), keeping their bodies plain lists.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, Query, Response, status
+from sqlalchemy import tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class PageParams:
+    """`?cursor=&limit=` query parameters, used as a dependency"""
+
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(None, description="Cursor from X-Next-Cursor"),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    ):
+        self.cursor = cursor
+        self.limit = limit
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+def paginate(query, model, page: PageParams, response: Response) -> List:
+    """Apply one page of keyset pagination to `query` over `model`.
+
+    Sets the next-page cursor header on `response` when more rows remain.
+    """
+    key = tuple_(model.created_at, model.id)
+    if page.cursor:
+        query = query.filter(key < tuple_(*decode_cursor(page.cursor)))
+
+    # One extra row tells us whether there is a next page
+    rows = (
+        query.order_by(model.created_at.desc(), model.id.desc())
+        .limit(page.limit + 1)
+        .all()
+    )
+    if len(rows) > page.limit:
+        rows = rows[: page.limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
+    return rows
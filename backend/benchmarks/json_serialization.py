@@ -0,0 +1,234 @@
+"""Throughput of the hot list routes, response_model validation vs fast JSON.
+
+Seeds one user with a long itinerary (every stop with its city and a few
+activities), many trips and many cities. For each route it then times:
+
+* serialization alone: the route's rows validated into its response_model
+  and dumped, as FastAPI does, against the prebuilt fast serializer;
+* the whole request, in-process (httpx + ASGITransport) with
+  FAST_JSON_RESPONSES off and on. The response cache is cleared before
+  every call so each one runs the endpoint.
+
+    cd backend && python -m benchmarks.json_serialization [--stops 200]
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+)
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+import httpx
+from pydantic import TypeAdapter
+
+from app.config import settings
+from app.database import Base, SessionLocal, engine
+from app.main import app
+from app.models import Activity, City, Stop, StopActivity, Trip, User
+from app.models.loaders import stop_graph_options
+from app.schemas import CityListResponse, StopWithCityResponse, TripResponse
+from app.services.catalog import catalog
+from app.services.response_cache import response_cache
+from app.utils.auth import create_access_token
+from app.utils.fast_json import dumps, json_serializer
+
+
+def _seed(stops: int, activities_per_stop: int, trips: int) -> dict:
+    db = SessionLocal()
+    try:
+        user = User(email="json@example.com", username="json", hashed_password="x")
+        db.add(user)
+        cities = [
+            City(
+                name=f"City {i}",
+                country=f"Country {i % 20}",
+                region="Europe",
+                description="A city worth a detour. " * 4,
+                avg_cost_per_day=50.0 + i,
+                popularity_score=i % 100,
+                latitude=40.0 + i / 100,
+                longitude=2.0 + i / 100,
+            )
+            for i in range(200)
+        ]
+        db.add_all(cities)
+        db.flush()
+        activities = [
+            Activity(
+                name=f"Activity {i}",
+                city_id=cities[i % len(cities)].id,
+                description="Guided visit",
+                estimated_cost=20.0 + i % 30,
+            )
+            for i in range(400)
+        ]
+        db.add_all(activities)
+
+        start = datetime(2024, 1, 1)
+        for t in range(trips):
+            db.add(
+                Trip(
+                    name=f"Trip {t}",
+                    description="Weekend away",
+                    start_date=start,
+                    end_date=start + timedelta(days=3),
+                    owner=user,
+                )
+            )
+        trip = Trip(
+            name="Grand tour",
+            start_date=start,
+            end_date=start + timedelta(days=stops * 2),
+            owner=user,
+        )
+        db.add(trip)
+        db.flush()
+        for i in range(stops):
+            stop = Stop(
+                trip_id=trip.id,
+                city_id=cities[i % len(cities)].id,
+                order=i + 1,
+                start_date=start + timedelta(days=i * 2),
+                end_date=start + timedelta(days=i * 2 + 2),
+                notes="Book the train",
+            )
+            db.add(stop)
+            db.flush()
+            for j in range(activities_per_stop):
+                activity = activities[(i * activities_per_stop + j) % len(activities)]
+                db.add(
+                    StopActivity(
+                        stop_id=stop.id,
+                        activity_id=activity.id,
+                        actual_cost=activity.estimated_cost,
+                    )
+                )
+        db.commit()
+        token = create_access_token({"sub": str(user.id)})
+        return {"trip_id": trip.id, "headers": {"Authorization": f"Bearer {token}"}}
+    finally:
+        db.close()
+
+
+def _routes(trip_id: int):
+    """(url, response schema, loader of the rows the route serializes)"""
+    return [
+        (
+            f"/trips/{trip_id}/stops",
+            StopWithCityResponse,
+            lambda db: (
+                db.query(Stop)
+                .options(*stop_graph_options())
+                .filter(Stop.trip_id == trip_id)
+                .order_by(Stop.order)
+                .all()
+            ),
+        ),
+        (
+            "/trips/?limit=200",
+            TripResponse,
+            lambda db: db.query(Trip).limit(200).all(),
+        ),
+        (
+            "/cities/?limit=100",
+            CityListResponse,
+            lambda db: catalog.get(db).filter_cities(None, None, None, None, 100),
+        ),
+        (
+            "/cities/?search=city&limit=100",
+            CityListResponse,
+            lambda db: db.query(City).limit(100).all(),
+        ),
+    ]
+
+
+def _per_call_ms(fn, seconds: float) -> float:
+    calls, started = 0, time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        fn()
+        calls += 1
+    return (time.perf_counter() - started) / calls * 1000
+
+
+def serialization(routes, seconds):
+    db = SessionLocal()
+    try:
+        for url, schema, load in routes:
+            rows = load(db)
+            adapter = TypeAdapter(list[schema])
+            serialize = json_serializer(schema)
+            validated = _per_call_ms(
+                lambda adapter=adapter, rows=rows: adapter.dump_json(
+                    adapter.validate_python(rows, from_attributes=True)
+                ),
+                seconds,
+            )
+            fast = _per_call_ms(
+                lambda serialize=serialize, rows=rows: dumps(
+                    [serialize(r) for r in rows]
+                ),
+                seconds,
+            )
+            print(
+                f"{url:<32} {len(rows):4d} rows  "
+                f"response_model {validated:7.2f} ms  fast {fast:7.2f} ms  "
+                f"x{validated / fast:.2f}"
+            )
+    finally:
+        db.close()
+
+
+async def _rate(client, url, headers, seconds) -> float:
+    calls, started = 0, time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        response_cache.clear()
+        response = await client.get(url, headers=headers)
+        response.raise_for_status()
+        calls += 1
+    return calls / (time.perf_counter() - started)
+
+
+async def requests(routes, headers, seconds):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        for url, _, _ in routes:
+            rates = {}
+            for enabled in (False, True):
+                settings.FAST_JSON_RESPONSES = enabled
+                await _rate(client, url, headers, seconds / 4)  # Warm up
+                rates[enabled] = await _rate(client, url, headers, seconds)
+            size = len((await client.get(url, headers=headers)).content)
+            print(
+                f"{url:<32} {size / 1024:6.1f} KiB  "
+                f"response_model {rates[False]:7.1f} req/s  "
+                f"fast {rates[True]:7.1f} req/s  x{rates[True] / rates[False]:.2f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stops", type=int, default=200)
+    parser.add_argument("--activities-per-stop", type=int, default=3)
+    parser.add_argument("--trips", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=2.0, help="per route/mode")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    seeded = _seed(args.stops, args.activities_per_stop, args.trips)
+    routes = _routes(seeded["trip_id"])
+    print("Serialization only")
+    serialization(routes, args.seconds)
+    print("Whole request")
+    asyncio.run(requests(routes, seeded["headers"], args.seconds))
+
+
+if __name__ == "__main__":
+    main()
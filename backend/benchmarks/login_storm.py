@@ -0,0 +1,99 @@
+"""Trip endpoint latency during a login storm, shared threadpool vs hashing pool.
+
+Fires a burst of concurrent POST /auth/login calls at the app in-process
+(httpx + ASGITransport) while a client polls GET /trips/, once with argon2
+running on the default threadpool the way the sync login route used to, and
+once on the dedicated hashing pool.
+
+    cd backend && python -m benchmarks.login_storm
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+)
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+import httpx
+from starlette.concurrency import run_in_threadpool
+
+from app.main import app
+from app.services import password_hasher as hasher_module
+
+CREDENTIALS = {"email": "storm@example.com", "password": "stormpass123"}
+
+
+async def _shared_threadpool(self, fn, *args):
+    return await run_in_threadpool(fn, *args)
+
+
+async def _probe(client, headers, stop, latencies):
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get("/trips/", headers=headers)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(0.01)
+
+
+async def run(mode, logins):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        await client.post("/auth/register", json={**CREDENTIALS, "username": "storm"})
+        token = (await client.post("/auth/login", json=CREDENTIALS)).json()
+        headers = {"Authorization": f"Bearer {token['access_token']}"}
+
+        latencies, stop = [], asyncio.Event()
+        probe = asyncio.create_task(_probe(client, headers, stop, latencies))
+        started = time.perf_counter()
+        responses = await asyncio.gather(
+            *(client.post("/auth/login", json=CREDENTIALS) for _ in range(logins))
+        )
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await probe
+
+    latencies.sort()
+    codes = [r.status_code for r in responses]
+    return {
+        "mode": mode,
+        "elapsed_s": elapsed,
+        "ok": codes.count(200),
+        "rejected": codes.count(429),
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[max(int(len(latencies) * 0.99) - 1, 0)] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=100)
+    args = parser.parse_args()
+
+    from app.database import Base, engine
+
+    Base.metadata.create_all(bind=engine)
+    original = hasher_module.PasswordHasher._run
+    for mode in ("threadpool", "hashing-pool"):
+        hasher_module.PasswordHasher._run = (
+            _shared_threadpool if mode == "threadpool" else original
+        )
+        result = asyncio.run(run(mode, args.logins))
+        print(
+            f"{result['mode']:>12}: storm {result['elapsed_s']:6.2f} s  "
+            f"ok {result['ok']:4d}  429 {result['rejected']:4d}  "
+            f"GET /trips/ p50 {result['p50_ms']:8.1f} ms  "
+            f"p99 {result['p99_ms']:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Concurrent write throughput on SQLite, default profile vs tuned profile.
+
+Simulates POST /trips/{id}/stops and POST /activities/stop/{id} traffic from
+a thread pool (one session per "request", like get_db) alongside readers
+listing stops, once with the stock engine and once with configure_sqlite()
+plus serialize_writes().
+
+    cd backend && python -m benchmarks.sqlite_write_concurrency
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, configure_sqlite, engine_options, serialize_writes
+from app.models import Activity, City, Stop, StopActivity, Trip, User
+from app.services.trip_service import next_stop_order
+
+
+def _seed(session_factory):
+    db = session_factory()
+    user = User(email="bench@example.com", username="bench", hashed_password="x")
+    city = City(name="Paris", country="France", avg_cost_per_day=150.0)
+    db.add_all([user, city])
+    db.flush()
+    activity = Activity(name="Louvre", city_id=city.id, estimated_cost=45.0)
+    trip = Trip(
+        name="Bench",
+        start_date=datetime(2024, 1, 1),
+        end_date=datetime(2025, 1, 1),
+        user_id=user.id,
+    )
+    db.add_all([activity, trip])
+    db.commit()
+    ids = (trip.id, city.id, activity.id)
+    db.close()
+    return ids
+
+
+def _write_request(session_factory, trip_id, city_id, activity_id):
+    db = session_factory()
+    try:
+        trip = db.query(Trip).filter(Trip.id == trip_id).first()
+        stop = Stop(
+            trip_id=trip.id,
+            city_id=city_id,
+            order=next_stop_order(trip.id),
+            start_date=datetime(2024, 1, 1),
+            end_date=datetime(2024, 1, 1) + timedelta(days=2),
+        )
+        db.add(stop)
+        db.commit()
+
+        db.add(StopActivity(stop_id=stop.id, activity_id=activity_id, actual_cost=1.0))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _read_request(session_factory, trip_id):
+    db = session_factory()
+    try:
+        db.query(Stop).filter(Stop.trip_id == trip_id).order_by(Stop.order).limit(
+            50
+        ).all()
+    finally:
+        db.close()
+
+
+def run(tuned, writers, readers, requests):
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    url = f"sqlite:///{path}"
+    engine = create_engine(url, **engine_options(url))
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    if tuned:
+        configure_sqlite(engine)
+        serialize_writes(session_factory)
+    Base.metadata.create_all(bind=engine)
+    trip_id, city_id, activity_id = _seed(session_factory)
+
+    latencies, errors, reads = [], [], [0]
+    stop_readers = threading.Event()
+    lock = threading.Lock()
+
+    def writer():
+        for _ in range(requests):
+            started = time.perf_counter()
+            try:
+                _write_request(session_factory, trip_id, city_id, activity_id)
+            except OperationalError as exc:
+                with lock:
+                    errors.append(str(exc.orig))
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+    def reader():
+        while not stop_readers.is_set():
+            try:
+                _read_request(session_factory, trip_id)
+            except OperationalError as exc:
+                with lock:
+                    errors.append(str(exc.orig))
+                continue
+            with lock:
+                reads[0] += 1
+
+    reader_threads = [threading.Thread(target=reader) for _ in range(readers)]
+    writer_threads = [threading.Thread(target=writer) for _ in range(writers)]
+    started = time.perf_counter()
+    for thread in reader_threads + writer_threads:
+        thread.start()
+    for thread in writer_threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    stop_readers.set()
+    for thread in reader_threads:
+        thread.join()
+    engine.dispose()
+
+    latencies.sort()
+    return {
+        "profile": "tuned" if tuned else "default",
+        "write_requests_per_s": len(latencies) / elapsed,
+        "reads_per_s": reads[0] / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000
+        if latencies
+        else 0.0,
+        "errors": len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=16)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=50, help="per writer")
+    args = parser.parse_args()
+
+    for tuned in (False, True):
+        result = run(tuned, args.writers, args.readers, args.requests)
+        print(
+            f"{result['profile']:>8}: "
+            f"{result['write_requests_per_s']:8.1f} writes/s  "
+            f"{result['reads_per_s']:8.1f} reads/s  "
+            f"p50 {result['p50_ms']:7.1f} ms  "
+            f"p99 {result['p99_ms']:7.1f} ms  "
+            f"errors {result['errors']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
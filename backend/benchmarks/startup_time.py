@@ -0,0 +1,173 @@
+"""Cold start of the API process: import time and time to readiness.
+
+Runs each measurement in a fresh interpreter, the way an autoscaled worker
+starts:
+
+* ``import``: ``python -X importtime -c "import app.main"``, with the
+  modules that cost the most;
+* ``ready``: importing app.main and running the lifespan startup, i.e. when
+  the process can answer requests; and ``warm``, when the deferred warm-up
+  (admin user, argon2 and JWT backends, in-memory indexes) has finished;
+* ``eager``: the same, with the warm-up run before readiness as it used to.
+
+The database is a temporary SQLite file, migrated to head and seeded
+beforehand.
+
+    cd backend && python -m benchmarks.startup_time [--runs 5] [--budget-ms 800]
+
+With ``--budget-ms`` the run exits 1 when the median time to ready is over
+budget, so it can gate CI.
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import Counter
+
+_IMPORTTIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+# Run in the child: prints {"import_ms", "ready_ms", "warm_ms"} as JSON
+_STARTUP_SCRIPT = """
+import asyncio, json, logging, sys, threading, time
+
+started = time.perf_counter()
+import app.main as main
+
+imported = time.perf_counter()
+eager = sys.argv[1] == "eager"
+warm = threading.Event()
+
+
+class _WarmUpDone(logging.Handler):
+    def emit(self, record):
+        if record.getMessage().startswith("Startup warm-up done"):
+            warm.set()
+
+
+logging.getLogger("app.main").addHandler(_WarmUpDone())
+logging.getLogger("app.main").setLevel(logging.INFO)
+
+
+async def run():
+    if eager:
+        main.warm_up()
+    async with main.lifespan(main.app):
+        ready = time.perf_counter()
+        await asyncio.to_thread(warm.wait, 60)
+        done = time.perf_counter()
+    return ready, (ready if eager else done)
+
+
+ready, done = asyncio.run(run())
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "ready_ms": (ready - started) * 1000,
+    "warm_ms": (done - started) * 1000,
+}))
+"""
+
+
+def _env(database_url: str) -> dict:
+    return {
+        **os.environ,
+        "DATABASE_URL": database_url,
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "benchmark"),
+        "DB_AUTO_MIGRATE": "false",
+        "ANALYTICS_RECONCILE_SECONDS": "0",
+    }
+
+
+def import_profile(module: str, env: dict):
+    """Total import ms of `module` and the self ms of every module it loaded"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    self_us, total_us = Counter(), 0
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME.match(line)
+        if not match:
+            continue
+        own, cumulative, indent, name = match.groups()
+        self_us[name] += int(own)
+        if len(indent) == 1:
+            total_us += int(cumulative)  # Top-level imports only
+    return total_us / 1000, self_us
+
+
+def startup(mode: str, env: dict) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", _STARTUP_SCRIPT, mode],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="modules to list")
+    parser.add_argument(
+        "--module",
+        action="append",
+        help="module to import-profile (default: app.main and the seed scripts)",
+    )
+    parser.add_argument(
+        "--budget-ms", type=float, help="fail when the median ready time is over"
+    )
+    args = parser.parse_args()
+
+    database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'startup.db')}"
+    env = _env(database_url)
+    for command in (
+        ["-m", "app.migrations", "upgrade"],
+        ["seed_cities.py"],
+        ["seed_activities.py"],
+    ):
+        subprocess.run(
+            [sys.executable, *command], env=env, capture_output=True, check=True
+        )
+
+    for module in args.module or ["app.main", "seed_cities", "seed_activities"]:
+        totals, self_us = [], Counter()
+        for _ in range(args.runs):
+            total, own = import_profile(module, env)
+            totals.append(total)
+            self_us.update(own)
+        print(f"import {module}: median {statistics.median(totals):7.1f} ms")
+        if module == "app.main":
+            for name, us in self_us.most_common(args.top):
+                print(f"    {us / args.runs / 1000:7.1f} ms  {name}")
+
+    startup("deferred", env)  # First start creates the admin user
+    medians = {}
+    for mode in ("eager", "deferred"):
+        runs = [startup(mode, env) for _ in range(args.runs)]
+        medians[mode] = {
+            key: statistics.median(run[key] for run in runs) for key in runs[0]
+        }
+        m = medians[mode]
+        print(
+            f"{mode:>8}: import {m['import_ms']:7.1f} ms  "
+            f"ready {m['ready_ms']:7.1f} ms  warm {m['warm_ms']:7.1f} ms"
+        )
+
+    ready_ms = medians["deferred"]["ready_ms"]
+    if args.budget_ms is not None and ready_ms > args.budget_ms:
+        print(f"ready {ready_ms:.1f} ms is over the {args.budget_ms:.0f} ms budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,8 +9,11 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def seed_activities():
-    db = SessionLocal()
+def seed_activities(db=None) -> int:
+    """Insert the missing seed activities; `db` works as in seed_cities()"""
+    own_session = db is None
+    if own_session:
+        db = SessionLocal()
 
     try:
         logger.info("🌱 Starting activity seeding...")
@@ -151,12 +154,17 @@ def seed_activities():
 
         db.commit()
         logger.info(f"✅ Successfully added {count} new activities!")
+        return count
 
     except Exception as e:
         logger.error(f"❌ Error seeding activities: {e}")
         db.rollback()
+        if not own_session:
+            raise
+        return 0
     finally:
-        db.close()
+        if own_session:
+            db.close()
 
 
 if __name__ == "__main__":
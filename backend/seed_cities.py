@@ -8,8 +8,15 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def seed_cities():
-    db = SessionLocal()
+def seed_cities(db=None) -> int:
+    """Insert the missing seed rows and return how many were added.
+
+    Uses (and commits) `db` when given, e.g. from a background job, and
+    re-raises errors so the caller sees them; otherwise opens its own session.
+    """
+    own_session = db is None
+    if own_session:
+        db = SessionLocal()
 
     try:
         logger.info("🌱 Starting city seeding...")
@@ -84,12 +91,17 @@ def seed_cities():
 
         db.commit()
         logger.info(f"✅ Successfully added {count} new cities!")
+        return count
 
     except Exception as e:
         logger.error(f"❌ Error seeding cities: {e}")
         db.rollback()
+        if not own_session:
+            raise
+        return 0
     finally:
-        db.close()
+        if own_session:
+            db.close()
 
 
 if __name__ == "__main__":
@@ -1,15 +1,29 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.config import settings
-from app.database import Base, get_db
+from app.database import Base, engine_options, get_db
 from app.main import app
+from app.models.activity import Activity
+from app.models.city import City
+from app.services.auth_service import user_cache
+from app.services.autocomplete import city_autocomplete
+from app.services.catalog import catalog
+from app.services.geo_index import geo_index
+from app.services.job_runner import job_runner
+from app.services.metrics import registry as metrics
+from app.services.popularity import popularity
+from app.services.query_stats import capture_queries
+from app.services.response_cache import response_cache
 
 # Test database
 TEST_DATABASE_URL = settings.TEST_DATABASE_URL
-engine = create_engine(TEST_DATABASE_URL, connect_args={"check_same_thread": False})
+engine = create_engine(TEST_DATABASE_URL, **engine_options(TEST_DATABASE_URL))
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
@@ -36,6 +50,15 @@ def client(db_session):
             pass
 
     app.dependency_overrides[get_db] = override_get_db
+    # In-process caches must not leak rows between per-test databases
+    user_cache.clear()
+    city_autocomplete.reset()
+    catalog.reset()
+    popularity.reset()
+    geo_index.reset()
+    response_cache.clear()
+    response_cache.session_factory = TestingSessionLocal
+    metrics.reset()
     yield TestClient(app)
     app.dependency_overrides.clear()
 
@@ -69,3 +92,88 @@ def auth_token(client, test_user):
 def auth_headers(auth_token):
     """Get headers with authentication token"""
     return {"Authorization": f"Bearer {auth_token}"}
+
+
+@pytest.fixture
+def seeded_city(db_session):
+    """A city with one activity, inserted straight into the test database"""
+    city = City(name="Paris", country="France", avg_cost_per_day=150.0)
+    db_session.add(city)
+    db_session.commit()
+    activity = Activity(name="Louvre", city_id=city.id, estimated_cost=45.0)
+    db_session.add(activity)
+    db_session.commit()
+    return {"city_id": city.id, "activity_id": activity.id}
+
+
+@pytest.fixture
+def assert_max_queries(db_session):
+    """Fail when the block runs more than `limit` SQL statements.
+
+    with assert_max_queries(2) as stats:
+        client.get(f"/budget/{trip_id}", headers=auth_headers)
+
+    `stats` (a QueryStats) also counts the statements by shape.
+    """
+
+    @contextmanager
+    def check(limit):
+        with capture_queries(engine) as stats:
+            yield stats
+        assert stats.count <= limit, (
+            f"Over the budget of {limit} queries: {stats.summary()}"
+        )
+
+    return check
+
+
+@pytest.fixture
+def create_trip_with_stops(client, auth_headers, seeded_city):
+    """Factory creating a trip with N two-day stops in the seeded city.
+
+    Every other stop gets the seeded activity attached.
+    """
+
+    def create(stop_count):
+        start = datetime(2024, 6, 1)
+        trip_res = client.post(
+            "/trips/",
+            json={
+                "name": "Budget Trip",
+                "start_date": start.isoformat(),
+                "end_date": (start + timedelta(days=stop_count * 2)).isoformat(),
+            },
+            headers=auth_headers,
+        )
+        trip_id = trip_res.json()["id"]
+
+        for i in range(stop_count):
+            stop_res = client.post(
+                f"/trips/{trip_id}/stops",
+                json={
+                    "city_id": seeded_city["city_id"],
+                    "start_date": (start + timedelta(days=i * 2)).isoformat(),
+                    "end_date": (start + timedelta(days=i * 2 + 2)).isoformat(),
+                },
+                headers=auth_headers,
+            )
+            assert stop_res.status_code == 201
+            if i % 2 == 0:
+                client.post(
+                    f"/activities/stop/{stop_res.json()['id']}",
+                    json={"activity_id": seeded_city["activity_id"]},
+                    headers=auth_headers,
+                )
+
+        return trip_id
+
+    return create
+
+
+@pytest.fixture
+def running_jobs(db_session):
+    """Run background jobs against the test database while the test runs"""
+    job_runner.session_factory = TestingSessionLocal
+    job_runner.start()
+    yield job_runner
+    job_runner.stop()
@@ -0,0 +1,102 @@
+from app.models.activity import Activity
+
+
+def _first_stop_id(client, auth_headers, trip_id):
+    return client.get(f"/trips/{trip_id}/stops", headers=auth_headers).json()[0]["id"]
+
+
+def test_batch_add_activities(
+    client,
+    auth_headers,
+    db_session,
+    seeded_city,
+    create_trip_with_stops,
+    assert_max_queries,
+):
+    """Test adding many activities in one call, with per-item results"""
+    tower = Activity(
+        name="Eiffel Tower", city_id=seeded_city["city_id"], estimated_cost=30.0
+    )
+    db_session.add(tower)
+    db_session.commit()
+    stop_id = _first_stop_id(client, auth_headers, create_trip_with_stops(1))
+    with assert_max_queries(4) as stats:
+        response = client.post(
+            f"/activities/stop/{stop_id}/batch",
+            json={
+                "items": [
+                    {"activity_id": seeded_city["activity_id"], "actual_cost": 10.0},
+                    {"activity_id": tower.id},
+                    {"activity_id": 99999},
+                ]
+            },
+            headers=auth_headers,
+        )
+    assert response.status_code == 200
+    assert response.json() == {
+        "stop_id": stop_id,
+        "succeeded": 2,
+        "failed": 1,
+        "results": [
+            {
+                "activity_id": seeded_city["activity_id"],
+                "status": "added",
+                "actual_cost": 10.0,
+            },
+            {"activity_id": tower.id, "status": "added", "actual_cost": 30.0},
+            {"activity_id": 99999, "status": "not_found", "actual_cost": None},
+        ],
+    }
+    inserts = [s for s in stats.shapes.elements() if s.startswith("INSERT")]
+    assert len(inserts) == 1
+
+    stop = client.get(f"/stops/{stop_id}", headers=auth_headers).json()
+    assert sorted(a["actual_cost"] for a in stop["activities"]) == [10.0, 30.0, 45.0]
+
+
+def test_batch_remove_activities(
+    client, auth_headers, seeded_city, create_trip_with_stops
+):
+    """Test each listed id removes one link and absent ones are reported"""
+    stop_id = _first_stop_id(client, auth_headers, create_trip_with_stops(1))
+    louvre = seeded_city["activity_id"]
+    client.post(
+        f"/activities/stop/{stop_id}/batch",
+        json={"items": [{"activity_id": louvre}]},
+        headers=auth_headers,
+    )
+
+    response = client.post(
+        f"/activities/stop/{stop_id}/batch-delete",
+        json={"activity_ids": [louvre, 99999, louvre, louvre]},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert [r["status"] for r in data["results"]] == [
+        "removed",
+        "not_found",
+        "removed",
+        "not_found",
+    ]
+    assert (data["succeeded"], data["failed"]) == (2, 2)
+
+    stop = client.get(f"/stops/{stop_id}", headers=auth_headers).json()
+    assert stop["activities"] == []
+
+
+def test_batch_activities_validation(client, auth_headers):
+    """Test missing stops and empty batches are rejected"""
+    response = client.post(
+        "/activities/stop/99999/batch",
+        json={"items": [{"activity_id": 1}]},
+        headers=auth_headers,
+    )
+    assert response.status_code == 404
+
+    response = client.post(
+        "/activities/stop/99999/batch-delete",
+        json={"activity_ids": []},
+        headers=auth_headers,
+    )
+    assert response.status_code == 422
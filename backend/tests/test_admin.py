@@ -0,0 +1,122 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.trip import Trip
+from app.models.user import User
+from app.services.popularity import popularity
+
+
+@pytest.fixture
+def admin_headers(auth_headers, test_user, db_session):
+    """Auth headers for the test user promoted to admin"""
+    user = db_session.query(User).filter(User.id == test_user["user"]["id"]).one()
+    user.role = "admin"
+    db_session.commit()
+    return auth_headers
+
+
+def test_export_requires_admin(client, auth_headers):
+    """Test that normal users can't export tables"""
+    response = client.get("/admin/export/users", headers=auth_headers)
+    assert response.status_code == 403
+
+
+def test_export_stops_ndjson(client, admin_headers, create_trip_with_stops):
+    """Test streaming a table as newline-delimited JSON"""
+    create_trip_with_stops(3)
+
+    response = client.get("/admin/export/stops", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["order"] for row in rows] == [1, 2, 3]
+    assert rows[0]["start_date"] == "2024-06-01T00:00:00"
+
+
+def test_export_users_csv(client, admin_headers):
+    """Test CSV export has a header row and leaves out secrets"""
+    response = client.get("/admin/export/users?format=csv", headers=admin_headers)
+    assert response.status_code == 200
+    assert "users.csv" in response.headers["content-disposition"]
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["username"] for row in rows] == ["testuser"]
+    assert "hashed_password" not in rows[0]
+
+
+def test_export_unknown_table(client, admin_headers):
+    """Test that only whitelisted tables can be exported"""
+    response = client.get("/admin/export/cities", headers=admin_headers)
+    assert response.status_code == 422
+
+
+def _analytics(client, headers, window=None):
+    url = "/admin/analytics" + (f"?window={window}" if window else "")
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    data.pop("recent_trips")
+    return data
+
+
+def test_analytics_follow_writes(
+    client, admin_headers, create_trip_with_stops, db_session, test_user
+):
+    """Test rollups track inserts, flag flips, copies and deletes"""
+    trip_id = create_trip_with_stops(3)
+    client.put(f"/trips/{trip_id}/share", headers=admin_headers)
+    client.post(f"/trips/{trip_id}/copies?count=2", headers=admin_headers)
+    doomed = create_trip_with_stops(1)
+    client.delete(f"/trips/{doomed}", headers=admin_headers)
+
+    data = _analytics(client, admin_headers)
+    assert data["users"] == {"total": 1, "verified": 0, "unverified": 1}
+    assert data["trips"] == {"total": 3, "public": 1, "private": 2}
+    assert data["popular_cities"] == [
+        {"name": "Paris", "country": "France", "visits": 9}
+    ]
+    # The live popularity ranking counts the same stops
+    (city_id,) = popularity.top(5)
+    assert popularity.score(city_id) == pytest.approx(9)
+
+    # Flag flips on expired instances are counted too
+    user = db_session.query(User).filter(User.id == test_user["user"]["id"]).one()
+    db_session.expire(user)
+    user.is_verified = True
+    db_session.commit()
+    data = _analytics(client, admin_headers)
+    assert data["users"] == {"total": 1, "verified": 1, "unverified": 0}
+
+    # A full rebuild from the source tables agrees
+    response = client.post("/admin/analytics/reconcile", headers=admin_headers)
+    assert response.status_code == 204
+    assert _analytics(client, admin_headers) == data
+    assert popularity.score(city_id) == pytest.approx(9)
+
+
+def test_analytics_window(client, admin_headers, db_session, test_user):
+    """Test that ?window= only counts recent rows"""
+    start = datetime(2024, 6, 1)
+    db_session.add(
+        Trip(
+            name="Old Trip",
+            start_date=start,
+            end_date=start + timedelta(days=3),
+            user_id=test_user["user"]["id"],
+            created_at=datetime.utcnow() - timedelta(days=40),
+        )
+    )
+    db_session.commit()
+
+    assert _analytics(client, admin_headers)["trips"]["total"] == 1
+    assert _analytics(client, admin_headers, "30d")["trips"]["total"] == 0
+    assert _analytics(client, admin_headers, "60d")["trips"]["total"] == 1
+    assert (
+        client.get("/admin/analytics?window=0d", headers=admin_headers).status_code
+        == 422
+    )
@@ -1,5 +1,10 @@
 import pytest
 from fastapi import status
+from passlib.context import CryptContext
+
+from app.models.user import User
+from app.services.password_hasher import password_hasher
+from app.utils.auth import get_pwd_context
 
 # --- Registration Tests ---
 
@@ -93,6 +98,33 @@ def test_login_nonexistent_user(client):
     assert response.status_code == status.HTTP_401_UNAUTHORIZED
 
 
+def test_login_rehashes_outdated_hash(client, db_session, test_user):
+    """Test that a hash made with old argon2 costs is upgraded on login"""
+    old_context = CryptContext(schemes=["argon2"], argon2__time_cost=1)
+    user = db_session.query(User).filter(User.email == "test@example.com").one()
+    user.hashed_password = old_context.hash(test_user["credentials"]["password"])
+    db_session.commit()
+    assert get_pwd_context().needs_update(user.hashed_password)
+
+    response = client.post("/auth/login", json=test_user["credentials"])
+    assert response.status_code == status.HTTP_200_OK
+
+    db_session.refresh(user)
+    assert not get_pwd_context().needs_update(user.hashed_password)
+    assert get_pwd_context().verify(
+        test_user["credentials"]["password"], user.hashed_password
+    )
+
+
+def test_login_rejected_when_hashing_backlog_full(client, test_user, monkeypatch):
+    """Test admission control answers 429 instead of queueing forever"""
+    monkeypatch.setattr(password_hasher, "max_pending", 0)
+
+    response = client.post("/auth/login", json=test_user["credentials"])
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert response.headers["Retry-After"] == "1"
+
+
 # --- Access Control Tests ---
 
 
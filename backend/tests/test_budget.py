@@ -0,0 +1,50 @@
+def test_budget_breakdown(client, auth_headers, create_trip_with_stops):
+    """Test the budget totals and per-stop breakdown"""
+    trip_id = create_trip_with_stops(2)
+
+    response = client.get(f"/budget/{trip_id}", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json() == {
+        "total_budget": 645.0,
+        "categories": {
+            "accommodation": 600.0,
+            "activities": 45.0,
+            "transport": 0.0,
+        },
+        "breakdown": [
+            {
+                "city": "Paris",
+                "days": 2,
+                "accommodation": 300.0,
+                "transport": 0.0,
+                "activities": 45.0,
+                "subtotal": 345.0,
+            },
+            {
+                "city": "Paris",
+                "days": 2,
+                "accommodation": 300.0,
+                "transport": 0.0,
+                "activities": 0,
+                "subtotal": 300.0,
+            },
+        ],
+    }
+
+
+def test_budget_not_found(client, auth_headers):
+    """Test budget for a trip that doesn't exist"""
+    response = client.get("/budget/99999", headers=auth_headers)
+    assert response.status_code == 404
+
+
+def test_budget_query_count_is_constant(
+    client, auth_headers, create_trip_with_stops, assert_max_queries
+):
+    """Test that the budget costs the same number of queries for 1 or 30 stops"""
+    for stop_count in (1, 30):
+        trip_id = create_trip_with_stops(stop_count)
+        with assert_max_queries(2):
+            response = client.get(f"/budget/{trip_id}", headers=auth_headers)
+        assert response.status_code == 200
+        assert len(response.json()["breakdown"]) == stop_count
@@ -0,0 +1,311 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert, update
+
+from app.models.activity import Activity
+from app.models.city import City
+from app.services.catalog import catalog
+from app.services.popularity import CityPopularity
+from app.services.response_cache import response_cache
+
+
+@pytest.fixture
+def cities(db_session):
+    """A handful of cities inserted straight into the test database"""
+    rows = [
+        City(name="Paris", country="France", region="Europe", popularity_score=98),
+        City(name="Parma", country="Italy", region="Europe", popularity_score=40),
+        City(name="Comparison", country="Nowhere", region="Test", popularity_score=1),
+        City(name="Tokyo", country="Japan", region="Asia", popularity_score=95),
+        City(name="Kyoto", country="Japan", region="Asia", popularity_score=80),
+    ]
+    db_session.add_all(rows)
+    db_session.commit()
+    return {city.name: city.id for city in rows}
+
+
+def test_search_cities_by_name(client, cities):
+    """Test substring search ranked by relevance and popularity"""
+    response = client.get("/cities/?search=par")
+    assert response.status_code == 200
+    assert [c["name"] for c in response.json()] == ["Paris", "Parma", "Comparison"]
+
+
+def test_search_cities_by_country_term(client, cities):
+    """Test the search term also matches the country, case-insensitively"""
+    response = client.get("/cities/?search=JAPAN")
+    assert [c["name"] for c in response.json()] == ["Tokyo", "Kyoto"]
+
+
+def test_search_cities_filters(client, cities):
+    """Test country/region filters combine with the search term"""
+    response = client.get("/cities/?search=par&region=europe&max_cost=1000")
+    assert {c["name"] for c in response.json()} == {"Paris", "Parma"}
+
+    response = client.get("/cities/?country=ital")
+    assert [c["name"] for c in response.json()] == ["Parma"]
+
+
+def test_search_cities_short_term(client, cities):
+    """Test terms below trigram length still match"""
+    response = client.get("/cities/?search=ky")
+    assert [c["name"] for c in response.json()] == ["Tokyo", "Kyoto"]
+
+
+def test_search_index_follows_updates(client, db_session, cities):
+    """Test the index stays in sync when cities are inserted or renamed"""
+    city = db_session.get(City, cities["Parma"])
+    city.name = "Bologna"
+    db_session.add(City(name="Parakou", country="Benin", popularity_score=10))
+    db_session.commit()
+
+    response = client.get("/cities/?search=par")
+    assert [c["name"] for c in response.json()] == ["Paris", "Parakou", "Comparison"]
+
+
+def test_search_cities_quotes_are_literal(client, cities):
+    """Test FTS syntax characters in the term are treated as text"""
+    response = client.get('/cities/?search=pa"r OR x')
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+def test_get_city(client, cities):
+    """Test getting a single city"""
+    response = client.get(f"/cities/{cities['Tokyo']}")
+    assert response.status_code == 200
+    assert response.json()["country"] == "Japan"
+
+    assert client.get("/cities/99999").status_code == 404
+
+
+def test_catalog_reads_without_queries(client, db_session, cities, assert_max_queries):
+    """Test non-search city and activity reads are served from memory"""
+    db_session.add_all(
+        [
+            Activity(name="Skytree", category="Sights", city_id=cities["Tokyo"]),
+            Activity(name="Sushi", category="Food", city_id=cities["Tokyo"]),
+            Activity(name="Fushimi", category="Sights", city_id=cities["Kyoto"]),
+        ]
+    )
+    db_session.commit()
+    client.get("/cities/popular")  # Builds the catalog
+    with assert_max_queries(0):
+        response = client.get("/cities/popular?limit=3")
+        assert [c["name"] for c in response.json()] == ["Paris", "Tokyo", "Kyoto"]
+        response = client.get("/cities/?country=JAP&min_cost=0")
+        assert [c["name"] for c in response.json()] == ["Tokyo", "Kyoto"]
+        response = client.get("/cities/?region=euro&limit=1")
+        assert [c["name"] for c in response.json()] == ["Paris"]
+        assert client.get(f"/cities/{cities['Kyoto']}").json()["name"] == "Kyoto"
+        assert client.get("/cities/99999").status_code == 404
+
+        response = client.get("/activities/?category=Sights")
+        assert [a["name"] for a in response.json()] == ["Skytree", "Fushimi"]
+        response = client.get(f"/activities/?city_id={cities['Tokyo']}&category=Food")
+        assert [a["name"] for a in response.json()] == ["Sushi"]
+
+
+def test_catalog_refreshes_on_commit(client, db_session, cities):
+    """Test the catalog is rebuilt after a city changes"""
+    assert client.get("/cities/popular?limit=1").json()[0]["name"] == "Paris"
+
+    db_session.get(City, cities["Kyoto"]).popularity_score = 99
+    db_session.commit()
+
+    assert client.get("/cities/popular?limit=1").json()[0]["name"] == "Kyoto"
+
+
+def test_catalog_sees_writes_from_other_sessions(
+    client, db_session, cities, monkeypatch
+):
+    """Test rows written without the commit hooks show up after a stamp check"""
+    assert client.get("/cities/?country=benin").json() == []
+
+    # A Core insert, as a seed script in another process would leave it
+    db_session.execute(insert(City).values(name="Cotonou", country="Benin"))
+    db_session.commit()
+    response_cache.clear()
+    assert client.get("/cities/?country=benin").json() == []
+
+    monkeypatch.setattr(catalog, "stamp_check_seconds", 0)
+    response_cache.clear()
+    assert [c["name"] for c in client.get("/cities/?country=benin").json()] == [
+        "Cotonou"
+    ]
+
+
+def test_autocomplete(client, cities):
+    """Test prefix suggestions ordered by popularity"""
+    response = client.get("/cities/autocomplete?q=pa")
+    assert response.status_code == 200
+    assert [c["name"] for c in response.json()] == ["Paris", "Parma"]
+
+    # Countries and later words of a name are indexed too
+    response = client.get("/cities/autocomplete?q=JAP&k=1")
+    assert [c["name"] for c in response.json()] == ["Tokyo"]
+
+
+def test_autocomplete_folds_accents(client, db_session, cities):
+    """Test accent-insensitive matching in both directions"""
+    db_session.add(City(name="Zürich", country="Switzerland", popularity_score=70))
+    db_session.add(City(name="São Paulo", country="Brazil", popularity_score=60))
+    db_session.commit()
+
+    assert client.get("/cities/autocomplete?q=zur").json()[0]["name"] == "Zürich"
+    assert client.get("/cities/autocomplete?q=Pãu").json()[0]["name"] == "São Paulo"
+
+
+def test_autocomplete_refreshes_on_change(client, db_session, cities):
+    """Test the index follows inserts, updates and deletes after commit"""
+    assert client.get("/cities/autocomplete?q=par").json()[0]["name"] == "Paris"
+
+    parma = db_session.get(City, cities["Parma"])
+    parma.popularity_score = 99
+    db_session.add(City(name="Parakou", country="Benin", popularity_score=100))
+    db_session.delete(db_session.get(City, cities["Paris"]))
+    db_session.commit()
+
+    names = [c["name"] for c in client.get("/cities/autocomplete?q=par").json()]
+    assert names == ["Parakou", "Parma"]
+
+
+def test_autocomplete_follows_other_processes(client, db_session, cities, monkeypatch):
+    """Test a city renamed by another process is found after a stamp check"""
+    assert client.get("/cities/autocomplete?q=nam").json() == []
+
+    # Another worker's commit: this process's commit hooks never see it
+    with db_session.get_bind().begin() as conn:
+        conn.execute(
+            update(City)
+            .where(City.id == cities["Parma"])
+            .values(name="Namur", updated_at=datetime.utcnow())
+        )
+    monkeypatch.setattr(response_cache, "stamp_check_seconds", 0)
+
+    names = [c["name"] for c in client.get("/cities/autocomplete?q=nam").json()]
+    assert names == ["Namur"]
+
+
+def test_popular_follows_planned_stops(client, auth_headers, cities):
+    """Test /cities/popular ranks cities with planned stops first, live"""
+    assert client.get("/cities/popular?limit=2").json()[0]["name"] == "Paris"
+
+    trip_id = client.post(
+        "/trips/",
+        json={"name": "Japan", "start_date": "2024-06-01", "end_date": "2024-06-10"},
+        headers=auth_headers,
+    ).json()["id"]
+    stop_ids = []
+    for city, day in (("Kyoto", 1), ("Kyoto", 3), ("Comparison", 5)):
+        stop_ids.append(
+            client.post(
+                f"/trips/{trip_id}/stops",
+                json={
+                    "city_id": cities[city],
+                    "start_date": f"2024-06-0{day}",
+                    "end_date": f"2024-06-0{day + 1}",
+                },
+                headers=auth_headers,
+            ).json()["id"]
+        )
+
+    names = [c["name"] for c in client.get("/cities/popular?limit=3").json()]
+    assert names == ["Kyoto", "Comparison", "Paris"]
+
+    for stop_id in stop_ids[:2]:
+        client.delete(f"/stops/{stop_id}", headers=auth_headers)
+    names = [c["name"] for c in client.get("/cities/popular?limit=3").json()]
+    assert names == ["Comparison", "Paris", "Tokyo"]
+
+
+def test_popularity_decays_and_keeps_top_k():
+    """Test older stops weigh less and only the top k cities are ranked"""
+    engine = CityPopularity(half_life_days=10, top_k=2)
+    today = datetime.utcnow().date()
+    engine.add_visits({(1, today - timedelta(days=20)): 3, (2, today): 1})
+    assert engine.score(1) == pytest.approx(0.75)
+    assert engine.top(5) == [2, 1]
+
+    engine.add_visits({(3, today): 2})
+    assert engine.top(5) == [3, 2]
+    engine.add_visits({(3, today): -2, (1, today): 1})
+    assert engine.top(5) == [1, 2]
+    assert engine.score(3) == 0.0
+
+
+@pytest.fixture
+def located_cities(db_session):
+    """Cities with coordinates, including a pair across the antimeridian"""
+    rows = [
+        City(name="Paris", country="France", latitude=48.8566, longitude=2.3522),
+        City(name="Brussels", country="Belgium", latitude=50.8503, longitude=4.3517),
+        City(name="London", country="UK", latitude=51.5074, longitude=-0.1278),
+        City(name="Madrid", country="Spain", latitude=40.4168, longitude=-3.7038),
+        City(name="Suva", country="Fiji", latitude=-18.1248, longitude=178.4501),
+        City(name="Apia", country="Samoa", latitude=-13.8506, longitude=-171.7513),
+        City(name="Nowhere", country="Unknown"),
+    ]
+    db_session.add_all(rows)
+    db_session.commit()
+    return rows
+
+
+def test_nearby_within_radius(client, located_cities):
+    """Test radius queries return cities in distance order"""
+    response = client.get("/cities/nearby?lat=48.8566&lon=2.3522&radius_km=300")
+    assert response.status_code == 200
+    data = response.json()
+    assert [c["name"] for c in data] == ["Paris", "Brussels"]
+    assert data[0]["distance_km"] == 0
+    assert 250 < data[1]["distance_km"] < 270
+
+
+def test_nearby_k_nearest(client, located_cities):
+    """Test k-nearest queries widen until k cities are found"""
+    response = client.get("/cities/nearby?lat=48.8566&lon=2.3522&k=4")
+    assert [c["name"] for c in response.json()] == [
+        "Paris",
+        "Brussels",
+        "London",
+        "Madrid",
+    ]
+
+
+def test_nearby_across_antimeridian(client, located_cities):
+    """Test the grid wraps around at longitude 180"""
+    response = client.get("/cities/nearby?lat=-18.1248&lon=178.4501&radius_km=1500")
+    assert [c["name"] for c in response.json()] == ["Suva", "Apia"]
+
+
+def test_nearby_follows_inserts(client, db_session, located_cities):
+    """Test the index picks up new cities incrementally"""
+    assert len(client.get("/cities/nearby?lat=50.47&lon=4.87&radius_km=30").json()) == 0
+
+    db_session.add(
+        City(name="Namur", country="Belgium", latitude=50.47, longitude=4.87)
+    )
+    db_session.commit()
+
+    data = client.get("/cities/nearby?lat=50.47&lon=4.87&radius_km=100").json()
+    assert [c["name"] for c in data] == ["Namur", "Brussels"]
+
+
+def test_nearby_follows_other_processes(
+    client, db_session, located_cities, monkeypatch
+):
+    """Test a city inserted by another process shows up after a stamp check"""
+    assert client.get("/cities/nearby?lat=50.47&lon=4.87&radius_km=30").json() == []
+
+    # Another worker's commit: this process's commit hooks never see it
+    with db_session.get_bind().begin() as conn:
+        conn.execute(
+            insert(City).values(
+                name="Namur", country="Belgium", latitude=50.47, longitude=4.87
+            )
+        )
+    monkeypatch.setattr(response_cache, "stamp_check_seconds", 0)
+
+    data = client.get("/cities/nearby?lat=50.47&lon=4.87&radius_km=30").json()
+    assert [c["name"] for c in data] == ["Namur"]
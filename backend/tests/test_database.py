@@ -0,0 +1,94 @@
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.database import (
+    Base,
+    async_database_url,
+    configure_sqlite,
+    engine_options,
+    serialize_writes,
+)
+from app.models.city import City
+
+
+def test_sqlite_engine_options():
+    """Test SQLite gets its connect arg and file databases get a sized pool"""
+    options = engine_options("sqlite:///./travel.db")
+    assert options["connect_args"] == {"check_same_thread": False}
+    assert options["pool_size"] == settings.DB_POOL_SIZE
+    assert options["max_overflow"] == settings.DB_MAX_OVERFLOW
+
+
+def test_memory_sqlite_has_no_pool_sizing():
+    """Test in-memory SQLite skips QueuePool-only arguments"""
+    options = engine_options("sqlite://")
+    assert "pool_size" not in options
+    assert "max_overflow" not in options
+
+
+def test_postgres_engine_options(monkeypatch):
+    """Test server databases get no SQLite args and honour the statement timeout"""
+    monkeypatch.setattr(settings, "DB_STATEMENT_TIMEOUT_MS", 5000)
+
+    options = engine_options("postgresql://u:p@db/travel")
+    assert options["connect_args"] == {"options": "-c statement_timeout=5000"}
+    assert options["pool_pre_ping"] is True
+
+    async_options = engine_options("postgresql+asyncpg://u:p@db/travel", True)
+    assert async_options["connect_args"] == {
+        "server_settings": {"statement_timeout": "5000"}
+    }
+
+
+def test_async_database_url():
+    """Test the async driver is derived from the sync URL"""
+    assert (
+        async_database_url("sqlite:///./travel.db") == "sqlite+aiosqlite:///./travel.db"
+    )
+    assert (
+        async_database_url("postgresql://u:p@db/travel")
+        == "postgresql+asyncpg://u:p@db/travel"
+    )
+
+
+def test_sqlite_pragmas(tmp_path):
+    """Test the tuned profile switches SQLite to WAL with a busy timeout"""
+    url = f"sqlite:///{tmp_path / 'tuned.db'}"
+    engine = create_engine(url, **engine_options(url))
+    configure_sqlite(engine)
+
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert (
+            conn.execute(text("PRAGMA busy_timeout")).scalar()
+            == settings.SQLITE_BUSY_TIMEOUT_MS
+        )
+    engine.dispose()
+
+
+def test_serialized_writer_lock(tmp_path):
+    """Test a write transaction holds the writer lock until it ends"""
+    url = f"sqlite:///{tmp_path / 'writer.db'}"
+    engine = create_engine(url, **engine_options(url))
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autoflush=False, bind=engine)
+    lock = serialize_writes(session_factory)
+
+    db = session_factory()
+    db.query(City).all()
+    assert not lock.locked()  # Readers don't take the lock
+
+    db.add(City(name="Paris", country="France"))
+    db.flush()
+    assert lock.locked()
+    db.commit()
+    assert not lock.locked()
+
+    db.query(City).filter(City.name == "Paris").delete()
+    assert lock.locked()
+    db.rollback()
+    assert not lock.locked()
+    db.close()
+    engine.dispose()
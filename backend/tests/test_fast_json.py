@@ -0,0 +1,102 @@
+import json
+from datetime import datetime
+from typing import List
+
+import pytest
+from pydantic import TypeAdapter
+
+from app.config import settings
+from app.models.city import City
+from app.models.stop import Stop
+from app.schemas.city import CityResponse
+from app.schemas.stop import StopWithCityResponse
+from app.services.response_cache import response_cache
+from app.utils import fast_json
+
+
+@pytest.fixture
+def itinerary(client, auth_headers, db_session, seeded_city, create_trip_with_stops):
+    """Trips and stops with nulls, non-ASCII text, an int cost and microseconds"""
+    db_session.add(City(name="Zürich", country="Schweiz", avg_cost_per_day=180))
+    db_session.commit()
+    trip_id = create_trip_with_stops(4)
+    client.post(
+        "/trips/",
+        json={
+            "name": "Trip ✈ «two»",
+            "description": None,
+            "start_date": "2024-07-01T08:30:00.123456",
+            "end_date": "2024-07-09T00:00:00",
+        },
+        headers=auth_headers,
+    )
+    return trip_id
+
+
+def _both_ways(client, url, headers, monkeypatch):
+    bodies = []
+    for enabled in (False, True):
+        monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", enabled)
+        response_cache.clear()
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200
+        bodies.append(response)
+    return bodies
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/trips/{trip_id}/stops",
+        "/trips/",
+        "/trips/?limit=1",
+        "/cities/",
+        "/cities/?country=schweiz",
+        "/cities/?search=zur",
+    ],
+)
+def test_fast_responses_match_response_model(
+    client, auth_headers, itinerary, monkeypatch, url
+):
+    """Test the fast path sends the same bytes and headers as response_model"""
+    validated, fast = _both_ways(
+        client, url.format(trip_id=itinerary), auth_headers, monkeypatch
+    )
+    assert fast.content == validated.content
+    assert fast.headers["content-type"] == validated.headers["content-type"]
+    assert fast.headers.get("x-next-cursor") == validated.headers.get("x-next-cursor")
+
+
+def test_stdlib_fallback_matches_pydantic(db_session, itinerary, monkeypatch):
+    """Test the encoder without orjson gives pydantic's dump_json bytes"""
+    stops = db_session.query(Stop).order_by(Stop.order).all()
+    stops[0].updated_at = datetime(2024, 6, 1, 12, 0, 0, 5)
+    expected = TypeAdapter(List[StopWithCityResponse]).dump_json(
+        TypeAdapter(List[StopWithCityResponse]).validate_python(
+            stops, from_attributes=True
+        )
+    )
+    serialize = fast_json.json_serializer(StopWithCityResponse)
+
+    monkeypatch.setattr(fast_json, "orjson", None)
+    assert fast_json.dumps([serialize(stop) for stop in stops]) == expected
+
+
+def test_extreme_floats_match_pydantic(monkeypatch):
+    """Test huge, tiny and non-finite floats give pydantic's values"""
+    costs = (1e16, 1e-7, float("nan"), float("inf"))
+    cities = [
+        City(id=i + 1, name=f"City {i}", country="Nowhere", avg_cost_per_day=cost)
+        for i, cost in enumerate(costs)
+    ]
+    adapter = TypeAdapter(List[CityResponse])
+    expected = json.loads(
+        adapter.dump_json(adapter.validate_python(cities, from_attributes=True))
+    )
+    serialize = fast_json.json_serializer(CityResponse)
+
+    for encoder in {fast_json.orjson, None}:
+        monkeypatch.setattr(fast_json, "orjson", encoder)
+        body = json.loads(fast_json.dumps([serialize(city) for city in cities]))
+        assert body == expected
+        assert [c["avg_cost_per_day"] for c in body] == [1e16, 1e-7, None, None]
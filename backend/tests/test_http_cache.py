@@ -0,0 +1,126 @@
+import time
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.models.city import City
+from app.services.response_cache import response_cache
+
+
+def test_etag_and_not_modified(client, seeded_city, assert_max_queries):
+    """Test a matching If-None-Match gets a 304 without any SQL"""
+    response = client.get("/cities/popular")
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert response.headers["Cache-Control"] == "public, max-age=60"
+
+    with assert_max_queries(0):
+        response = client.get("/cities/popular", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+
+
+def test_cached_response_replayed(client, seeded_city, assert_max_queries):
+    """Test a repeat request is served from the response cache"""
+    first = client.get(f"/cities/{seeded_city['city_id']}")
+
+    with assert_max_queries(0):
+        second = client.get(f"/cities/{seeded_city['city_id']}")
+    assert second.json() == first.json()
+    assert second.headers["ETag"] == first.headers["ETag"]
+
+
+def test_cache_invalidated_on_change(client, db_session, seeded_city):
+    """Test that committing a row change bumps the ETag and the body"""
+    first = client.get("/cities/?search=Paris")
+
+    city = db_session.get(City, seeded_city["city_id"])
+    city.avg_cost_per_day = 999.0
+    db_session.commit()
+
+    second = client.get(
+        "/cities/?search=Paris", headers={"If-None-Match": first.headers["ETag"]}
+    )
+    assert second.status_code == 200
+    assert second.headers["ETag"] != first.headers["ETag"]
+    assert second.json()[0]["avg_cost_per_day"] == 999.0
+
+
+def test_query_string_order_shares_entry(client, seeded_city):
+    """Test that parameter order doesn't split the cache"""
+    a = client.get("/activities/?city_id=1&category=Culture")
+    b = client.get("/activities/?category=Culture&city_id=1")
+    assert a.headers["ETag"] == b.headers["ETag"]
+
+
+def test_shared_trip_revalidates(client, auth_headers, create_trip_with_stops):
+    """Test that making a shared trip private is seen on revalidation"""
+    trip_id = create_trip_with_stops(1)
+    token = client.put(f"/trips/{trip_id}/share", headers=auth_headers).json()[
+        "share_token"
+    ]
+
+    shared = client.get(f"/trips/share/{token}")
+    assert shared.status_code == 200
+    assert shared.headers["Cache-Control"] == "public, no-cache"
+
+    client.put(f"/trips/{trip_id}/share", headers=auth_headers)
+    response = client.get(
+        f"/trips/share/{token}", headers={"If-None-Match": shared.headers["ETag"]}
+    )
+    assert response.status_code == 403
+    assert "ETag" not in response.headers
+
+
+def test_uncached_routes_have_no_etag(client, auth_headers):
+    """Test that private routes are left alone"""
+    response = client.get("/trips/", headers=auth_headers)
+    assert "ETag" not in response.headers
+
+
+def test_write_from_another_process_revalidates(client, db_session, seeded_city):
+    """Test a write the commit hooks never see still changes the ETag"""
+    first = client.get("/cities/?country=Benin")
+    assert first.json() == []
+
+    # As a seed script would: its own connection, no ORM session
+    with db_session.get_bind().begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO cities (name, country, avg_cost_per_day, "
+                "popularity_score) VALUES ('Cotonou', 'Benin', 40.0, 10)"
+            )
+        )
+    response_cache.stamp_check_seconds = 0
+    try:
+        second = client.get(
+            "/cities/?country=Benin", headers={"If-None-Match": first.headers["ETag"]}
+        )
+    finally:
+        response_cache.stamp_check_seconds = settings.HTTP_CACHE_STAMP_CHECK_SECONDS
+    assert second.status_code == 200
+    assert second.headers["ETag"] != first.headers["ETag"]
+    assert [city["name"] for city in second.json()] == ["Cotonou"]
+
+
+def test_etag_changes_with_the_ttl_bucket(client, seeded_city, monkeypatch):
+    """Test an ETag can't validate a response for longer than the TTL"""
+    etag = client.get("/cities/popular").headers["ETag"]
+
+    later = time.time() + settings.HTTP_CACHE_TTL_SECONDS
+    monkeypatch.setattr(time, "time", lambda: later)
+    response = client.get("/cities/popular", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_etag_shared_across_workers(client, seeded_city):
+    """Test a fresh process computes the same ETag for the same rows"""
+    first = client.get("/cities/popular")
+
+    response_cache.clear()  # As another worker, or this one after a restart
+    response = client.get(
+        "/cities/popular", headers={"If-None-Match": first.headers["ETag"]}
+    )
+    assert response.status_code == 304
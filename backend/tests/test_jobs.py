@@ -0,0 +1,248 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.config import settings
+from app.models.job import Job, JobStatus
+from app.services.job_runner import JobRunner, register_job
+
+_flaky_calls = []
+_release_slow_job = threading.Event()
+
+
+@register_job("test_flaky")
+def flaky_job(ctx):
+    """Fails on its first attempt only"""
+    _flaky_calls.append(ctx.job_id)
+    if len(_flaky_calls) == 1:
+        raise RuntimeError("transient failure")
+    return {"calls": len(_flaky_calls)}
+
+
+@register_job("test_echo")
+def echo_job(ctx):
+    return {"job_id": ctx.job_id}
+
+
+@register_job("test_slow")
+def slow_job(ctx):
+    """Runs until the test releases it"""
+    _release_slow_job.wait(5)
+    return {}
+
+
+@register_job("test_reclaimed")
+def reclaimed_job(ctx):
+    """Finds itself reclaimed by another runner halfway through"""
+    other = Job.__table__.update().where(Job.id == ctx.job_id)
+    with ctx.db.get_bind().begin() as conn:
+        conn.execute(other.values(owner="other-runner"))
+    ctx.checkpoint(0.5, {"step": 1})
+    return {"done": True}
+
+
+def _wait_until(db_session, job_id, condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        db_session.expire_all()
+        job = db_session.get(Job, job_id)
+        if condition(job):
+            return job
+        assert time.monotonic() < deadline, f"job still {job.status}"
+        time.sleep(0.02)
+
+
+def _restart(runner, monkeypatch, **overrides):
+    """Restart the runner so its timers pick up `overrides`"""
+    runner.stop()
+    for name, value in overrides.items():
+        monkeypatch.setattr(settings, name, value)
+    runner.start()
+
+
+def wait_for_job(client, headers, job_id, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        job = client.get(f"/jobs/{job_id}", headers=headers).json()
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        assert time.monotonic() < deadline, f"job still {job['status']}"
+        time.sleep(0.05)
+
+
+def test_copy_trip_job(client, auth_headers, create_trip_with_stops, running_jobs):
+    """Test cloning a trip in the background"""
+    trip_id = create_trip_with_stops(2)
+
+    response = client.post(
+        "/jobs/",
+        json={"kind": "copy_trip", "params": {"trip_id": trip_id, "count": 12}},
+        headers=auth_headers,
+    )
+    assert response.status_code == 202
+    assert response.json()["status"] == "queued"
+
+    job = wait_for_job(client, auth_headers, response.json()["id"])
+    assert job["status"] == "succeeded"
+    assert job["progress"] == 1.0
+    assert len(job["result"]["trip_ids"]) == 12
+
+    copy_id = job["result"]["trip_ids"][-1]
+    stops = client.get(f"/trips/{copy_id}/stops", headers=auth_headers).json()
+    assert [len(s["activities"]) for s in stops] == [1, 0]
+
+
+def test_trip_budget_job(client, auth_headers, create_trip_with_stops, running_jobs):
+    """Test that job results match the synchronous endpoint"""
+    trip_id = create_trip_with_stops(3)
+
+    job_id = client.post(
+        "/jobs/",
+        json={"kind": "trip_budget", "params": {"trip_id": trip_id}},
+        headers=auth_headers,
+    ).json()["id"]
+
+    job = wait_for_job(client, auth_headers, job_id)
+    expected = client.get(f"/budget/{trip_id}", headers=auth_headers).json()
+    assert job["result"] == expected
+
+
+def test_job_retries_with_backoff(client, auth_headers, running_jobs, monkeypatch):
+    """Test that a failing job is retried"""
+    monkeypatch.setattr(settings, "JOB_RETRY_BACKOFF_SECONDS", 0.05)
+    _flaky_calls.clear()
+
+    job_id = client.post(
+        "/jobs/", json={"kind": "test_flaky"}, headers=auth_headers
+    ).json()["id"]
+
+    job = wait_for_job(client, auth_headers, job_id)
+    assert job["status"] == "succeeded"
+    assert job["attempts"] == 2
+    assert job["result"] == {"calls": 2}
+
+
+def test_job_permanent_failure(client, auth_headers, running_jobs):
+    """Test that JobError fails a job without retrying"""
+    job_id = client.post(
+        "/jobs/",
+        json={"kind": "copy_trip", "params": {"trip_id": 99999}},
+        headers=auth_headers,
+    ).json()["id"]
+
+    job = wait_for_job(client, auth_headers, job_id)
+    assert job["status"] == "failed"
+    assert job["attempts"] == 1
+    assert job["error"] == "Trip not found"
+
+
+@pytest.mark.parametrize(
+    "payload, expected_status",
+    [
+        ({"kind": "no_such_job"}, 400),
+        ({"kind": "seed_cities"}, 403),
+        ({"kind": "copy_trip", "params": {"count": 2}}, 422),
+        ({"kind": "copy_trip", "params": {"trip_id": 1, "count": 0}}, 422),
+    ],
+)
+def test_create_job_validation(client, auth_headers, payload, expected_status):
+    """Test that bad job requests are rejected before queueing"""
+    response = client.post("/jobs/", json=payload, headers=auth_headers)
+    assert response.status_code == expected_status
+
+
+def test_get_job_of_other_user(client, auth_headers, db_session):
+    """Test that jobs are private to their owner"""
+    job = Job(kind="copy_trip", params={"trip_id": 1}, user_id=None)
+    db_session.add(job)
+    db_session.commit()
+
+    response = client.get(f"/jobs/{job.id}", headers=auth_headers)
+    assert response.status_code == 404
+
+
+def test_sweep_reclaims_only_dead_runners(db_session, running_jobs, monkeypatch):
+    """Test the periodic sweep requeues jobs whose heartbeat stopped, only"""
+    _restart(running_jobs, monkeypatch, JOB_SWEEP_SECONDS=0.05)
+    long_ago = datetime.utcnow() - timedelta(hours=1)
+    dead = Job(
+        kind="test_echo",
+        status=JobStatus.RUNNING.value,
+        owner="crashed-runner",
+        started_at=long_ago,
+        heartbeat_at=long_ago,
+    )
+    # Started long ago too, but its runner is still beating
+    alive = Job(
+        kind="test_echo",
+        status=JobStatus.RUNNING.value,
+        owner="live-runner",
+        started_at=long_ago,
+        heartbeat_at=datetime.utcnow(),
+    )
+    db_session.add_all([dead, alive])
+    db_session.commit()
+
+    job = _wait_until(db_session, dead.id, lambda j: j.status == "succeeded")
+    assert job.owner == running_jobs.owner
+    assert job.result == {"job_id": dead.id}
+
+    job = db_session.get(Job, alive.id)
+    assert (job.status, job.owner) == ("running", "live-runner")
+
+
+def test_heartbeat_while_running(
+    client, auth_headers, db_session, running_jobs, monkeypatch
+):
+    """Test a running job's heartbeat keeps moving until it finishes"""
+    _restart(running_jobs, monkeypatch, JOB_HEARTBEAT_SECONDS=0.05)
+    _release_slow_job.clear()
+    job_id = client.post(
+        "/jobs/", json={"kind": "test_slow"}, headers=auth_headers
+    ).json()["id"]
+
+    job = _wait_until(db_session, job_id, lambda j: j.status == "running")
+    first_beat = job.heartbeat_at
+    _wait_until(db_session, job_id, lambda j: j.heartbeat_at > first_beat)
+
+    _release_slow_job.set()
+    job = _wait_until(db_session, job_id, lambda j: j.status == "succeeded")
+    assert job.owner == running_jobs.owner
+
+
+def test_reclaimed_run_is_dropped(client, auth_headers, db_session, running_jobs):
+    """Test a runner that lost its job neither checkpoints nor finishes it"""
+    job_id = client.post(
+        "/jobs/", json={"kind": "test_reclaimed"}, headers=auth_headers
+    ).json()["id"]
+
+    job = _wait_until(db_session, job_id, lambda j: j.owner == "other-runner")
+    time.sleep(0.2)  # The dropped run must not write anything after that
+    db_session.expire_all()
+    job = db_session.get(Job, job_id)
+    assert job.status == "running"
+    assert job.result is None
+    assert job.progress == 0.0
+
+
+def test_periodic_job_runs_once_per_interval(db_session, running_jobs, monkeypatch):
+    """Test a periodic job's run is queued once per interval, by any runner"""
+    _restart(running_jobs, monkeypatch, JOB_SWEEP_SECONDS=0.05)
+    runs = db_session.query(Job).filter(Job.kind == "analytics_reconcile")
+    deadline = time.monotonic() + 10.0
+    while runs.first() is None:  # Queued by the startup sweep
+        assert time.monotonic() < deadline, "periodic job never queued"
+        time.sleep(0.02)
+    _wait_until(db_session, runs.first().id, lambda j: j.status == "succeeded")
+
+    # Neither later sweeps nor another process's runner queue it again
+    other = JobRunner(workers=1, session_factory=running_jobs.session_factory)
+    db = other.session_factory()
+    try:
+        assert other._queue_periodic(db) == []
+    finally:
+        db.close()
+    time.sleep(0.2)
+    assert runs.count() == 1
@@ -0,0 +1,68 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.pool import QueuePool
+
+from app.services import metrics
+from app.services.metrics import instrument_pool, registry
+
+
+def _samples(client):
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    samples = {}
+    for line in response.text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_request_metrics_by_route_template(
+    client, auth_headers, create_trip_with_stops
+):
+    """Test requests are counted and timed per route template and status"""
+    trip_id = create_trip_with_stops(1)
+    client.get(f"/trips/{trip_id}", headers=auth_headers)
+    client.get("/trips/999999", headers=auth_headers)
+    client.get("/no/such/path")
+
+    samples = _samples(client)
+    route = 'method="GET",route="/trips/{trip_id}"'
+    assert samples[f'http_requests_total{{{route},status="200"}}'] == 1
+    assert samples[f'http_requests_total{{{route},status="404"}}'] == 1
+    assert (
+        samples['http_requests_total{method="GET",route="unmatched",status="404"}'] == 1
+    )
+    assert samples[f"http_request_duration_seconds_count{{{route}}}"] == 2
+    assert samples[f'http_request_duration_seconds_bucket{{{route},le="+Inf"}}'] == 2
+    assert samples[f"http_requests_in_flight{{{route}}}"] == 0
+    # The hashing pool behind /auth/login is reported at scrape time
+    assert samples['hashing_pool_limit{kind="workers"}'] >= 1
+    assert samples["hashing_pool_pending"] == 0
+
+
+def test_pool_checkouts_waits_and_timeouts(tmp_path, monkeypatch):
+    """Test checkouts are counted and timed, and timeouts counted"""
+    monkeypatch.setattr(registry, "_collectors", list(registry._collectors))
+    registry.reset()
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=QueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    instrument_pool(engine)
+
+    with engine.connect():
+        with pytest.raises(sa_exc.TimeoutError):
+            engine.connect()
+        registry.render()
+        assert metrics.db_pool_connections.value("checked_out") == 1
+
+    assert metrics.db_pool_checkouts.value() == 1
+    assert metrics.db_pool_timeouts.value() == 1
+    assert metrics.db_pool_checkout_wait.count() == 2
+    engine.dispose()
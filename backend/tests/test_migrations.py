@@ -0,0 +1,101 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from app.database import Base, engine_options
+from app.migrations import (
+    SchemaOutOfDate,
+    check_schema,
+    current_revision,
+    head_revision,
+    upgrade,
+)
+from app.migrations.versions.m0003_hot_path_indexes import INDEXES
+from app.migrations.versions.m0006_job_schedule_key import INDEXES as JOB_INDEXES
+
+
+@pytest.fixture
+def blank_engine(tmp_path):
+    url = f"sqlite:///{tmp_path / 'migrations.db'}"
+    engine = create_engine(url, **engine_options(url))
+    yield engine
+    engine.dispose()
+
+
+def _index_names(engine):
+    inspector = inspect(engine)
+    return {
+        index["name"]
+        for table in inspector.get_table_names()
+        for index in inspector.get_indexes(table)
+    }
+
+
+def test_upgrade_fresh_database(blank_engine):
+    """Test upgrading an empty database builds every table and index"""
+    with pytest.raises(SchemaOutOfDate):
+        check_schema(blank_engine)
+
+    applied = upgrade(blank_engine)
+    assert [m.revision for m in applied] == list(range(1, head_revision() + 1))
+    assert check_schema(blank_engine) == head_revision()
+    assert set(Base.metadata.tables) <= set(inspect(blank_engine).get_table_names())
+    assert {name for name, *_ in INDEXES + JOB_INDEXES} <= _index_names(blank_engine)
+
+    assert upgrade(blank_engine) == []  # Nothing left to apply
+
+
+def test_upgrade_adopts_create_all_database(blank_engine):
+    """Test a database made by the old create_all gets its indexes and fixes"""
+    Base.metadata.create_all(bind=blank_engine)
+    with blank_engine.begin() as connection:
+        for name, *_ in INDEXES:
+            connection.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        connection.execute(
+            text(
+                "INSERT INTO users (id, email, username, hashed_password) "
+                "VALUES (1, 'a@example.com', 'a', 'x')"
+            )
+        )
+        connection.execute(
+            text(
+                "INSERT INTO trips (id, name, start_date, end_date, user_id) "
+                "VALUES (1, 'Trip', :day, :day, 1)"
+            ),
+            {"day": datetime(2024, 6, 1)},
+        )
+        # Two stops at position 2, as the old count()-based insert could race
+        for stop_id, order in ((1, 1), (2, 2), (3, 2), (4, 3)):
+            connection.execute(
+                text(
+                    'INSERT INTO stops (id, trip_id, city_id, "order", '
+                    "start_date, end_date) VALUES (:id, 1, 1, :order, :day, :day)"
+                ),
+                {"id": stop_id, "order": order, "day": datetime(2024, 6, 1)},
+            )
+
+    upgrade(blank_engine)
+
+    with blank_engine.connect() as connection:
+        assert current_revision(connection) == head_revision()
+        orders = connection.execute(
+            text('SELECT id, "order" FROM stops ORDER BY id')
+        ).all()
+    assert [tuple(row) for row in orders] == [(1, 1), (2, 2), (3, 3), (4, 4)]
+    assert {name for name, *_ in INDEXES + JOB_INDEXES} <= _index_names(blank_engine)
+
+
+def test_model_indexes_match_migrations():
+    """Test the named indexes the models declare are shipped by a migration"""
+    tables = Base.metadata.tables.values()
+    column_indexes = {
+        f"ix_{table.name}_{column.name}"
+        for table in tables
+        for column in table.columns
+        if column.index
+    }
+    named = {index.name for table in tables for index in table.indexes}
+    # The jobs table has always been created together with its index
+    named -= column_indexes | {"ix_jobs_status"}
+    assert named <= {name for name, *_ in INDEXES + JOB_INDEXES}
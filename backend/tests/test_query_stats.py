@@ -0,0 +1,135 @@
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.config import settings
+from app.middleware.query_stats import QueryStatsMiddleware
+from app.models.trip import Trip
+from app.services.query_stats import statement_shape, track_queries
+
+
+def test_statement_shape():
+    """Test literals and IN lists collapse, identifiers are kept"""
+    assert statement_shape(
+        "SELECT stops_1.id FROM stops AS stops_1\n  WHERE stops_1.trip_id IN (?, ?, ?)"
+        " AND name = 'x''y' LIMIT 10"
+    ) == (
+        "SELECT stops_1.id FROM stops AS stops_1 WHERE stops_1.trip_id IN (?)"
+        " AND name = ? LIMIT ?"
+    )
+
+
+def test_repeated_shapes_are_tracked(db_session):
+    """Test a per-row query loop shows up as one repeated shape"""
+    with track_queries() as stats:
+        for trip_id in range(1, 6):
+            db_session.query(Trip).filter(Trip.id == trip_id).first()
+
+    assert stats.count == 5
+    assert stats.duration > 0
+    ((shape, count),) = stats.repeated(5)
+    assert count == 5
+    assert shape.startswith("SELECT trips.id")
+
+
+def test_debug_headers(client, auth_headers, monkeypatch):
+    """Test DEBUG adds the query count and DB time to responses"""
+    response = client.get("/trips/", headers=auth_headers)
+    assert "x-db-queries" not in response.headers
+
+    monkeypatch.setattr(settings, "DEBUG", True)
+    response = client.get("/trips/", headers=auth_headers)
+    assert int(response.headers["x-db-queries"]) >= 1
+    assert response.headers["server-timing"].startswith("db;dur=")
+
+
+def test_n_plus_one_is_logged(
+    client, auth_headers, create_trip_with_stops, monkeypatch, caplog
+):
+    """Test a statement repeated past the threshold is logged with its route"""
+    trip_id = create_trip_with_stops(1)
+    monkeypatch.setattr(settings, "N_PLUS_ONE_THRESHOLD", 3)
+
+    with caplog.at_level(logging.WARNING, "app.middleware.query_stats"):
+        # Each copy's trip row is its own INSERT ... RETURNING on SQLite
+        client.post(f"/trips/{trip_id}/copies?count=3", headers=auth_headers)
+
+    (message,) = [r.getMessage() for r in caplog.records]
+    assert message.startswith("Possible N+1 in POST /trips/{trip_id}/copies: 3 x ")
+    assert "INSERT INTO trips" in message
+
+
+def test_n_plus_one_is_logged_when_the_route_raises(db_session, monkeypatch, caplog):
+    """Test a request that fails after its query loop is still reported"""
+    monkeypatch.setattr(settings, "N_PLUS_ONE_THRESHOLD", 3)
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware)
+
+    @app.get("/boom")
+    def boom():
+        for trip_id in range(1, 4):
+            db_session.query(Trip).filter(Trip.id == trip_id).first()
+        raise RuntimeError("boom")
+
+    with caplog.at_level(logging.WARNING, "app.middleware.query_stats"):
+        response = TestClient(app, raise_server_exceptions=False).get("/boom")
+
+    assert response.status_code == 500
+    (message,) = [r.getMessage() for r in caplog.records]
+    assert message.startswith("Possible N+1 in GET /boom: 3 x SELECT trips.id")
+
+
+def test_slow_query_is_logged(client, auth_headers, monkeypatch, caplog):
+    """Test statements over SLOW_QUERY_MS are logged"""
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", 1e-6)
+    with caplog.at_level(logging.WARNING, "app.services.query_stats"):
+        client.get("/trips/", headers=auth_headers)
+
+    assert any(r.getMessage().startswith("Slow query") for r in caplog.records)
+
+
+@pytest.mark.parametrize(
+    "method, path, budget",
+    [
+        ("get", "/trips/", 1),
+        ("get", "/trips/{trip_id}", 1),
+        ("get", "/trips/{trip_id}/stops", 3),
+        ("get", "/stops/{stop_id}", 2),
+        ("get", "/budget/{trip_id}", 2),
+        ("post", "/trips/{trip_id}/copy", 8),
+        ("post", "/trips/{trip_id}/copies?count=5", 12),
+    ],
+)
+def test_query_budgets(
+    client,
+    auth_headers,
+    create_trip_with_stops,
+    assert_max_queries,
+    method,
+    path,
+    budget,
+):
+    """Test each endpoint stays within its query budget on a 20-stop trip"""
+    trip_id = create_trip_with_stops(20)
+    stops = client.get(f"/trips/{trip_id}/stops", headers=auth_headers).json()
+    url = path.format(trip_id=trip_id, stop_id=stops[0]["id"])
+
+    with assert_max_queries(budget):
+        response = getattr(client, method)(url, headers=auth_headers)
+    assert response.status_code < 300
+
+
+def test_failed_statement_is_not_recorded(db_session):
+    """Test a statement that raises leaves the timers balanced"""
+    with track_queries() as stats:
+        with pytest.raises(OperationalError):
+            db_session.execute(text("SELECT * FROM no_such_table"))
+        db_session.rollback()
+        db_session.query(Trip).first()
+
+    assert stats.count == 1
+    assert db_session.connection().info["query_started"] == []
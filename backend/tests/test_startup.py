@@ -0,0 +1,38 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from sqlalchemy.orm import sessionmaker
+
+from app import main
+from app.models.user import User
+from app.services.autocomplete import city_autocomplete
+from app.services.geo_index import geo_index
+from app.services.popularity import popularity
+
+
+def test_import_leaves_hashing_and_jwt_unloaded():
+    """Test importing the app doesn't load passlib, argon2 or jose"""
+    code = (
+        "import sys, app.main; "
+        "print(sorted(m for m in ('passlib', 'argon2', 'jose') if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=Path(__file__).parents[1],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == "[]"
+
+
+def test_warm_up_builds_deferred_state(client, db_session, monkeypatch):
+    """Test the post-readiness warm-up creates the admin and the indexes"""
+    monkeypatch.setattr(main, "SessionLocal", sessionmaker(bind=db_session.get_bind()))
+    assert not (city_autocomplete.ready or geo_index.ready or popularity.ready)
+
+    main.warm_up()
+
+    assert db_session.query(User).filter(User.role == "admin").count() == 1
+    assert city_autocomplete.ready and geo_index.ready and popularity.ready
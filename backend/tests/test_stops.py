@@ -0,0 +1,331 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import literal
+
+from app.api.v1 import stops as stops_api
+from app.models.city import City
+
+
+def test_get_trip_stops(client, auth_headers, create_trip_with_stops):
+    """Test listing stops with nested city and activities"""
+    trip_id = create_trip_with_stops(3)
+
+    response = client.get(f"/trips/{trip_id}/stops", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert [stop["order"] for stop in data] == [1, 2, 3]
+    assert data[0]["city"]["name"] == "Paris"
+    assert data[0]["activities"][0]["activity"]["name"] == "Louvre"
+    assert data[1]["activities"] == []
+
+
+def test_get_stop(client, auth_headers, create_trip_with_stops):
+    """Test getting a single stop with its graph"""
+    trip_id = create_trip_with_stops(1)
+    stop_id = client.get(f"/trips/{trip_id}/stops", headers=auth_headers).json()[0][
+        "id"
+    ]
+
+    response = client.get(f"/stops/{stop_id}", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["city"]["country"] == "France"
+
+
+def test_get_nonexistent_stop(client, auth_headers):
+    """Test getting a stop that doesn't exist"""
+    response = client.get("/stops/99999", headers=auth_headers)
+    assert response.status_code == 404
+
+
+def test_trip_stops_query_count_is_constant(
+    client, auth_headers, create_trip_with_stops, assert_max_queries
+):
+    """Test that the itinerary graph loads in a fixed number of queries"""
+    for stop_count in (1, 20):
+        trip_id = create_trip_with_stops(stop_count)
+        with assert_max_queries(3):
+            response = client.get(f"/trips/{trip_id}/stops", headers=auth_headers)
+        assert len(response.json()) == stop_count
+
+
+def test_copy_trip(client, auth_headers, create_trip_with_stops):
+    """Test copying a trip clones its stops and activities"""
+    trip_id = create_trip_with_stops(3)
+
+    response = client.post(f"/trips/{trip_id}/copy", headers=auth_headers)
+    assert response.status_code == 201
+    copy = response.json()
+    assert copy["name"] == "Copy of Budget Trip"
+    assert copy["is_public"] == 0
+
+    original = client.get(f"/trips/{trip_id}/stops", headers=auth_headers).json()
+    cloned = client.get(f"/trips/{copy['id']}/stops", headers=auth_headers).json()
+    assert [s["order"] for s in cloned] == [s["order"] for s in original]
+    assert [len(s["activities"]) for s in cloned] == [1, 0, 1]
+    assert {s["id"] for s in cloned}.isdisjoint({s["id"] for s in original})
+
+
+def test_copy_trip_batch(client, auth_headers, create_trip_with_stops):
+    """Test cloning a trip several times in one call"""
+    trip_id = create_trip_with_stops(2)
+
+    response = client.post(f"/trips/{trip_id}/copies?count=3", headers=auth_headers)
+    assert response.status_code == 201
+    copies = response.json()
+    assert len(copies) == 3
+    assert len({c["id"] for c in copies}) == 3
+
+    for copy in copies:
+        stops = client.get(f"/trips/{copy['id']}/stops", headers=auth_headers).json()
+        assert [len(s["activities"]) for s in stops] == [1, 0]
+
+    # A list even for one copy; /copy itself refuses to make several
+    response = client.post(f"/trips/{trip_id}/copies?count=1", headers=auth_headers)
+    assert len(response.json()) == 1
+    response = client.post(f"/trips/{trip_id}/copy?count=3", headers=auth_headers)
+    assert response.status_code == 422
+    assert f"/trips/{trip_id}/copies" in response.json()["detail"]
+
+
+def test_copy_trip_query_count_is_constant(
+    client, auth_headers, create_trip_with_stops, assert_max_queries
+):
+    """Test that cloning doesn't issue per-stop statements"""
+    for stop_count in (1, 20):
+        trip_id = create_trip_with_stops(stop_count)
+        with assert_max_queries(8):
+            response = client.post(f"/trips/{trip_id}/copy", headers=auth_headers)
+        assert response.status_code == 201
+
+
+def _trip_through(client, auth_headers, db_session, cities):
+    """Create a trip visiting `cities` [(name, lat, lon)] in the given order"""
+    start = datetime(2024, 6, 1)
+    trip_id = client.post(
+        "/trips/",
+        json={
+            "name": "Route Trip",
+            "start_date": start.isoformat(),
+            "end_date": (start + timedelta(days=len(cities))).isoformat(),
+        },
+        headers=auth_headers,
+    ).json()["id"]
+    for i, (name, lat, lon) in enumerate(cities):
+        city = City(name=name, country="Test", latitude=lat, longitude=lon)
+        db_session.add(city)
+        db_session.commit()
+        client.post(
+            f"/trips/{trip_id}/stops",
+            json={
+                "city_id": city.id,
+                "start_date": (start + timedelta(days=i)).isoformat(),
+                "end_date": (start + timedelta(days=i + 1)).isoformat(),
+            },
+            headers=auth_headers,
+        )
+    return trip_id
+
+
+def _route(client, auth_headers, trip_id):
+    stops = client.get(f"/trips/{trip_id}/stops", headers=auth_headers).json()
+    return [stop["city"]["name"] for stop in stops]
+
+
+ZIGZAG = [
+    ("Paris", 48.8566, 2.3522),
+    ("Berlin", 52.52, 13.405),
+    ("Brussels", 50.8503, 4.3517),
+    ("Prague", 50.0755, 14.4378),
+    ("Amsterdam", 52.3676, 4.9041),
+]
+
+
+def test_optimize_route(client, auth_headers, db_session):
+    """Test optimizing reorders stops and reports the distance saved"""
+    trip_id = _trip_through(client, auth_headers, db_session, ZIGZAG)
+
+    response = client.post(f"/trips/{trip_id}/optimize-route", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["distance_saved_km"] > 0
+    assert data["distance_after_km"] < data["distance_before_km"]
+
+    route = _route(client, auth_headers, trip_id)
+    assert route in (
+        ["Paris", "Brussels", "Amsterdam", "Berlin", "Prague"],
+        ["Prague", "Berlin", "Amsterdam", "Brussels", "Paris"],
+    )
+    stops = client.get(f"/trips/{trip_id}/stops", headers=auth_headers).json()
+    assert [stop["id"] for stop in stops] == data["stop_ids"]
+    assert [stop["order"] for stop in stops] == [1, 2, 3, 4, 5]
+
+
+def test_optimize_route_fixed_ends(client, auth_headers, db_session):
+    """Test pinned first and last stops stay in place"""
+    trip_id = _trip_through(client, auth_headers, db_session, ZIGZAG)
+
+    response = client.post(
+        f"/trips/{trip_id}/optimize-route?fix_start=true&fix_end=true",
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+
+    route = _route(client, auth_headers, trip_id)
+    assert route[0] == "Paris"
+    assert route[-1] == "Amsterdam"
+
+
+def test_optimize_route_needs_coordinates(client, auth_headers, create_trip_with_stops):
+    """Test cities without coordinates are rejected"""
+    trip_id = create_trip_with_stops(3)
+
+    response = client.post(f"/trips/{trip_id}/optimize-route", headers=auth_headers)
+    assert response.status_code == 400
+
+
+def _stop_json(city_id, day, **extra):
+    start = datetime(2024, 6, 1) + timedelta(days=day * 2)
+    return {
+        "city_id": city_id,
+        "start_date": start.isoformat(),
+        "end_date": (start + timedelta(days=2)).isoformat(),
+        **extra,
+    }
+
+
+def test_batch_add_stops(
+    client, auth_headers, create_trip_with_stops, seeded_city, assert_max_queries
+):
+    """Test appending many stops in one request and one INSERT"""
+    trip_id = create_trip_with_stops(3)
+    city_id = seeded_city["city_id"]
+
+    with assert_max_queries(6) as stats:
+        response = client.post(
+            f"/trips/{trip_id}/stops:batch",
+            json={
+                "stops": [
+                    _stop_json(city_id, 0, transport_cost=12.5),
+                    _stop_json(city_id, 1),
+                    _stop_json(city_id, 2, notes="last"),
+                ]
+            },
+            headers=auth_headers,
+        )
+    assert response.status_code == 201
+    data = response.json()
+    assert [s["order"] for s in data] == [4, 5, 6]
+    assert data[2]["notes"] == "last"
+    assert data[0]["city"]["name"] == "Paris"
+    inserts = [s for s in stats.shapes.elements() if s.startswith("INSERT INTO stops")]
+    assert len(inserts) == 1
+
+    stops = client.get(f"/trips/{trip_id}/stops", headers=auth_headers).json()
+    assert [s["order"] for s in stops] == [1, 2, 3, 4, 5, 6]
+
+
+def test_batch_add_stops_is_all_or_nothing(
+    client, auth_headers, create_trip_with_stops, seeded_city
+):
+    """Test one bad stop rejects the whole batch"""
+    trip_id = create_trip_with_stops(1)
+    city_id = seeded_city["city_id"]
+
+    response = client.post(
+        f"/trips/{trip_id}/stops:batch",
+        json={"stops": [_stop_json(city_id, 0), _stop_json(99999, 1)]},
+        headers=auth_headers,
+    )
+    assert response.status_code == 404
+    assert "99999" in response.json()["detail"]
+
+    response = client.post(
+        f"/trips/{trip_id}/stops:batch",
+        json={"stops": [_stop_json(city_id, 0), _stop_json(city_id, 30)]},
+        headers=auth_headers,
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("stops[1]")
+
+    response = client.post(
+        "/trips/99999/stops:batch",
+        json={"stops": [_stop_json(city_id, 0)]},
+        headers=auth_headers,
+    )
+    assert response.status_code == 404
+
+    stops = client.get(f"/trips/{trip_id}/stops", headers=auth_headers).json()
+    assert len(stops) == 1
+
+
+def test_batch_add_stops_lost_race_is_conflict(
+    client, auth_headers, create_trip_with_stops, seeded_city, monkeypatch
+):
+    """Test a batch whose positions were taken meanwhile gets a 409"""
+    trip_id = create_trip_with_stops(2)
+    # As if another append had taken position 2 after ours was read
+    monkeypatch.setattr(stops_api, "next_stop_order", lambda trip_id: literal(2))
+
+    response = client.post(
+        f"/trips/{trip_id}/stops:batch",
+        json={"stops": [_stop_json(seeded_city["city_id"], 0)]},
+        headers=auth_headers,
+    )
+    assert response.status_code == 409
+
+    stops = client.get(f"/trips/{trip_id}/stops", headers=auth_headers).json()
+    assert [s["order"] for s in stops] == [1, 2]
+
+
+def test_set_stop_order(client, auth_headers, create_trip_with_stops):
+    """Test reordering every stop of a trip in one call"""
+    trip_id = create_trip_with_stops(4)
+    ids = [
+        s["id"]
+        for s in client.get(f"/trips/{trip_id}/stops", headers=auth_headers).json()
+    ]
+
+    new_order = [ids[2], ids[0], ids[3], ids[1]]
+    response = client.put(
+        f"/trips/{trip_id}/stops/order",
+        json={"stop_ids": new_order},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    assert [s["id"] for s in response.json()] == new_order
+    assert [s["order"] for s in response.json()] == [1, 2, 3, 4]
+
+    for bad in (ids[:3], ids + [ids[0]], ids[:3] + [99999]):
+        response = client.put(
+            f"/trips/{trip_id}/stops/order",
+            json={"stop_ids": bad},
+            headers=auth_headers,
+        )
+        assert response.status_code == 400
+
+
+def test_stop_positions_stay_unique(client, auth_headers, create_trip_with_stops):
+    """Test moves, deletes and appends never leave two stops at one position"""
+    trip_id = create_trip_with_stops(3)
+    first, second, third = [
+        s["id"]
+        for s in client.get(f"/trips/{trip_id}/stops", headers=auth_headers).json()
+    ]
+
+    response = client.put(f"/stops/{third}", json={"order": 1}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["order"] == 1
+
+    client.delete(f"/stops/{first}", headers=auth_headers)
+    response = client.post(
+        f"/trips/{trip_id}/stops",
+        json=_stop_json(
+            client.get(f"/stops/{second}", headers=auth_headers).json()["city_id"], 0
+        ),
+        headers=auth_headers,
+    )
+    assert response.status_code == 201
+
+    stops = client.get(f"/trips/{trip_id}/stops", headers=auth_headers).json()
+    assert [s["id"] for s in stops[:2]] == [third, second]
+    assert [s["order"] for s in stops] == [1, 3, 4]
@@ -197,3 +197,30 @@ def test_user_cannot_access_other_users_trips(client, sample_trip_data):
     # User 2 tries to access User 1's trip
     response = client.get(f"/trips/{trip_id}", headers=headers2)
     assert response.status_code == 404  # Should not find it
+
+
+def test_get_all_trips_pages(client, auth_headers, sample_trip_data):
+    """Test walking the trip list with keyset cursors"""
+    for i in range(5):
+        sample_trip_data["name"] = f"Trip {i}"
+        client.post("/trips/", json=sample_trip_data, headers=auth_headers)
+
+    names, cursor, pages = [], None, 0
+    while True:
+        url = "/trips/?limit=2" + (f"&cursor={cursor}" if cursor else "")
+        response = client.get(url, headers=auth_headers)
+        assert response.status_code == 200
+        names += [trip["name"] for trip in response.json()]
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert pages == 3
+    assert names == [f"Trip {i}" for i in reversed(range(5))]
+
+
+def test_get_all_trips_invalid_cursor(client, auth_headers):
+    """Test that a malformed cursor is rejected"""
+    response = client.get("/trips/?cursor=not-a-cursor", headers=auth_headers)
+    assert response.status_code == 400
@@ -1,5 +1,9 @@
 import pytest
 from fastapi import status
+from sqlalchemy import update
+
+from app.models.user import User
+from app.services.auth_service import user_cache
 
 # FIX: paths to match app.include_router(users.router, prefix="/users")
 
@@ -38,3 +42,72 @@ def test_delete_user_profile(client, auth_headers):
     # 2. Try to access profile again (should fail because user is deleted)
     response_check = client.get("/users/profile", headers=auth_headers)
     assert response_check.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_current_user_is_cached(client, auth_headers, test_user, assert_max_queries):
+    """Test that repeat requests authenticate without a users query"""
+    client.get("/trips/", headers=auth_headers)
+    hits = user_cache.stats()["hits"]
+
+    with assert_max_queries(1) as stats:
+        client.get("/trips/", headers=auth_headers)
+    assert user_cache.stats()["hits"] == hits + 1
+    assert not any("FROM users" in shape for shape in stats.shapes)
+
+
+def test_role_change_invalidates_cache(client, auth_headers, test_user, db_session):
+    """Test that a role change is seen by the next request"""
+    response = client.get("/admin/analytics", headers=auth_headers)
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    user = db_session.query(User).filter(User.id == test_user["user"]["id"]).one()
+    user.role = "admin"
+    db_session.commit()
+
+    response = client.get("/admin/cache/users", headers=auth_headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert {"hits", "misses", "size"} <= response.json().keys()
+
+
+def test_demotion_by_another_process_is_seen(
+    client, auth_headers, test_user, db_session
+):
+    """Test admin routes re-check the role the cached snapshot holds"""
+    user = db_session.query(User).filter(User.id == test_user["user"]["id"]).one()
+    user.role = "admin"
+    db_session.commit()
+    response = client.get("/admin/cache/users", headers=auth_headers)
+    assert response.status_code == status.HTTP_200_OK
+
+    # Another worker's commit: this process's commit hooks never see it
+    with db_session.get_bind().begin() as conn:
+        conn.execute(update(User).where(User.id == user.id).values(role="user"))
+
+    response = client.get("/admin/cache/users", headers=auth_headers)
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    assert user_cache.get(user.id) is None  # Re-read by the next request
+
+
+def test_admin_user_listing_pages(client, auth_headers, test_user, db_session):
+    """Test the admin user listing is paginated"""
+    user = db_session.query(User).filter(User.id == test_user["user"]["id"]).one()
+    user.role = "admin"
+    db_session.commit()
+    for i in range(3):
+        client.post(
+            "/auth/register",
+            json={
+                "email": f"user{i}@example.com",
+                "username": f"user{i}",
+                "password": "Password123!",
+            },
+        )
+
+    first = client.get("/admin/users?limit=2", headers=auth_headers)
+    assert first.status_code == status.HTTP_200_OK
+    assert [u["username"] for u in first.json()] == ["user2", "user1"]
+
+    cursor = first.headers["X-Next-Cursor"]
+    second = client.get(f"/admin/users?limit=2&cursor={cursor}", headers=auth_headers)
+    assert [u["username"] for u in second.json()] == ["user0", "testuser"]
+    assert "X-Next-Cursor" not in second.headers